@@ -16,6 +16,8 @@ from fastapi_limiter import RateLimiter
 from app.models.document import Document
 from app.schemas.document import DocumentCreate, DocumentUpdate, Document as DocumentSchema, DocumentProcessingStatus
 from app.services.document_processor import DocumentProcessor
+from app.services.vector_search import VectorSearchService
+from app.services.auth import redis_client
 from app.core.config import settings
 from app.db.session import get_db
 from app.utils.document_utils import validate_file_type
@@ -271,9 +273,31 @@ async def delete_document(
                 detail="Document not found"
             )
         
+        # Collect vector and chunk IDs before the cascade delete removes their rows, and give
+        # near-duplicates in other documents their own vectors before the cascade unlinks them
+        vector_search = VectorSearchService(db, redis_client)
+        embedding_ids = vector_search.document_embedding_ids(document.id)
+        chunk_ids = vector_search.document_chunk_ids(document.id)
+        promoted = vector_search.promote_duplicates(chunk_ids)
+        
         db.delete(document)
         db.commit()
         
+        try:
+            vector_search.remove_embeddings(embedding_ids, str(client_id), chunk_ids=chunk_ids)
+            vector_search.batch_index(promoted, str(client_id))
+        except Exception as e:
+            # Vectors of deleted chunks are still skipped when results are hydrated,
+            # and promoted vectors are stored rows picked up when the index is next loaded
+            logger.warning(
+                "Failed to remove document vectors",
+                extra={
+                    'document_id': str(document_id),
+                    'client_id': str(client_id),
+                    'error': str(e)
+                }
+            )
+        
         logger.info(
             "Document deleted successfully",
             extra={
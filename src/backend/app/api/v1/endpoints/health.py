@@ -12,6 +12,7 @@ from typing import Dict, Any
 from ../../services.cache_service import CacheService
 from ../../db.session import get_db
 from ../../core.config import Settings
+from app.services.index_registry import get_index_registry
 
 # Initialize router with health check tag
 router = APIRouter(tags=['health'], prefix='/health')
@@ -94,6 +95,30 @@ async def check_cache() -> Dict[str, Any]:
             detail=f"Cache health check failed: {str(e)}"
         )
 
+def check_vector_indices() -> Dict[str, Any]:
+    """
+    Report which tenant vector indices are loaded in this process and where from.
+    """
+    try:
+        registry = get_index_registry()
+        indices = registry.stats()
+
+        return {
+            "status": "healthy",
+            "loaded_tenants": len(indices),
+            "total_vectors": sum(index['vector_count'] for index in indices),
+            "snapshots_enabled": registry.snapshots_enabled,
+            "resident_bytes": registry.resident_bytes(),
+            "memory_budget": registry.memory_budget,
+            "indices": indices
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Vector index health check failed: {str(e)}"
+        )
+
 @router.get('/', status_code=status.HTTP_200_OK)
 async def get_health(db=Depends(get_db)) -> Dict[str, Any]:
     """
@@ -105,6 +130,7 @@ async def get_health(db=Depends(get_db)) -> Dict[str, Any]:
         # Check all critical components
         db_health = await check_database(db)
         cache_health = await check_cache()
+        vector_index_health = check_vector_indices()
         
         # Calculate overall system health
         system_healthy = (
@@ -120,7 +146,8 @@ async def get_health(db=Depends(get_db)) -> Dict[str, Any]:
             "response_time_ms": round(response_time, 2),
             "components": {
                 "database": db_health,
-                "cache": cache_health
+                "cache": cache_health,
+                "vector_indices": vector_index_health
             }
         }
         
@@ -131,9 +158,11 @@ async def get_health(db=Depends(get_db)) -> Dict[str, Any]:
         )
 
 @router.get('/ready', status_code=status.HTTP_200_OK)
-async def get_readiness() -> Dict[str, str]:
+async def get_readiness() -> Dict[str, Any]:
     """
     Kubernetes readiness probe endpoint with comprehensive service checks.
+    Also reports which tenant vector indices are loaded; tenants without a loaded index
+    are built on first query, so they do not block readiness.
     """
     try:
         # Verify critical service availability
@@ -142,8 +171,16 @@ async def get_readiness() -> Dict[str, str]:
         
         cache_service = CacheService()
         await cache_service.check_connectivity()
+
+        indices = get_index_registry().stats()
         
-        return {"status": "ready"}
+        return {
+            "status": "ready",
+            "vector_indices": {
+                "loaded_tenants": [index['tenant_id'] for index in indices],
+                "sources": {index['tenant_id']: index['source'] for index in indices}
+            }
+        }
         
     except Exception as e:
         raise HTTPException(
@@ -5,6 +5,7 @@ Contains system-wide enums, configuration constants, and status codes.
 Version: 1.0
 """
 
+import re
 from enum import Enum, unique  # version: latest
 
 # Project Configuration Constants
@@ -18,6 +19,10 @@ DEFAULT_CHUNK_SIZE = 1000
 DEFAULT_CHUNK_OVERLAP = 200
 MAX_CONCURRENT_PROCESSING = 10
 
+# Text Tokenization Constants
+# Alphanumeric runs joined by -, ., / or _ stay together so "XJ-4500/B" is one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./_][a-z0-9]+)*")
+
 # Rate Limiting Constants
 RATE_LIMIT_REQUESTS = 1000  # requests per hour
 RATE_LIMIT_PERIOD = 3600   # period in seconds
@@ -75,4 +80,36 @@ class VectorSearchConfig(Enum):
     TOP_K_RESULTS = 5                # Number of top results to return
     CONTEXT_WINDOW_SIZE = 8192       # Size of context window in tokens
     BATCH_SIZE = 32                  # Batch size for vector processing
-    DISTANCE_METRIC = "cosine"       # Distance metric for similarity calculation
\ No newline at end of file
+    DISTANCE_METRIC = "cosine"       # Distance metric for similarity calculation
+
+@unique
+class IndexType(Enum):
+    """
+    Enum of supported per-tenant vector index structures.
+    Trades exact recall for lower search latency on large tenants.
+    """
+    FLAT = "flat"            # Exact brute-force inner product search
+    IVF_FLAT = "ivf_flat"    # Inverted file over k-means clusters, tuned by nlist/nprobe
+    HNSW = "hnsw"            # Hierarchical navigable small-world graph, tuned by M/efSearch
+    SQ8 = "sq8"              # 8-bit scalar quantized exact scan, 4x smaller than float32
+    IVF_PQ = "ivf_pq"        # Inverted file with product quantized codes, 16x+ smaller
+
+@unique
+class ProjectionType(Enum):
+    """
+    Enum of optional projections applied to embeddings before they enter a tenant index.
+    Smaller vectors shrink the index and speed up search; results are reranked at full dimension.
+    """
+    NONE = "none"            # Index the full embedding
+    PCA = "pca"              # Principal components fitted per tenant
+    TRUNCATE = "truncate"    # Leading dimensions, for models trained for truncation
+
+@unique
+class IndexResidency(Enum):
+    """
+    Enum of where a tenant index lives, from least to most private memory held.
+    Tenants are demoted or evicted to keep the registry within its memory budget.
+    """
+    EVICTED = "evicted"      # Not loaded; rebuilt from its snapshot or the database on next search
+    MMAP = "mmap"            # Served from a memory-mapped snapshot in the shared page cache
+    MEMORY = "memory"        # Held in private process memory
@@ -108,6 +108,16 @@ class Settings(BaseSettings):
         'application_insights': {
             'connection_string': os.getenv('AZURE_APP_INSIGHTS_CONNECTION_STRING'),
             'sampling_percentage': 100 if ENV != 'production' else 10
+        },
+        # Adaptive (AIMD) limit on concurrent OpenAI requests shared by the whole process;
+        # background ingestion may hold at most background_share of the limit
+        'openai_concurrency': {
+            'initial_limit': int(os.getenv('OPENAI_CONCURRENCY_INITIAL_LIMIT', '8')),
+            'min_limit': 1,
+            'max_limit': int(os.getenv('OPENAI_CONCURRENCY_MAX_LIMIT', '64')),
+            'backoff_ratio': 0.5,
+            'latency_tolerance': 2.0,
+            'background_share': float(os.getenv('OPENAI_CONCURRENCY_BACKGROUND_SHARE', '0.75'))
         }
     }
 
@@ -118,11 +128,119 @@ class Settings(BaseSettings):
         'top_k_results': 5,
         'batch_size': 32,
         'distance_metric': 'cosine',
+        # Index type used once a tenant outgrows exact search: flat, ivf_flat, hnsw, sq8 or ivf_pq
+        'index_type': os.getenv('VECTOR_INDEX_TYPE', 'flat'),
         'index_settings': {
-            'development': {'nprobe': 8, 'ef_search': 100},
-            'staging': {'nprobe': 16, 'ef_search': 200},
-            'production': {'nprobe': 32, 'ef_search': 400}
-        }
+            'development': {'nprobe': 8, 'ef_search': 100, 'nlist': None, 'hnsw_m': 32,
+                            'ef_construction': 200},
+            'staging': {'nprobe': 16, 'ef_search': 200, 'nlist': None, 'hnsw_m': 32,
+                        'ef_construction': 200},
+            'production': {'nprobe': 32, 'ef_search': 400, 'nlist': None, 'hnsw_m': 48,
+                           'ef_construction': 400}
+        },
+        # Tenants stay on exact flat search below these sizes; IVF retrains as tenants grow
+        'rebuild_thresholds': {
+            'ivf_min_vectors': 50000,
+            'hnsw_min_vectors': 20000,
+            'sq8_min_vectors': 10000,
+            'ivf_pq_min_vectors': 100000,
+            'ivf_retrain_growth': 4.0,
+            # Tombstoned fraction at which a tenant index is compacted in the background
+            'compact_deleted_fraction': 0.2
+        },
+        # Quantized tiers (sq8, ivf_pq) and full-precision rerank of their candidates
+        'quantization': {
+            'pq_m': 384,
+            'pq_nbits': 8,
+            'rerank': True,
+            'rerank_factor': 4
+        },
+        # Micro-batching of concurrent single-query searches against the same tenant index
+        'batching': {
+            'enabled': os.getenv('VECTOR_SEARCH_BATCHING_ENABLED', 'true').lower() == 'true',
+            'window_ms': float(os.getenv('VECTOR_SEARCH_BATCH_WINDOW_MS', '2')),
+            'max_batch_size': int(os.getenv('VECTOR_SEARCH_MAX_BATCH_SIZE', '32'))
+        },
+        # Bounded thread pool for asearch(); searches beyond max_pending queued or running
+        # are rejected
+        'executor': {
+            'threads': int(os.getenv('VECTOR_SEARCH_EXECUTOR_THREADS', '0')) or None,
+            'max_pending': int(os.getenv('VECTOR_SEARCH_EXECUTOR_MAX_PENDING', '256'))
+        },
+        # Split large tenants into shards searched in parallel; override per tenant with 'shards'
+        'sharding': {
+            'shards': int(os.getenv('VECTOR_INDEX_SHARDS', '1')),
+            'search_threads': int(os.getenv('VECTOR_SEARCH_SHARD_THREADS', '0')) or None
+        },
+        # Optional dimension reduction (none, pca or truncate) of indexed vectors with a
+        # full-dimension rerank; override per tenant with projection/projection_dim
+        'projection': {
+            'method': os.getenv('VECTOR_INDEX_PROJECTION', 'none'),
+            'dimension': int(os.getenv('VECTOR_INDEX_PROJECTION_DIM', '256')),
+            'min_vectors': 10000
+        },
+        # BM25 lexical retrieval fused with vector results by reciprocal-rank fusion
+        'hybrid': {
+            'enabled': os.getenv('VECTOR_SEARCH_HYBRID_ENABLED', 'true').lower() == 'true',
+            'rrf_k': int(os.getenv('VECTOR_SEARCH_RRF_K', '60')),
+            'candidates': int(os.getenv('VECTOR_SEARCH_HYBRID_CANDIDATES', '50'))
+        },
+        # Two-level retrieval for tenants with many documents: rank documents by the centroid
+        # of their chunk vectors, then search only the chunks of the top documents
+        'hierarchical': {
+            'enabled': os.getenv('VECTOR_SEARCH_HIERARCHICAL_ENABLED', 'false').lower() == 'true',
+            'min_documents': int(os.getenv('VECTOR_SEARCH_HIERARCHICAL_MIN_DOCUMENTS', '1000')),
+            'top_documents': int(os.getenv('VECTOR_SEARCH_HIERARCHICAL_TOP_DOCUMENTS', '50'))
+        },
+        # Resident memory budget for tenant indices; least-recently-searched tenants are demoted
+        # to their memory-mapped snapshot, or evicted without snapshots, and the most active
+        # tenants by decayed lookup counts are loaded in the background at startup
+        'memory': {
+            'budget_mb': int(os.getenv('VECTOR_INDEX_MEMORY_BUDGET_MB', '0')) or None,
+            'warmup_tenants': int(os.getenv('VECTOR_INDEX_WARMUP_TENANTS', '20')),
+            'usage_half_life_hours': 24,
+            'usage_save_seconds': 60
+        },
+        # SimHash near-duplicate detection before embedding; chunks within max_distance bits
+        # of an indexed chunk are linked to it instead of being embedded and indexed
+        'deduplication': {
+            'enabled': os.getenv('VECTOR_SEARCH_DEDUP_ENABLED', 'false').lower() == 'true',
+            'max_distance': int(os.getenv('VECTOR_SEARCH_DEDUP_MAX_DISTANCE', '3')),
+            'min_tokens': 8
+        },
+        # Embedding backend: azure_openai, or local for deterministic offline CPU embeddings
+        'embedding_provider': {
+            'name': os.getenv('EMBEDDING_PROVIDER', 'azure_openai'),
+            'model': os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002'),
+            'local_processes': int(os.getenv('EMBEDDING_LOCAL_PROCESSES', '0')) or None
+        },
+        # Embedding requests are packed by token count up to these per-request budgets
+        'embedding_packing': {
+            'max_request_tokens': int(os.getenv('EMBEDDING_MAX_REQUEST_TOKENS', '32768')),
+            'max_request_inputs': int(os.getenv('EMBEDDING_MAX_REQUEST_INPUTS', '2048')),
+            'max_input_tokens': int(os.getenv('EMBEDDING_MAX_INPUT_TOKENS', '8191'))
+        },
+        # Content-addressed embedding cache keyed by normalized text, model and embedding
+        # version per tenant; redis shares entries across workers, local is per process
+        'embedding_cache': {
+            'enabled': os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true',
+            'backend': os.getenv('EMBEDDING_CACHE_BACKEND', 'redis'),
+            'ttl_seconds': int(os.getenv('EMBEDDING_CACHE_TTL_SECONDS', '604800')),
+            'local_max_entries': int(os.getenv('EMBEDDING_CACHE_LOCAL_MAX_ENTRIES', '100000'))
+        },
+        # On-disk tenant index snapshots, memory-mapped so processes share the page cache
+        'snapshot': {
+            'enabled': os.getenv('VECTOR_INDEX_SNAPSHOTS_ENABLED', 'true').lower() == 'true',
+            'directory': os.getenv('VECTOR_INDEX_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'indices')),
+            'mmap': True,
+            'keep_generations': 2,
+            # Rewrite a changed tenant snapshot in the background after this many
+            # added or removed vectors, or once the oldest unsaved change is this old
+            'save_changes': int(os.getenv('VECTOR_INDEX_SNAPSHOT_SAVE_CHANGES', '10000')),
+            'save_seconds': int(os.getenv('VECTOR_INDEX_SNAPSHOT_SAVE_SECONDS', '300'))
+        },
+        # Per-tenant index_type and index_settings overrides keyed by tenant ID
+        'tenant_overrides': json.loads(os.getenv('VECTOR_INDEX_TENANT_OVERRIDES', '{}'))
     }
 
     # Security configuration
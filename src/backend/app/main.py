@@ -16,7 +16,10 @@ from opencensus.ext.azure.trace_exporter import ApplicationInsights  # version:
 
 from .api.v1.router import router as api_v1_router
 from .core.config import settings
+from .db.session import SessionLocal
 from .middleware.cors_middleware import get_cors_middleware
+from .services.index_registry import get_index_registry
+from .services.vector_search import VectorSearchService
 
 # Initialize FastAPI application with enhanced configuration
 app = FastAPI(
@@ -55,6 +58,12 @@ async def startup_event_handler():
         vector_settings = settings.get_vector_search_settings()
         logger.info("Vector search engine initialized", extra=vector_settings)
 
+        # Load the most active tenants' indices in the background
+        warm_up_session = SessionLocal()
+        VectorSearchService(warm_up_session, cache_client=None).warm_up(
+            on_complete=warm_up_session.close
+        )
+
         # Configure Prometheus metrics collection
         PrometheusMiddleware().instrument(app)
         logger.info("Prometheus metrics collection enabled")
@@ -75,8 +84,9 @@ async def shutdown_event_handler():
         # Close database connections
         logger.info("Closing database connections")
 
-        # Cleanup vector search resources
+        # Cleanup vector search resources, persisting index changes not yet snapshotted
         logger.info("Cleaning up vector search resources")
+        get_index_registry().save_dirty_snapshots()
 
         # Flush monitoring metrics
         logger.info("Flushing monitoring metrics")
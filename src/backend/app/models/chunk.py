@@ -1,7 +1,9 @@
 from datetime import datetime
 from uuid import uuid4
 import json
-from sqlalchemy import Column, String, Integer, Text, DateTime, UUID, ForeignKey, JSON, CheckConstraint
+from sqlalchemy import (
+    Column, String, Integer, Text, DateTime, UUID, ForeignKey, JSON, CheckConstraint
+)
 from sqlalchemy.orm import relationship, validates
 from app.models.document import Document
 
@@ -11,7 +13,8 @@ METADATA_SCHEMA_VERSION = '1.0'
 
 class Chunk(Document.Base):
     """
-    SQLAlchemy model representing a document chunk for vector search with enhanced metadata handling.
+    SQLAlchemy model representing a document chunk for vector search with enhanced
+    metadata handling.
     Implements comprehensive chunk management for AI-powered document processing and retrieval.
     """
     __tablename__ = 'chunks'
@@ -22,6 +25,9 @@ class Chunk(Document.Base):
     document_id = Column(UUID, ForeignKey('documents.id', ondelete='CASCADE'),
                         nullable=False, index=True,
                         doc="Reference to parent document")
+    canonical_chunk_id = Column(UUID, ForeignKey('chunks.id', ondelete='SET NULL'),
+                                nullable=True, index=True,
+                                doc="Chunk whose embedding this near-duplicate shares, if any")
 
     # Content Fields
     content = Column(Text, nullable=False,
@@ -63,7 +69,7 @@ class Chunk(Document.Base):
                            cascade='all, delete-orphan', uselist=False,
                            doc="Associated vector embedding")
 
-    def __init__(self, document_id, content, sequence, metadata=None):
+    def __init__(self, document_id, content, sequence, metadata=None, canonical_chunk_id=None):
         """
         Initialize chunk with required fields and metadata validation.
 
@@ -72,6 +78,7 @@ class Chunk(Document.Base):
             content (str): Chunk content
             sequence (int): Sequence number in document
             metadata (dict, optional): Additional metadata for the chunk
+            canonical_chunk_id (UUID, optional): Canonical chunk of a near-duplicate
 
         Raises:
             ValidationError: If validation fails for any field
@@ -80,6 +87,7 @@ class Chunk(Document.Base):
         self.document_id = document_id
         self.content = content
         self.sequence = sequence
+        self.canonical_chunk_id = canonical_chunk_id
         
         # Initialize metadata with defaults and provided values
         base_metadata = {
@@ -117,13 +125,16 @@ class Chunk(Document.Base):
             'document_id': str(self.document_id),
             'content': self.content,
             'sequence': self.sequence,
+            'canonical_chunk_id': str(self.canonical_chunk_id) if self.canonical_chunk_id else None,
             'metadata': {
                 'schema_version': self.metadata.get('schema_version'),
                 'vector_params': self.metadata.get('vector_params', {}),
                 'processing_stats': self.metadata.get('processing_stats', {})
             },
             'created_at': self.created_at.isoformat(),
-            'last_processed_at': self.last_processed_at.isoformat() if self.last_processed_at else None,
+            'last_processed_at': (
+                self.last_processed_at.isoformat() if self.last_processed_at else None
+            ),
             'status': self.status,
             'embedding': self.embedding.to_dict() if self.embedding else None
         }
@@ -176,7 +187,9 @@ class Chunk(Document.Base):
 
         # Check size limit
         if len(json.dumps(metadata)) > MAX_METADATA_SIZE:
-            raise ValueError(f"Metadata size exceeds maximum allowed size of {MAX_METADATA_SIZE} bytes")
+            raise ValueError(
+                f"Metadata size exceeds maximum allowed size of {MAX_METADATA_SIZE} bytes"
+            )
 
         # Validate required fields
         required_fields = {'schema_version', 'vector_params', 'processing_stats'}
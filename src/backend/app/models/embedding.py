@@ -9,7 +9,7 @@ Version: 1.0.0
 from datetime import datetime
 from uuid import uuid4
 import numpy as np  # version: ^1.24.0
-from sqlalchemy import Column, ForeignKey, UUID, ARRAY, Float, DateTime, JSON, String, Index
+from sqlalchemy import Column, ForeignKey, UUID, Float, DateTime, JSON, String, Index, LargeBinary
 from sqlalchemy.orm import relationship, validates
 from app.db.base import Base
 from app.models.chunk import Chunk
@@ -17,6 +17,38 @@ from app.models.chunk import Chunk
 # Constants for vector configuration
 EMBEDDING_VERSION = '1.0'
 VECTOR_DIMENSION = 1536  # As per technical spec A.1.1
+VECTOR_DTYPE = np.float32  # Stored as raw little-endian float32, 6 KB per 1536-d vector
+EPSILON = 1e-8  # Vectors with a smaller norm are stored unnormalized
+
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    """
+    Encode a vector as unit-length float32 bytes for the binary embedding column.
+
+    Args:
+        vector: Embedding vector of shape (VECTOR_DIMENSION,)
+
+    Returns:
+        bytes: Raw float32 buffer
+    """
+    vector = np.asarray(vector, dtype=VECTOR_DTYPE).reshape(-1)
+    norm = np.linalg.norm(vector)
+    if norm >= EPSILON:
+        vector = vector / norm
+    return vector.astype('<f4', copy=False).tobytes()
+
+
+def decode_vector(buffer: bytes) -> np.ndarray:
+    """
+    Decode a binary embedding column value without copying.
+
+    Args:
+        buffer: Raw float32 buffer written by encode_vector
+
+    Returns:
+        numpy.ndarray: Read-only float32 view over the buffer
+    """
+    return np.frombuffer(buffer, dtype='<f4')
 
 class Embedding(Base):
     """
@@ -33,8 +65,8 @@ class Embedding(Base):
                      doc="Reference to parent chunk")
 
     # Vector and Similarity Fields
-    embedding = Column(ARRAY(Float), nullable=False,
-                      doc="Vector embedding array")
+    vector = Column(LargeBinary, nullable=False,
+                   doc="Unit-length float32 embedding vector as raw bytes")
     similarity_score = Column(Float, nullable=False, default=0.0,
                             doc="Similarity score for ranking")
 
@@ -101,7 +133,7 @@ class Embedding(Base):
 
         self.id = uuid4()
         self.chunk_id = chunk_id
-        self.embedding = embedding_vector.tolist()
+        self.vector = encode_vector(embedding_vector)
         self.similarity_score = similarity_score
         self.metadata = base_metadata
         self.version = EMBEDDING_VERSION
@@ -148,12 +180,12 @@ class Embedding(Base):
 
     def get_vector(self) -> np.ndarray:
         """
-        Get embedding as numpy array with caching.
+        Get embedding as a zero-copy numpy view over the stored bytes.
 
         Returns:
-            numpy.ndarray: Embedding vector as numpy array
+            numpy.ndarray: Read-only unit-length float32 embedding vector
         """
-        return np.array(self.embedding, dtype=np.float32)
+        return decode_vector(self.vector)
 
     @validates('metadata')
     def validate_metadata(self, key: str, metadata: dict) -> dict:
@@ -141,7 +141,7 @@ class Embedding(EmbeddingInDB, EmbeddingBase):
             data = {
                 "id": orm_model.id,
                 "chunk_id": orm_model.chunk_id,
-                "embedding": cls.validate_embedding(orm_model.embedding),
+                "embedding": cls.validate_embedding(orm_model.get_vector().tolist()),
                 "similarity_score": orm_model.similarity_score,
                 "metadata": orm_model.metadata,
                 "created_at": orm_model.created_at,
@@ -5,10 +5,13 @@ Provides secure, monitored, and context-aware query processing with multi-tenant
 Version: 1.0.0
 """
 
+import asyncio
 import logging
 import numpy as np  # version: ^1.24.0
 import openai  # version: ^1.3.0
-from tenacity import retry, stop_after_attempt, retry_if_exception_type  # version: ^8.2.0
+from tenacity import (  # version: ^8.2.0
+    retry, stop_after_attempt, retry_if_exception, retry_if_exception_type, wait_exponential
+)
 from prometheus_client import Counter, Histogram  # version: ^0.17.0
 from typing import Dict, List, Optional
 import json
@@ -16,6 +19,10 @@ import time
 
 from .vector_search import VectorSearchService
 from .cache_service import CacheService
+from .embedding_cache import create_embedding_cache
+from .embedding_packer import count_tokens, get_packing_budgets, pack_requests
+from .embedding_provider import get_embedding_provider
+from .request_limiter import RequestPriority, get_request_limiter
 from ..core.config import settings
 
 # Constants
@@ -24,6 +31,7 @@ MAX_RETRIES = 3
 TEMPERATURE = 0.7
 CACHE_TTL = 86400  # 24 hours
 MAX_TOKENS = 4096
+EMBEDDING_MAX_INPUTS = 2048  # Inputs the embeddings API accepts in one request
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -32,6 +40,32 @@ logger = logging.getLogger(__name__)
 ai_request_counter = Counter('ai_requests_total', 'Total AI requests processed')
 ai_error_counter = Counter('ai_errors_total', 'Total AI processing errors')
 ai_latency = Histogram('ai_request_latency_seconds', 'AI request latency')
+embedding_batch_inputs = Histogram(
+    'ai_embedding_batch_inputs', 'Inputs sent per embedding request',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+)
+embedding_batch_splits = Counter(
+    'ai_embedding_batch_splits_total', 'Embedding requests split to isolate rejected inputs'
+)
+embedding_input_failures = Counter(
+    'ai_embedding_input_failures_total', 'Embedding inputs rejected by the API even on their own'
+)
+
+
+def is_input_error(error: Exception) -> bool:
+    """
+    Check whether an API error was caused by the request inputs (HTTP 400, e.g. an input
+    over the token limit) rather than by the service, so resending it cannot succeed.
+
+    Args:
+        error: Exception raised by the OpenAI client
+
+    Returns:
+        bool: True for input errors
+    """
+    status = getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+    return status == 400
+
 
 class AIService:
     """
@@ -62,6 +96,14 @@ class AIService:
         openai.api_type = "azure"
         openai.api_base = azure_settings.get('openai_api_base')
         openai.api_version = "2023-07-01-preview"
+
+        # Embedding backend and content-addressed embedding cache, None when disabled
+        self._provider = get_embedding_provider()
+        self._embedding_cache = create_embedding_cache(cache_service, self._provider.model)
+        self._packing = get_packing_budgets()
+
+        # Adaptive concurrency limit shared by all outbound OpenAI requests in the process
+        self._limiter = get_request_limiter()
         
         # Initialize metrics
         self._metrics = {
@@ -71,16 +113,19 @@ class AIService:
             'last_error': None
         }
 
-    @retry(stop=stop_after_attempt(MAX_RETRIES), 
+    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=wait_exponential(multiplier=1, max=10),
            retry=retry_if_exception_type(Exception))
     @ai_latency.time()
-    async def generate_embeddings(self, text: str, metadata: Dict) -> np.ndarray:
+    async def generate_embeddings(self, text: str, metadata: Dict,
+                                  priority: RequestPriority = RequestPriority.INTERACTIVE
+                                  ) -> np.ndarray:
         """
         Generate embeddings for input text using GPT-4 with error handling.
 
         Args:
             text: Input text for embedding generation
             metadata: Additional metadata for tracking
+            priority: Concurrency priority, interactive for query embeddings
 
         Returns:
             numpy.ndarray: Generated embedding vector
@@ -92,20 +137,28 @@ class AIService:
 
             # Add tenant context to metadata
             metadata['tenant_id'] = self._tenant_id
+
+            # Serve repeated texts from the embedding cache without calling the API
+            cache_key = None
+            if self._embedding_cache is not None:
+                cache_key = self._embedding_cache.key(self._tenant_id, text)
+                cached = (await self._embedding_cache.get_many([cache_key]))[0]
+                if cached is not None:
+                    return cached
             
             # Generate embeddings with security headers
-            response = await openai.Embedding.acreate(
-                input=text,
-                model="text-embedding-ada-002",
-                headers={
-                    'X-Tenant-ID': self._tenant_id,
-                    'X-Request-ID': metadata.get('request_id')
-                }
-            )
-            
-            # Convert to numpy array
-            embedding = np.array(response['data'][0]['embedding'], dtype=np.float32)
+            async with self._limiter.slot(priority, kind='embeddings'):
+                embedding = (await self._provider.aembed(
+                    [text],
+                    headers={
+                        'X-Tenant-ID': self._tenant_id,
+                        'X-Request-ID': metadata.get('request_id')
+                    }
+                ))[0]
             
+            if cache_key is not None:
+                await self._embedding_cache.set_many({cache_key: embedding})
+
             # Update metrics
             self._metrics['requests'] += 1
             
@@ -123,6 +176,132 @@ class AIService:
                         extra={'tenant_id': self._tenant_id, 'error': str(e)})
             raise
 
+    async def generate_embeddings_batch(self, texts: List[str], metadata: Dict,
+                                        cache_stats: Optional[Dict[str, int]] = None,
+                                        priority: RequestPriority = RequestPriority.BACKGROUND
+                                        ) -> List[Optional[np.ndarray]]:
+        """
+        Generate embeddings for many texts, packing them into requests by token count up to the
+        configured token and input budgets and mapping the returned vectors back to their inputs
+        by index. Packed requests run concurrently under the request limiter. Texts found in the
+        embedding cache, and repeats of a text within the batch, are not sent to the API. A
+        request rejected because of its inputs is split in half until the rejected inputs are
+        isolated, so one bad chunk does not fail the rest of the batch.
+
+        Args:
+            texts: Input texts for embedding generation
+            metadata: Additional metadata for tracking
+            cache_stats: Optional dict whose 'hits' and 'misses' counts are incremented
+            priority: Concurrency priority, background for ingestion
+
+        Returns:
+            List of embedding vectors aligned with texts, None for inputs the API rejects
+        """
+        if any(not text or not isinstance(text, str) for text in texts):
+            raise ValueError("Invalid input text")
+
+        # Add tenant context to metadata
+        metadata['tenant_id'] = self._tenant_id
+        headers = {
+            'X-Tenant-ID': self._tenant_id,
+            'X-Request-ID': metadata.get('request_id')
+        }
+
+        if self._embedding_cache is not None:
+            keys = [self._embedding_cache.key(self._tenant_id, text) for text in texts]
+            embeddings = await self._embedding_cache.get_many(keys)
+        else:
+            keys = list(texts)
+            embeddings = [None] * len(texts)
+
+        # Positions of each distinct text still to embed
+        pending: Dict[str, List[int]] = {}
+        for position, (key, embedding) in enumerate(zip(keys, embeddings)):
+            if embedding is None:
+                pending.setdefault(key, []).append(position)
+
+        misses = sum(len(positions) for positions in pending.values())
+        if cache_stats is not None:
+            cache_stats['hits'] = cache_stats.get('hits', 0) + len(texts) - misses
+            cache_stats['misses'] = cache_stats.get('misses', 0) + misses
+
+        pending_keys = list(pending)
+        pending_texts = [texts[pending[key][0]] for key in pending_keys]
+        requests = pack_requests(
+            count_tokens(pending_texts, self._provider.model),
+            max_tokens=self._packing['max_tokens'],
+            max_inputs=min(self._packing['max_inputs'], EMBEDDING_MAX_INPUTS),
+            max_input_tokens=self._packing['max_input_tokens']
+        )
+        results = await asyncio.gather(*(
+            self._embed_or_split(pending_texts[start:end], headers, priority)
+            for start, end in requests
+        ))
+        fetched = [embedding for result in results for embedding in result]
+
+        for key, embedding in zip(pending_keys, fetched):
+            for position in pending[key]:
+                embeddings[position] = embedding
+
+        if self._embedding_cache is not None:
+            await self._embedding_cache.set_many({
+                key: embedding for key, embedding in zip(pending_keys, fetched)
+                if embedding is not None
+            })
+
+        logger.debug("Batch embeddings generated",
+                    extra={'tenant_id': self._tenant_id, 'input_count': len(texts),
+                           'cache_hits': len(texts) - misses, 'requested_count': len(pending_texts),
+                           'request_count': len(requests),
+                           'failed_count': sum(embedding is None for embedding in embeddings)})
+
+        return embeddings
+
+    async def _embed_or_split(self, texts: List[str], headers: Dict,
+                              priority: RequestPriority) -> List[Optional[np.ndarray]]:
+        """Embed texts in one request, halving it while the API rejects its inputs."""
+        try:
+            return await self._request_embeddings(texts, headers, priority)
+
+        except Exception as e:
+            if not is_input_error(e):
+                self._metrics['errors'] += 1
+                self._metrics['last_error'] = str(e)
+                ai_error_counter.inc()
+                raise
+            if len(texts) == 1:
+                self._metrics['errors'] += 1
+                self._metrics['last_error'] = str(e)
+                embedding_input_failures.inc()
+                logger.warning("Embedding input rejected",
+                               extra={'tenant_id': self._tenant_id, 'text_length': len(texts[0]),
+                                      'error': str(e)})
+                return [None]
+
+            embedding_batch_splits.inc()
+            middle = len(texts) // 2
+            return (await self._embed_or_split(texts[:middle], headers, priority)
+                    + await self._embed_or_split(texts[middle:], headers, priority))
+
+    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=wait_exponential(multiplier=1, max=10),
+           retry=retry_if_exception(lambda error: not is_input_error(error)), reraise=True)
+    async def _request_embeddings(self, texts: List[str], headers: Dict,
+                                  priority: RequestPriority) -> List[np.ndarray]:
+        """
+        Send one embeddings request for a list of inputs, retrying service errors only.
+        Each attempt waits for its own concurrency slot, so retries after throttling queue
+        behind the reduced limit.
+
+        Returns:
+            List of embedding vectors in input order
+        """
+        embedding_batch_inputs.observe(len(texts))
+        async with self._limiter.slot(priority, kind='embeddings', cost=len(texts)):
+            embeddings = await self._provider.aembed(texts, headers=headers)
+
+        self._metrics['requests'] += 1
+        return embeddings
+
     @ai_latency.time()
     async def process_query(self, query: str, chat_history: str, 
                           user_context: Dict) -> Dict:
@@ -158,11 +337,12 @@ class AIService:
             )
 
             # Retrieve relevant context
-            context_chunks = await self._vector_search.search(
+            context_chunks = await self._vector_search.asearch(
                 query_embedding,
                 self._tenant_id,
                 top_k=5,
-                threshold=0.8
+                threshold=0.8,
+                query_text=query
             )
 
             # Format prompt with context and history
@@ -207,7 +387,7 @@ class AIService:
                               'query': query})
             raise
 
-    @retry(stop=stop_after_attempt(MAX_RETRIES),
+    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=wait_exponential(multiplier=1, max=10),
            retry=retry_if_exception_type(Exception))
     @ai_latency.time()
     async def generate_response(self, prompt: str, context: List[Dict],
@@ -241,14 +421,15 @@ class AIService:
                 'X-Request-ID': str(time.time())
             }
 
-            # Generate completion
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-4",
-                messages=messages,
-                temperature=TEMPERATURE,
-                max_tokens=MAX_TOKENS,
-                headers=headers
-            )
+            # Generate completion; chat requests are always interactive
+            async with self._limiter.slot(RequestPriority.INTERACTIVE, kind='chat'):
+                response = await openai.ChatCompletion.acreate(
+                    model="gpt-4",
+                    messages=messages,
+                    temperature=TEMPERATURE,
+                    max_tokens=MAX_TOKENS,
+                    headers=headers
+                )
 
             # Extract and validate response
             generated_text = response.choices[0].message.content
@@ -296,6 +477,7 @@ class AIService:
                 'openai_api': True,
                 'vector_search': vector_health,
                 'cache': cache_health,
+                'concurrency': self._limiter.get_stats(),
                 'metrics': self._metrics,
                 'timestamp': time.time()
             }
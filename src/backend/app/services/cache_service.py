@@ -10,7 +10,7 @@ import json
 import logging
 import pickle
 import asyncio
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 from ..core.config import get_settings
@@ -181,6 +181,61 @@ class CacheService:
                         extra={'key': key, 'error': str(e)})
             return False
 
+    async def get_many_bytes(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Retrieve raw, unserialized values for many keys in one round trip.
+
+        Args:
+            keys: Cache keys to retrieve
+
+        Returns:
+            List of raw values aligned with keys, None for missing keys
+        """
+        if not keys:
+            return []
+        try:
+            values = await asyncio.to_thread(self._client.mget, keys)
+            hits = sum(value is not None for value in values)
+            self._metrics['hits'] += hits
+            self._metrics['misses'] += len(keys) - hits
+            return values
+
+        except Exception as e:
+            logger.error("Cache batch retrieval error",
+                        extra={'key_count': len(keys), 'error': str(e)})
+            return [None] * len(keys)
+
+    async def set_many_bytes(self, items: Dict[str, bytes], ttl: Optional[int] = None) -> bool:
+        """
+        Store raw values for many keys in one pipelined round trip.
+
+        Args:
+            items: Raw values keyed by cache key
+            ttl: Optional time-to-live in seconds
+
+        Returns:
+            bool: Success status of cache operation
+        """
+        if not items:
+            return True
+        ttl = ttl if ttl is not None else self._default_ttl
+
+        def store() -> List[Any]:
+            pipeline = self._client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipeline.setex(key, ttl, value)
+            return pipeline.execute()
+
+        try:
+            results = await asyncio.to_thread(store)
+            self._metrics['stored_keys'] += sum(bool(result) for result in results)
+            return all(results)
+
+        except Exception as e:
+            logger.error("Cache batch storage error",
+                        extra={'key_count': len(items), 'error': str(e)})
+            return False
+
     async def get_stats(self) -> Dict:
         """
         Retrieve detailed cache statistics and metrics.
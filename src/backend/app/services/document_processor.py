@@ -16,6 +16,7 @@ import numpy as np
 from .ocr_service import OCRService
 from .ai_service import AIService
 from .vector_search import VectorSearchService
+from .embedding_cache import cache_hit_rate
 from ..models.document import Document
 from ..models.chunk import Chunk
 from ..utils.document_utils import validate_file_type, prepare_for_ocr, split_into_chunks
@@ -26,7 +27,6 @@ logger = logging.getLogger(__name__)
 # Constants
 CHUNK_SIZE = 1000
 OVERLAP_SIZE = 100
-BATCH_SIZE = 32
 MAX_RETRIES = 3
 RETRY_DELAY = 5
 
@@ -75,8 +75,7 @@ class DocumentProcessor:
             "Document processor initialized",
             extra={
                 'config': config,
-                'chunk_size': CHUNK_SIZE,
-                'batch_size': BATCH_SIZE
+                'chunk_size': CHUNK_SIZE
             }
         )
 
@@ -142,11 +141,69 @@ class DocumentProcessor:
 
             CHUNK_COUNT.set(len(document_chunks))
 
-            # Generate embeddings with batch optimization
-            embeddings = await self.process_chunks(document_chunks, tenant_id)
+            # Link boilerplate repeated from indexed chunks, or earlier in this document,
+            # to its canonical chunk instead of embedding and indexing another copy
+            positions = [str(position) for position in range(len(document_chunks))]
+            batch_positions = set(positions)
+            duplicates = await self._vector_search.link_near_duplicates(
+                positions, document_chunks, tenant_id, document_id=document.id
+            )
+            unique = [
+                (int(position), chunk)
+                for position, chunk in zip(positions, document_chunks) if position not in duplicates
+            ]
+
+            # Generate embeddings with batch optimization, counting embedding cache hits
+            cache_stats = {'hits': 0, 'misses': 0}
+            vectors = await self.process_chunks(
+                [chunk for _, chunk in unique], tenant_id, cache_stats=cache_stats
+            )
+            accepted = [
+                (position, chunk, vector) for (position, chunk), vector in zip(unique, vectors)
+                if vector is not None
+            ]
+
+            # Persist chunk and embedding rows first so the index only holds stored IDs;
+            # the service methods block on the database and run off the event loop
+            embeddings = await asyncio.to_thread(
+                self._vector_search.store_embeddings,
+                document.id,
+                [chunk for _, chunk, _ in accepted],
+                [vector for _, _, vector in accepted],
+                [position for position, _, _ in accepted]
+            )
+
+            # Store near-duplicates linked to their canonical chunk's row; a duplicate of a
+            # chunk in this document whose embedding was rejected is dropped with it
+            stored = {
+                str(position): str(emb.chunk_id)
+                for (position, _, _), emb in zip(accepted, embeddings)
+            }
+            links = [
+                (int(position), document_chunks[int(position)], stored.get(canonical, canonical))
+                for position, canonical in duplicates.items()
+                if canonical in stored or canonical not in batch_positions
+            ]
+            linked_chunk_ids = await asyncio.to_thread(
+                self._vector_search.store_duplicates,
+                document.id,
+                [chunk for _, chunk, _ in links],
+                [position for position, _, _ in links],
+                [canonical for _, _, canonical in links]
+            )
 
-            # Index embeddings
-            await self._vector_search.batch_index(embeddings, tenant_id)
+            # Drop rows and vectors left over from an earlier run of this document, then index
+            await asyncio.to_thread(
+                self._vector_search.remove_document,
+                document.id, tenant_id,
+                keep_embedding_ids=[emb.id for emb in embeddings],
+                keep_chunk_ids=linked_chunk_ids
+            )
+            await asyncio.to_thread(self._vector_search.batch_index, embeddings, tenant_id)
+            await asyncio.to_thread(
+                self._vector_search.index_linked_chunks,
+                linked_chunk_ids, [chunk for _, chunk, _ in links], tenant_id
+            )
 
             # Update document status and metadata
             processing_time = asyncio.get_event_loop().time() - processing_start
@@ -155,6 +212,9 @@ class DocumentProcessor:
                 'processing_time': processing_time,
                 'chunk_count': len(document_chunks),
                 'embedding_count': len(embeddings),
+                'duplicate_chunk_count': len(linked_chunk_ids),
+                'embedding_cache_hits': cache_stats['hits'],
+                'embedding_cache_hit_rate': cache_hit_rate(cache_stats),
                 'ocr_quality': float(OCR_QUALITY._value.get()),
                 'processing_successful': True
             })
@@ -166,10 +226,13 @@ class DocumentProcessor:
                 'document_id': str(document.id),
                 'chunks_processed': len(document_chunks),
                 'embeddings_generated': len(embeddings),
+                'duplicates_linked': len(linked_chunk_ids),
                 'processing_time': processing_time,
                 'metrics': {
                     'ocr_quality': float(OCR_QUALITY._value.get()),
                     'chunk_count': len(document_chunks),
+                    'embedding_cache_hits': cache_stats['hits'],
+                    'embedding_cache_hit_rate': cache_hit_rate(cache_stats),
                     'processing_duration': processing_time
                 }
             }
@@ -245,49 +308,45 @@ class DocumentProcessor:
             raise
 
     @trace.instrument
-    async def process_chunks(self, chunks: List[str], tenant_id: str) -> List[np.ndarray]:
+    async def process_chunks(self, chunks: List[str], tenant_id: str,
+                             cache_stats: Optional[Dict[str, int]] = None
+                             ) -> List[Optional[np.ndarray]]:
         """
         Process chunks through embedding generation with optimization.
 
         Args:
             chunks: List of text chunks
             tenant_id: Client/tenant identifier
+            cache_stats: Optional dict accumulating embedding cache 'hits' and 'misses'
 
         Returns:
-            List of embeddings with quality metrics
+            List of embeddings aligned with chunks, None for chunks the API rejected
         """
         try:
-            embeddings = []
-            
-            # Process chunks in optimized batches
-            for i in range(0, len(chunks), BATCH_SIZE):
-                batch = chunks[i:i + BATCH_SIZE]
-                
-                # Generate embeddings for batch
-                batch_embeddings = await asyncio.gather(*[
-                    self._ai_service.generate_embeddings(
-                        chunk,
-                        {
-                            'batch_index': i,
-                            'chunk_index': j,
-                            'tenant_id': tenant_id
-                        }
-                    )
-                    for j, chunk in enumerate(batch)
-                ])
-                
-                embeddings.extend(batch_embeddings)
+            # AIService packs the chunks into embeddings requests by token count
+            chunk_embeddings = await self._ai_service.generate_embeddings_batch(
+                chunks,
+                {'tenant_id': tenant_id},
+                cache_stats=cache_stats
+            )
+
+            # Chunks the API rejects on their own are skipped rather than failing the document
+            rejected = sum(embedding is None for embedding in chunk_embeddings)
+
+            self._error_stats['embedding_errors'] += rejected
 
             logger.info(
                 "Chunk processing completed",
                 extra={
                     'total_chunks': len(chunks),
-                    'embeddings_generated': len(embeddings),
+                    'embeddings_generated': len(chunk_embeddings) - rejected,
+                    'rejected_chunks': rejected,
+                    'cache_hits': cache_stats['hits'] if cache_stats else 0,
                     'tenant_id': tenant_id
                 }
             )
 
-            return embeddings
+            return chunk_embeddings
 
         except Exception as e:
             self._error_stats['embedding_errors'] += 1
@@ -0,0 +1,229 @@
+"""
+Content-addressed embedding cache for the AI-powered Product Catalog Search System.
+Keys embeddings by a hash of the normalized input text, the embedding model and the
+embedding version, scoped per tenant, so re-ingested documents, chunks shared across
+documents and repeated queries are embedded once instead of on every request.
+
+Version: 1.0.0
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np  # version: ^1.24.0
+from prometheus_client import Counter  # version: ^0.16.0
+
+from app.core.config import settings
+from app.models.embedding import EMBEDDING_VERSION
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CACHE_HITS = Counter('embedding_cache_hits_total', 'Embedding lookups served from the cache')
+CACHE_MISSES = Counter('embedding_cache_misses_total', 'Embedding lookups sent to the API')
+
+# Thread-safe singleton implementation
+_store_lock = threading.Lock()
+_store_instance: Optional['LocalEmbeddingStore'] = None
+
+# Defaults used when the embedding_cache configuration section is missing
+DEFAULT_TTL = 604800  # 7 days
+DEFAULT_LOCAL_MAX_ENTRIES = 100000  # ~600 MB of 1536-d float32 vectors
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before hashing so inputs differing only in Unicode form or whitespace
+    (re-extracted OCR output, reflowed lines) share a cache entry.
+
+    Args:
+        text: Input text
+
+    Returns:
+        str: NFKC-normalized text with whitespace runs collapsed to single spaces
+    """
+    return WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def cache_hit_rate(stats: Dict[str, int]) -> float:
+    """
+    Compute the hit rate of a cache stats dict with 'hits' and 'misses' counts.
+
+    Returns:
+        float: Fraction of lookups served from the cache, 0.0 without lookups
+    """
+    lookups = stats.get('hits', 0) + stats.get('misses', 0)
+    return stats.get('hits', 0) / lookups if lookups else 0.0
+
+
+class LocalEmbeddingStore:
+    """
+    In-process LRU store for encoded embeddings, used when no shared Redis cache is
+    configured. Exposes the same byte-level interface as CacheService.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_LOCAL_MAX_ENTRIES):
+        """
+        Initialize an empty store.
+
+        Args:
+            max_entries: Entries kept before the least recently used are evicted
+        """
+        self._max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_many_bytes(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """
+        Retrieve raw values for many keys.
+
+        Returns:
+            List of values aligned with keys, None for missing or expired keys
+        """
+        now = time.monotonic()
+        values: List[Optional[bytes]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now:
+                    self._entries.pop(key, None)
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+        return values
+
+    async def set_many_bytes(self, items: Dict[str, bytes], ttl: Optional[int] = None) -> bool:
+        """
+        Store raw values for many keys, evicting the least recently used beyond max_entries.
+
+        Returns:
+            bool: True once stored
+        """
+        expires = time.monotonic() + (ttl or DEFAULT_TTL)
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+
+class EmbeddingCache:
+    """
+    Embedding cache over a byte store (CacheService or LocalEmbeddingStore). Vectors are
+    stored as raw little-endian float32 buffers, 6 KB per 1536-d embedding.
+    """
+
+    def __init__(self, store, model: str, ttl: int = DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            store: Store exposing async get_many_bytes and set_many_bytes
+            model: Embedding model name, part of every key
+            ttl: Entry time-to-live in seconds
+        """
+        self._store = store
+        self._model = model
+        self._ttl = ttl
+
+    def key(self, tenant_id: str, text: str) -> str:
+        """
+        Build the cache key of a text for a tenant.
+
+        Returns:
+            str: Key combining tenant, model, embedding version and normalized text hash
+        """
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"embedding:{tenant_id}:{self._model}:{EMBEDDING_VERSION}:{digest}"
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up embeddings for many keys. Store failures count as misses so an unavailable
+        cache never fails embedding generation.
+
+        Returns:
+            List of float32 vectors aligned with keys, None for misses
+        """
+        try:
+            values = await self._store.get_many_bytes(list(keys))
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed", extra={'error': str(e)})
+            values = [None] * len(keys)
+
+        embeddings = [
+            np.frombuffer(value, dtype='<f4').astype(np.float32) if value else None
+            for value in values
+        ]
+        hits = sum(embedding is not None for embedding in embeddings)
+        CACHE_HITS.inc(hits)
+        CACHE_MISSES.inc(len(keys) - hits)
+        return embeddings
+
+    async def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """
+        Store embeddings by key. Failures are logged and ignored.
+
+        Args:
+            items: Embedding vectors keyed by cache key
+        """
+        if not items:
+            return
+        encoded = {
+            key: np.asarray(embedding, dtype='<f4').tobytes() for key, embedding in items.items()
+        }
+        try:
+            await self._store.set_many_bytes(encoded, ttl=self._ttl)
+        except Exception as e:
+            logger.warning("Embedding cache store failed",
+                           extra={'error': str(e), 'entry_count': len(items)})
+
+
+def get_local_embedding_store() -> LocalEmbeddingStore:
+    """Returns thread-safe singleton instance of the in-process embedding store."""
+    global _store_instance
+
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                cache_config = settings.get_vector_search_settings().get('embedding_cache', {})
+                _store_instance = LocalEmbeddingStore(
+                    max_entries=cache_config.get('local_max_entries', DEFAULT_LOCAL_MAX_ENTRIES)
+                )
+
+    return _store_instance
+
+
+def create_embedding_cache(cache_service, model: str) -> Optional[EmbeddingCache]:
+    """
+    Create the configured embedding cache for a model.
+
+    Args:
+        cache_service: Shared CacheService used by the redis backend, may be None
+        model: Embedding model name
+
+    Returns:
+        EmbeddingCache, or None when caching is disabled
+    """
+    cache_config = settings.get_vector_search_settings().get('embedding_cache', {})
+    if not cache_config.get('enabled', True):
+        return None
+
+    store = cache_service
+    if cache_config.get('backend', 'redis') == 'local' or cache_service is None:
+        store = get_local_embedding_store()
+    return EmbeddingCache(store, model, ttl=cache_config.get('ttl_seconds', DEFAULT_TTL))
@@ -0,0 +1,122 @@
+"""
+Token-aware packing of embedding requests for the AI-powered Product Catalog Search System.
+Groups texts into requests by their token counts instead of a fixed number of texts, so
+each request is filled up to a token and input budget without exceeding the API limits.
+
+Version: 1.0.0
+"""
+
+import logging
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import tiktoken  # version: ^0.5.1
+
+from app.core.config import settings
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Encoding used for models tiktoken does not know, including the local provider
+DEFAULT_ENCODING = "cl100k_base"
+
+# Budgets used when the embedding_packing configuration section is missing
+DEFAULT_MAX_REQUEST_TOKENS = 32768
+DEFAULT_MAX_REQUEST_INPUTS = 2048
+DEFAULT_MAX_INPUT_TOKENS = 8191  # Per-input limit of text-embedding-ada-002
+
+# Upper bound of tokens per UTF-8 byte used when no tokenizer can be loaded
+BYTES_PER_TOKEN_ESTIMATE = 3
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Load the tokenizer of an embedding model once per process.
+
+    Args:
+        model: Embedding model name
+
+    Returns:
+        tiktoken.Encoding, or None if the encoding cannot be loaded (tiktoken downloads
+        encodings on first use, which fails without network access)
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning("Tokenizer unavailable, estimating token counts",
+                       extra={'model': model, 'error': str(e)})
+        return None
+
+
+def count_tokens(texts: Sequence[str], model: str) -> List[int]:
+    """
+    Count the tokens of each text for a model. Without a tokenizer, counts are estimated
+    from the UTF-8 length and err on the high side so budgets still hold.
+
+    Args:
+        texts: Input texts
+        model: Embedding model name
+
+    Returns:
+        List of token counts aligned with texts
+    """
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return [math.ceil(len(text.encode('utf-8')) / BYTES_PER_TOKEN_ESTIMATE) for text in texts]
+    return [len(tokens) for tokens in tokenizer.encode_ordinary_batch(list(texts))]
+
+
+def pack_requests(token_counts: Sequence[int], max_tokens: int = DEFAULT_MAX_REQUEST_TOKENS,
+                  max_inputs: int = DEFAULT_MAX_REQUEST_INPUTS,
+                  max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS) -> List[Tuple[int, int]]:
+    """
+    Pack consecutive texts into requests, starting a new request whenever the next text
+    would take the current one over max_tokens or max_inputs. Texts over max_input_tokens
+    are sent alone: the API rejects them, and on their own they fail one request instead
+    of a full one.
+
+    Args:
+        token_counts: Token count of each text
+        max_tokens: Token budget per request
+        max_inputs: Input budget per request
+        max_input_tokens: Largest text the API accepts
+
+    Returns:
+        List of (start, end) slices covering the texts in order
+    """
+    slices: List[Tuple[int, int]] = []
+    start, tokens = 0, 0
+    for position, count in enumerate(token_counts):
+        oversized = count > max_input_tokens
+        if position > start and (oversized or tokens + count > max_tokens
+                                 or position - start >= max_inputs):
+            slices.append((start, position))
+            start, tokens = position, 0
+        tokens += count
+        if oversized:
+            slices.append((start, position + 1))
+            start, tokens = position + 1, 0
+
+    if start < len(token_counts):
+        slices.append((start, len(token_counts)))
+    return slices
+
+
+def get_packing_budgets() -> Dict[str, int]:
+    """
+    Return the configured per-request budgets.
+
+    Returns:
+        Dict with max_tokens, max_inputs and max_input_tokens
+    """
+    packing_config = settings.get_vector_search_settings().get('embedding_packing', {})
+    return {
+        'max_tokens': packing_config.get('max_request_tokens', DEFAULT_MAX_REQUEST_TOKENS),
+        'max_inputs': packing_config.get('max_request_inputs', DEFAULT_MAX_REQUEST_INPUTS),
+        'max_input_tokens': packing_config.get('max_input_tokens', DEFAULT_MAX_INPUT_TOKENS)
+    }
@@ -0,0 +1,259 @@
+"""
+Embedding providers for the AI-powered Product Catalog Search System.
+Puts embedding generation behind one interface with two implementations: the Azure OpenAI
+embeddings API, and a deterministic local feature-hashing model that runs on CPU without
+network access, for load tests and offline benchmarks of the ingestion pipeline.
+
+Version: 1.0.0
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np  # version: ^1.24.0
+import openai  # version: ^1.3.0
+
+from app.constants import TOKEN_PATTERN
+from app.core.config import settings
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Model identifiers, also part of embedding cache keys
+EMBEDDING_MODEL = "text-embedding-ada-002"
+LOCAL_EMBEDDING_MODEL = "local-feature-hashing-v1"
+EMBEDDING_DIMENSION = 1536
+
+# Texts per process pool task; smaller inputs are hashed in the calling process
+LOCAL_TASK_SIZE = 64
+FEATURE_CACHE_SIZE = 262144  # Hashed features remembered per process
+
+# Thread-safe singleton implementation
+_provider_lock = threading.Lock()
+_provider_instance: Optional['EmbeddingProvider'] = None
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface for embedding backends. A call embeds a list of texts in one request and
+    returns one vector per text in input order. Errors caused by the inputs carry an
+    http_status of 400 so callers can isolate the rejected inputs.
+    """
+
+    model: str
+    dimension: int = EMBEDDING_DIMENSION
+
+    @abstractmethod
+    async def aembed(self, texts: List[str], headers: Optional[Dict] = None) -> List[np.ndarray]:
+        """
+        Embed texts from a coroutine.
+
+        Args:
+            texts: Input texts
+            headers: Optional request headers for tenant and request tracing
+
+        Returns:
+            List of float32 vectors aligned with texts
+        """
+
+    @abstractmethod
+    def embed(self, texts: List[str], headers: Optional[Dict] = None) -> List[np.ndarray]:
+        """
+        Embed texts from synchronous code such as Celery tasks.
+
+        Args:
+            texts: Input texts
+            headers: Optional request headers for tenant and request tracing
+
+        Returns:
+            List of float32 vectors aligned with texts
+        """
+
+
+class AzureOpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the Azure OpenAI embeddings API, one API request per call."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        """
+        Initialize the provider.
+
+        Args:
+            model: Embedding model or deployment name
+        """
+        self.model = model
+
+    async def aembed(self, texts: List[str], headers: Optional[Dict] = None) -> List[np.ndarray]:
+        """
+        Embed texts with one asynchronous embeddings API request.
+
+        Args:
+            texts: Input texts
+            headers: Optional request headers for tenant and request tracing
+
+        Returns:
+            List of float32 vectors aligned with texts
+        """
+        response = await openai.Embedding.acreate(input=texts, model=self.model, headers=headers)
+        return self._parse(response, len(texts))
+
+    def embed(self, texts: List[str], headers: Optional[Dict] = None) -> List[np.ndarray]:
+        """
+        Embed texts with one blocking embeddings API request.
+
+        Args:
+            texts: Input texts
+            headers: Optional request headers for tenant and request tracing
+
+        Returns:
+            List of float32 vectors aligned with texts
+        """
+        response = openai.Embedding.create(input=texts, model=self.model, headers=headers)
+        return self._parse(response, len(texts))
+
+    @staticmethod
+    def _parse(response: Dict, count: int) -> List[np.ndarray]:
+        """Map response items back to their inputs by index."""
+        data = response['data']
+        if len(data) != count:
+            raise ValueError(f"Expected {count} embeddings, received {len(data)}")
+
+        # Results carry the position of their input and are not guaranteed to be in order
+        embeddings = [None] * count
+        for position, item in enumerate(data):
+            embeddings[item.get('index', position)] = np.array(item['embedding'], dtype=np.float32)
+        return embeddings
+
+
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of a feature string."""
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+
+
+def hash_embeddings(texts: Sequence[str], dimension: int = EMBEDDING_DIMENSION) -> np.ndarray:
+    """
+    Embed texts with signed feature hashing over word unigrams and bigrams. Each feature
+    adds +1 or -1 to one dimension chosen by a stable hash, and each row is scaled to unit
+    length, so texts sharing vocabulary get a high cosine similarity. Results do not depend
+    on the process or PYTHONHASHSEED.
+
+    Args:
+        texts: Input texts
+        dimension: Output dimension
+
+    Returns:
+        numpy.ndarray: Float32 matrix of shape (len(texts), dimension)
+    """
+    vectors = np.zeros((len(texts), dimension), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+        if not features:
+            continue
+        hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+        columns = (hashes % np.uint64(dimension)).astype(np.int64)
+        signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+        np.add.at(vectors[row], columns, signs)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class LocalHashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic CPU embeddings by feature hashing, spread over a process pool. Vectors are
+    only comparable with other vectors from this provider, so its model name keeps them
+    apart in the embedding cache.
+    """
+
+    def __init__(self, processes: Optional[int] = None, dimension: int = EMBEDDING_DIMENSION):
+        """
+        Initialize the provider.
+
+        Args:
+            processes: Worker processes, defaults to the CPU count; 1 hashes in-process
+            dimension: Output dimension
+        """
+        self.model = LOCAL_EMBEDDING_MODEL
+        self.dimension = dimension
+        self._processes = processes or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Create the process pool on first use; None when workers cannot be started."""
+        # Daemonic processes such as Celery prefork workers cannot start children
+        if self._processes <= 1 or multiprocessing.current_process().daemon:
+            return None
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self._processes)
+        return self._pool
+
+    async def aembed(self, texts: List[str], headers: Optional[Dict] = None) -> List[np.ndarray]:
+        pool = self._get_pool() if len(texts) > LOCAL_TASK_SIZE else None
+        if pool is None:
+            return list(await asyncio.to_thread(hash_embeddings, texts, self.dimension))
+
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, hash_embeddings, texts[start:start + LOCAL_TASK_SIZE],
+                                 self.dimension)
+            for start in range(0, len(texts), LOCAL_TASK_SIZE)
+        ))
+        return [vector for part in parts for vector in part]
+
+    def embed(self, texts: List[str], headers: Optional[Dict] = None) -> List[np.ndarray]:
+        pool = self._get_pool() if len(texts) > LOCAL_TASK_SIZE else None
+        if pool is None:
+            return list(hash_embeddings(texts, self.dimension))
+
+        parts = pool.map(
+            partial(hash_embeddings, dimension=self.dimension),
+            [texts[start:start + LOCAL_TASK_SIZE]
+             for start in range(0, len(texts), LOCAL_TASK_SIZE)]
+        )
+        return [vector for part in parts for vector in part]
+
+    def close(self) -> None:
+        """Shut down the process pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Returns thread-safe singleton instance of the configured embedding provider."""
+    global _provider_instance
+
+    if _provider_instance is None:
+        with _provider_lock:
+            if _provider_instance is None:
+                vector_config = settings.get_vector_search_settings()
+                provider_config = vector_config.get('embedding_provider', {})
+                name = provider_config.get('name', 'azure_openai')
+                if name == 'local':
+                    _provider_instance = LocalHashingEmbeddingProvider(
+                        processes=provider_config.get('local_processes')
+                    )
+                elif name == 'azure_openai':
+                    _provider_instance = AzureOpenAIEmbeddingProvider(
+                        model=provider_config.get('model', EMBEDDING_MODEL)
+                    )
+                else:
+                    raise ValueError(f"Unknown embedding provider: {name}")
+
+                logger.info("Embedding provider initialized",
+                            extra={'provider': name, 'model': _provider_instance.model})
+
+    return _provider_instance
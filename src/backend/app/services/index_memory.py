@@ -0,0 +1,291 @@
+"""
+Tenant index memory management for the AI-powered Product Catalog Search System.
+Tracks per-tenant lookups to pick which indices to release under the memory budget,
+persists decayed lookup counts shared by every process and warms up the most active tenants.
+
+Version: 1.0.0
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge  # version: ^0.16.0
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+TENANT_HITS = Counter('vector_index_tenant_hits_total', 'Tenant index lookups', ['tenant_id'])
+RESIDENT_BYTES = Gauge('vector_index_resident_bytes',
+                       'Approximate private memory held by all tenant indices')
+
+# Decayed per-tenant lookup counts shared by every process, read to pick warm-up tenants
+USAGE_FILE = 'tenant_usage.json'
+MIN_USAGE_HITS = 0.01
+
+
+class TenantUsage:
+    """
+    Per-tenant lookup counts and recency for one process.
+    Counts are periodically merged into a usage file under the snapshot directory,
+    decaying with a half-life so warm-up favours recently active tenants.
+    """
+
+    def __init__(self, directory: Optional[str] = None, half_life_hours: float = 24,
+                 save_seconds: float = 60):
+        """
+        Initialize empty usage.
+
+        Args:
+            directory: Directory holding the shared usage file, None to keep usage in memory only
+            half_life_hours: Half-life of recorded lookup counts
+            save_seconds: Minimum interval between background usage saves
+        """
+        self.directory = directory
+        self.half_life_hours = half_life_hours
+        self.save_seconds = save_seconds
+        self._lock = threading.Lock()
+
+        # Lookup recency (least recent first) and counts per tenant, including evicted tenants
+        self._last_used: 'OrderedDict[str, float]' = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._saved_hits: Dict[str, int] = {}
+        self._saved_at = time.time()
+        self._saver: Optional[threading.Thread] = None
+
+    def record(self, tenant_id: str) -> None:
+        """Mark a tenant as most recently searched and save usage once it is due."""
+        now = time.time()
+        with self._lock:
+            self._hits[tenant_id] = self._hits.get(tenant_id, 0) + 1
+            self._last_used[tenant_id] = now
+            self._last_used.move_to_end(tenant_id)
+            save_due = self.directory is not None and now - self._saved_at >= self.save_seconds
+        TENANT_HITS.labels(tenant_id=tenant_id).inc()
+        if save_due:
+            self._schedule_save()
+
+    def counts(self) -> Tuple[Dict[str, int], Dict[str, float]]:
+        """Return copies of the lookup counts and last lookup times per tenant."""
+        with self._lock:
+            return dict(self._hits), dict(self._last_used)
+
+    def release_order(self, tenant_ids: Iterable[str]) -> List[str]:
+        """
+        Order tenants for release under memory pressure.
+
+        Args:
+            tenant_ids: Tenants with a loaded index
+
+        Returns:
+            List of tenant identifiers, never-searched tenants first, then least recently searched
+        """
+        loaded = set(tenant_ids)
+        with self._lock:
+            order = [tenant_id for tenant_id in loaded if tenant_id not in self._last_used]
+            order.extend(tenant_id for tenant_id in self._last_used if tenant_id in loaded)
+        return order
+
+    def active_tenants(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Return tenants ranked by their decayed lookup counts across all processes.
+
+        Args:
+            limit: Optional maximum number of tenants
+
+        Returns:
+            List of tenant identifiers, most active first
+        """
+        if self.directory is None:
+            return []
+        usage = self._decayed(self._read(), time.time())
+        ranked = sorted(usage, key=lambda tenant_id: usage[tenant_id]['hits'], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def save(self) -> Optional[str]:
+        """
+        Merge lookups since the last save into the usage file.
+
+        Returns:
+            Optional[str]: Path of the usage file, or None if nothing was written
+        """
+        if self.directory is None:
+            return None
+
+        with self._lock:
+            hits = dict(self._hits)
+            self._saved_at = time.time()
+        delta = {tenant_id: count - self._saved_hits.get(tenant_id, 0)
+                 for tenant_id, count in hits.items() if count > self._saved_hits.get(tenant_id, 0)}
+        if not delta:
+            return None
+
+        now = time.time()
+        usage = self._decayed(self._read(), now)
+        for tenant_id, count in delta.items():
+            usage.setdefault(tenant_id, {'hits': 0.0})['hits'] += count
+            usage[tenant_id]['updated_at'] = now
+
+        path = os.path.join(self.directory, USAGE_FILE)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as usage_file:
+            json.dump(usage, usage_file)
+        os.replace(tmp_path, path)
+        self._saved_hits.update(hits)
+        return path
+
+    def _read(self) -> Dict[str, Dict[str, float]]:
+        """Read the shared usage file, treating a missing or corrupt file as empty."""
+        try:
+            with open(os.path.join(self.directory, USAGE_FILE)) as usage_file:
+                return json.load(usage_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _decayed(self, usage: Dict[str, Dict[str, float]],
+                 now: float) -> Dict[str, Dict[str, float]]:
+        """Decay recorded counts to now and drop tenants whose counts have faded."""
+        half_life = self.half_life_hours * 3600
+        decayed = {}
+        for tenant_id, entry in usage.items():
+            hits = entry['hits'] * 0.5 ** (max(0.0, now - entry['updated_at']) / half_life)
+            if hits >= MIN_USAGE_HITS:
+                decayed[tenant_id] = {'hits': hits, 'updated_at': now}
+        return decayed
+
+    def _schedule_save(self) -> None:
+        """Save usage in the background unless a save is already running."""
+        with self._lock:
+            if self._saver is not None and self._saver.is_alive():
+                return
+            self._saved_at = time.time()
+            self._saver = threading.Thread(target=self._run_save, name='index-usage-save',
+                                           daemon=True)
+            thread = self._saver
+        thread.start()
+
+    def _run_save(self) -> None:
+        """Background usage save entry point; failures are logged and retried when next due."""
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"Tenant usage save failed: {str(e)}", extra={'error': str(e)})
+
+
+class MemoryBudget:
+    """
+    Budget over resident (non memory-mapped) tenant index bytes.
+    Releases are serialized so concurrent builds do not release more tenants than needed.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None):
+        """
+        Initialize the budget.
+
+        Args:
+            budget_bytes: Resident bytes allowed across tenant indices, None for unlimited
+        """
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+
+    def enforce(self, indices: Dict[str, object], order: List[str],
+                release: Callable[[str, object], None], keep: Optional[str] = None) -> int:
+        """
+        Release tenants in order until resident indices fit the budget.
+
+        Args:
+            indices: Loaded tenant indices by tenant ID
+            order: Tenants in the order they should be released
+            release: Callable demoting or evicting one tenant index
+            keep: Tenant that must stay loaded, e.g. the one just built
+
+        Returns:
+            int: Number of tenants released
+        """
+        if self.budget_bytes is None:
+            RESIDENT_BYTES.set(resident_bytes(indices))
+            return 0
+
+        released = 0
+        with self._lock:
+            resident = resident_bytes(indices)
+            for tenant_id in order:
+                if resident <= self.budget_bytes:
+                    break
+                index = indices.get(tenant_id)
+                if tenant_id == keep or index is None or not index.resident_bytes:
+                    continue
+                resident -= index.resident_bytes
+                release(tenant_id, index)
+                released += 1
+
+            RESIDENT_BYTES.set(resident_bytes(indices))
+
+        if resident > self.budget_bytes:
+            logger.warning(
+                "Tenant indices exceed memory budget",
+                extra={'resident_bytes': resident, 'memory_budget': self.budget_bytes}
+            )
+        return released
+
+    def exhausted(self, indices: Dict[str, object]) -> bool:
+        """Return whether resident indices already fill the budget."""
+        return self.budget_bytes is not None and resident_bytes(indices) >= self.budget_bytes
+
+
+def resident_bytes(indices: Dict[str, object]) -> int:
+    """Return the approximate private memory held by the given tenant indices."""
+    return sum(index.resident_bytes for index in list(indices.values()))
+
+
+def start_warm_up(tenant_ids: List[str], load: Callable[[str], bool],
+                  should_stop: Callable[[], bool],
+                  on_complete: Optional[Callable[[], None]] = None) -> threading.Thread:
+    """
+    Load tenants on a background thread, most active first.
+
+    Args:
+        tenant_ids: Tenants to load, in order
+        load: Callable loading one tenant index, returning False if it was already loaded
+        should_stop: Callable returning True once no more tenants fit, e.g. the budget is full
+        on_complete: Optional callable run when warm-up finishes, e.g. closing a session
+
+    Returns:
+        threading.Thread: Started warm-up thread
+    """
+    thread = threading.Thread(
+        target=_run_warm_up, args=(tenant_ids, load, should_stop, on_complete),
+        name='index-warm-up', daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _run_warm_up(tenant_ids: List[str], load: Callable[[str], bool],
+                 should_stop: Callable[[], bool],
+                 on_complete: Optional[Callable[[], None]]) -> None:
+    """Warm-up thread entry point; a tenant that fails to load is logged and skipped."""
+    warmed = 0
+    try:
+        for tenant_id in tenant_ids:
+            if should_stop():
+                break
+            try:
+                if load(tenant_id):
+                    warmed += 1
+            except Exception as e:
+                logger.warning(
+                    f"Tenant index warm-up failed: {str(e)}",
+                    extra={'tenant_id': tenant_id, 'error': str(e)}
+                )
+    finally:
+        if on_complete is not None:
+            on_complete()
+
+    logger.info("Tenant index warm-up finished", extra={'tenants': warmed})
@@ -0,0 +1,645 @@
+"""
+Process-wide tenant index registry for the AI-powered Product Catalog Search System.
+Builds each tenant index once, loading it from an on-disk snapshot when available, and shares
+it across requests while keeping resident indices within the memory budget.
+
+Version: 1.0.0
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge  # version: ^0.16.0
+
+from app.core.config import settings
+from app.constants import VectorSearchConfig, IndexResidency
+from app.models.embedding import EMBEDDING_VERSION
+from app.services.index_memory import MemoryBudget, TenantUsage, resident_bytes, start_warm_up
+from app.services.index_sharding import create_tenant_index, load_tenant_index
+from app.services.index_snapshots import WATERMARK_SKEW, SnapshotStore
+from app.services.vector_index import (
+    PROJECTION_PARAMS, DeltaLoader, IdLoader, TenantIndex, TenantLoader, resolve_index_params,
+    unpack_rows, validate_index_params
+)
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+TENANT_VECTORS = Gauge(
+    'vector_index_tenant_vectors', 'Live vectors in a tenant index', ['tenant_id']
+)
+TENANT_RESIDENT_BYTES = Gauge(
+    'vector_index_tenant_resident_bytes',
+    'Approximate private memory held by a tenant index', ['tenant_id']
+)
+TENANT_RESIDENCY = Gauge(
+    'vector_index_tenant_residency',
+    'Tenant index residency: 0 evicted, 1 memory-mapped snapshot, 2 in memory', ['tenant_id']
+)
+INDEX_RELEASES = Counter(
+    'vector_index_releases_total',
+    'Tenant indices demoted to their snapshot or evicted to stay within the memory budget',
+    ['action']
+)
+
+# Thread-safe singleton implementation
+_registry_lock = threading.Lock()
+_registry_instance: Optional['TenantIndexRegistry'] = None
+
+# Gauge values for each residency
+RESIDENCY_LEVELS = {IndexResidency.EVICTED: 0, IndexResidency.MMAP: 1, IndexResidency.MEMORY: 2}
+
+
+class TenantIndexRegistry:
+    """
+    Process-wide registry of tenant indices.
+    Each tenant index is built once from its loader and then shared across requests.
+    With a memory budget, least-recently-searched tenants are demoted to their memory-mapped
+    snapshot, or evicted when snapshots are disabled, once resident indices outgrow it.
+    """
+
+    def __init__(self, dimension: int, vector_config: Optional[Dict] = None,
+                 embedding_version: str = EMBEDDING_VERSION):
+        """
+        Initialize an empty registry.
+
+        Args:
+            dimension: Vector dimension for all tenant indices
+            vector_config: Vector search settings used to resolve per-tenant index parameters
+            embedding_version: Embedding model version used to key on-disk snapshots
+        """
+        self.dimension = dimension
+        self.embedding_version = embedding_version
+        self._vector_config = vector_config or {}
+        self._snapshot_config = self._vector_config.get('snapshot', {})
+        self._tenant_overrides: Dict[str, Dict] = {}
+        self._indices: Dict[str, TenantIndex] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._maintenance: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+        self._snapshots: Optional[SnapshotStore] = None
+        if self._snapshot_config.get('enabled') and self._snapshot_config.get('directory'):
+            self._snapshots = SnapshotStore(self._snapshot_config['directory'], embedding_version,
+                                            self._snapshot_config.get('keep_generations', 2))
+
+        # Memory budget over resident (non memory-mapped) index bytes, None for unlimited
+        self._memory_config = self._vector_config.get('memory', {})
+        budget_mb = self._memory_config.get('budget_mb')
+        self._budget = MemoryBudget(budget_mb * 1024 * 1024 if budget_mb else None)
+        self._usage = TenantUsage(
+            self._snapshots.directory if self._snapshots is not None else None,
+            half_life_hours=self._memory_config.get('usage_half_life_hours', 24),
+            save_seconds=self._memory_config.get('usage_save_seconds', 60)
+        )
+
+        # (ntotal, live_count) of each tenant's last written snapshot, to skip rewrites on demotion
+        self._persisted: Dict[str, Tuple[int, int]] = {}
+
+        # (changes, time of the oldest change) made to each tenant index since its last snapshot
+        self._dirty: Dict[str, Tuple[int, float]] = {}
+
+    @property
+    def snapshots_enabled(self) -> bool:
+        """Whether tenant indices are persisted to and loaded from local disk."""
+        return self._snapshots is not None
+
+    @property
+    def memory_budget(self) -> Optional[int]:
+        """Resident bytes allowed across tenant indices, None for unlimited."""
+        return self._budget.budget_bytes
+
+    def get(self, tenant_id: str) -> Optional[TenantIndex]:
+        """Return the loaded index for a tenant, if any."""
+        return self._indices.get(str(tenant_id))
+
+    def get_or_build(self, tenant_id: str, loader: TenantLoader,
+                     delta_loader: Optional[DeltaLoader] = None,
+                     id_loader: Optional[IdLoader] = None,
+                     record_hit: bool = True) -> TenantIndex:
+        """
+        Return the tenant index, loading it on first use from the newest on-disk snapshot
+        or else building it from the loader. A snapshot is caught up with rows created
+        since its watermark through delta_loader, and vectors whose embeddings were deleted
+        while no process held the tenant are tombstoned by reconciling against id_loader.
+        Concurrent callers for the same tenant wait for a single build.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            loader: Callable returning (vectors, chunk_ids, embedding_ids[, documents])
+            delta_loader: Optional callable returning rows created since a watermark
+            id_loader: Optional callable returning the tenant's current embedding IDs
+            record_hit: Count the lookup towards the tenant's recency and hit count
+
+        Returns:
+            TenantIndex: Shared index for the tenant
+        """
+        tenant_id = str(tenant_id)
+        if record_hit:
+            self._usage.record(tenant_id)
+        index = self._indices.get(tenant_id)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(tenant_id, threading.Lock())
+
+        with build_lock:
+            index = self._indices.get(tenant_id)
+            if index is not None:
+                return index
+
+            index = self._load_snapshot(tenant_id)
+            if index is not None:
+                # Counts of the on-disk snapshot, so demotion rewrites it if catch-up changed it
+                self._persisted[tenant_id] = (index.ntotal, index.live_count)
+                self._catch_up(index, loader, delta_loader, id_loader)
+            else:
+                index = create_tenant_index(tenant_id, self.dimension, self.index_params(tenant_id))
+                index.watermark = datetime.utcnow()
+                vectors, chunk_ids, embedding_ids, documents = unpack_rows(loader())
+                if len(chunk_ids):
+                    index.add(vectors, chunk_ids, embedding_ids, loader, documents)
+                index.source = 'database'
+
+            with self._lock:
+                self._indices[tenant_id] = index
+
+            if index.source == 'database':
+                self.save_snapshot(tenant_id)
+            elif index.needs_compaction or tenant_id in self._dirty:
+                self._schedule_maintenance(tenant_id)
+
+            logger.info(
+                "Tenant index built",
+                extra={'tenant_id': tenant_id, 'vector_count': index.ntotal,
+                       'source': index.source}
+            )
+
+        self.refresh_tenant(tenant_id)
+        return index
+
+    def _catch_up(self, index, loader: TenantLoader, delta_loader: Optional[DeltaLoader],
+                  id_loader: Optional[IdLoader]) -> None:
+        """Apply rows added and embeddings deleted since a snapshot was written."""
+        if index.watermark is not None and delta_loader is not None:
+            watermark = datetime.utcnow()
+            vectors, chunk_ids, embedding_ids, documents = unpack_rows(
+                delta_loader(index.watermark - WATERMARK_SKEW)
+            )
+            if len(chunk_ids):
+                self.mark_dirty(index.tenant_id,
+                                index.add(vectors, chunk_ids, embedding_ids, loader, documents),
+                                schedule=False)
+            index.watermark = watermark
+
+        if id_loader is not None:
+            # Deletes leave no row behind to replay, so diff against the live ID set instead
+            live_ids = set(map(str, id_loader()))
+            stale = [emb_id for emb_id in index.embedding_ids() if emb_id not in live_ids]
+            if stale:
+                self.mark_dirty(index.tenant_id, index.remove(stale), schedule=False)
+                logger.info(
+                    "Tombstoned vectors deleted since tenant snapshot",
+                    extra={'tenant_id': index.tenant_id, 'removed': len(stale)}
+                )
+
+    def save_snapshot(self, tenant_id: str) -> Optional[str]:
+        """
+        Persist a tenant index under {directory}/{tenant_id}/v{embedding_version}/.
+        Each snapshot is written to its own generation directory and published by
+        atomically repointing the 'current' symlink, so readers never see partial files.
+
+        Args:
+            tenant_id: Client/tenant identifier
+
+        Returns:
+            Optional[str]: Path of the written snapshot, or None if snapshots are disabled
+        """
+        tenant_id = str(tenant_id)
+        index = self._indices.get(tenant_id)
+        if index is None or not self.snapshots_enabled:
+            return None
+
+        try:
+            return self.write_snapshot(index)
+
+        except Exception as e:
+            # Snapshots are an optimisation; a failed write must not fail indexing
+            logger.warning(
+                f"Tenant index snapshot failed: {str(e)}",
+                extra={'tenant_id': tenant_id, 'error': str(e)}
+            )
+            return None
+
+    def write_snapshot(self, index) -> str:
+        """
+        Write any tenant index as the tenant's current snapshot, e.g. one built offline.
+        Unlike save_snapshot(), failures are raised to the caller.
+
+        Args:
+            index: TenantIndex or ShardedTenantIndex to persist
+
+        Returns:
+            str: Path of the written snapshot
+        """
+        tenant_id = str(index.tenant_id)
+        with self._lock:
+            dirty = self._dirty.pop(tenant_id, None)
+        try:
+            snapshot_path = self._snapshots.write(index)
+        except Exception:
+            if dirty is not None:
+                self.mark_dirty(tenant_id, dirty[0], schedule=False)
+            raise
+        self._persisted[tenant_id] = (index.ntotal, index.live_count)
+        return snapshot_path
+
+    def mark_dirty(self, tenant_id: str, changes: int = 1, schedule: bool = True) -> None:
+        """
+        Record changes made to a loaded tenant index since its last snapshot. The snapshot is
+        rewritten in the background once snapshot.save_changes changes have accumulated or the
+        oldest unsaved change is snapshot.save_seconds old, not on every ingest or delete;
+        a process that restarts in between catches the snapshot up from the database.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            changes: Number of vectors added or removed
+            schedule: Start a background save once a threshold is reached
+        """
+        if not self.snapshots_enabled or not changes:
+            return
+
+        tenant_id = str(tenant_id)
+        now = time.time()
+        with self._lock:
+            count, since = self._dirty.get(tenant_id, (0, now))
+            count += changes
+            self._dirty[tenant_id] = (count, since)
+
+        if schedule and (count >= self._snapshot_config.get('save_changes', 10000)
+                         or now - since >= self._snapshot_config.get('save_seconds', 300)):
+            self._schedule_maintenance(tenant_id)
+
+    def save_dirty_snapshots(self) -> int:
+        """
+        Write the snapshot of every tenant with unsaved changes, e.g. at shutdown.
+
+        Returns:
+            int: Number of snapshots written
+        """
+        with self._lock:
+            running = list(self._maintenance.values())
+            tenant_ids = list(self._dirty)
+        for thread in running:
+            thread.join()
+        return sum(1 for tenant_id in tenant_ids
+                   if tenant_id in self._dirty and self.save_snapshot(tenant_id) is not None)
+
+    def index_params(self, tenant_id: str) -> Dict:
+        """Return the resolved index parameters for a tenant."""
+        params = resolve_index_params(self._vector_config, tenant_id)
+        params.update(self._tenant_overrides.get(str(tenant_id), {}))
+        return params
+
+    def configure_tenant(self, tenant_id: str, **overrides) -> None:
+        """
+        Override index parameters for one tenant, e.g. nprobe or index_type.
+        Applies immediately to a loaded index and to any future build.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            **overrides: Index parameters to override, see DEFAULT_INDEX_PARAMS
+        """
+        tenant_id = str(tenant_id)
+        validate_index_params(overrides)
+        with self._lock:
+            self._tenant_overrides.setdefault(tenant_id, {}).update(overrides)
+
+        index = self._indices.get(tenant_id)
+        if index is None:
+            return
+        if overrides.get('shards', index.shard_count) != index.shard_count or any(
+                key in overrides and overrides[key] != index.params.get(key)
+                for key in PROJECTION_PARAMS):
+            # Resharding redistributes every vector and a new projection needs the full-dimension
+            # vectors, so the next request rebuilds the tenant from the database
+            self.drop(tenant_id)
+        else:
+            index.configure(**overrides)
+
+    def remove(self, tenant_id: str, embedding_ids: Sequence[str]) -> int:
+        """
+        Tombstone vectors in a loaded tenant index and schedule a background
+        compaction once the deleted fraction passes compact_deleted_fraction.
+        The removals are persisted with the tenant's next snapshot, see mark_dirty().
+
+        Args:
+            tenant_id: Client/tenant identifier
+            embedding_ids: Embedding identifiers to remove
+
+        Returns:
+            int: Number of vectors removed, 0 if the tenant is not loaded
+        """
+        tenant_id = str(tenant_id)
+        index = self._indices.get(tenant_id)
+        if index is None:
+            return 0
+
+        removed = index.remove(embedding_ids)
+        if removed:
+            self._update_gauges(tenant_id)
+            self.mark_dirty(tenant_id, removed)
+            if index.needs_compaction:
+                self._schedule_maintenance(tenant_id)
+        return removed
+
+    def compact(self, tenant_id: str) -> int:
+        """
+        Compact a tenant index in the calling thread and persist the result.
+
+        Args:
+            tenant_id: Client/tenant identifier
+
+        Returns:
+            int: Number of vectors reclaimed
+        """
+        tenant_id = str(tenant_id)
+        index = self._indices.get(tenant_id)
+        if index is None:
+            return 0
+
+        reclaimed = index.compact()
+        if reclaimed:
+            self.save_snapshot(tenant_id)
+            self.refresh_tenant(tenant_id)
+        return reclaimed
+
+    def drop(self, tenant_id: str) -> bool:
+        """
+        Remove a tenant index so the next request rebuilds it.
+
+        Returns:
+            bool: True if an index was removed
+        """
+        tenant_id = str(tenant_id)
+        with self._lock:
+            dropped = self._indices.pop(tenant_id, None) is not None
+            self._dirty.pop(tenant_id, None)
+        self._update_gauges(tenant_id)
+        return dropped
+
+    def tenants(self) -> List[str]:
+        """Return IDs of tenants with a loaded index."""
+        return list(self._indices.keys())
+
+    def total_vectors(self) -> int:
+        """Return the number of vectors across all loaded tenant indices."""
+        return sum(index.ntotal for index in list(self._indices.values()))
+
+    def resident_bytes(self) -> int:
+        """Return the approximate private memory held by all loaded tenant indices."""
+        return resident_bytes(self._indices)
+
+    def residency(self, tenant_id: str) -> IndexResidency:
+        """Return whether a tenant index is in memory, memory-mapped or evicted."""
+        return index_residency(self._indices.get(str(tenant_id)))
+
+    def stats(self, include_evicted: bool = False) -> List[Dict[str, Any]]:
+        """
+        Describe every loaded tenant index with its residency and lookup counts.
+
+        Args:
+            include_evicted: Also list tenants searched in this process but no longer loaded
+
+        Returns:
+            List of tenant index descriptions
+        """
+        with self._lock:
+            indices = dict(self._indices)
+        hits, last_used = self._usage.counts()
+
+        stats = []
+        for tenant_id, index in indices.items():
+            description = index.describe()
+            description.update({'residency': index_residency(index).value,
+                                'hits': hits.get(tenant_id, 0),
+                                'last_used': last_used.get(tenant_id)})
+            stats.append(description)
+        if include_evicted:
+            stats.extend(
+                {'tenant_id': tenant_id, 'residency': IndexResidency.EVICTED.value,
+                 'vector_count': 0, 'resident_bytes': 0, 'hits': count,
+                 'last_used': last_used.get(tenant_id)}
+                for tenant_id, count in hits.items() if tenant_id not in indices
+            )
+        return stats
+
+    def refresh_tenant(self, tenant_id: str) -> None:
+        """
+        Update a tenant's gauges after its index was built or changed and
+        release other tenants if resident indices now exceed the memory budget.
+
+        Args:
+            tenant_id: Client/tenant identifier
+        """
+        tenant_id = str(tenant_id)
+        self._update_gauges(tenant_id)
+        self.enforce_budget(keep=tenant_id)
+
+    def enforce_budget(self, keep: Optional[str] = None) -> int:
+        """
+        Demote or evict least-recently-searched tenants until resident indices fit
+        the memory budget. Tenants never searched in this process go first.
+
+        Args:
+            keep: Tenant that must stay loaded, e.g. the one just built
+
+        Returns:
+            int: Number of tenants demoted or evicted
+        """
+        return self._budget.enforce(self._indices, self._usage.release_order(self.tenants()),
+                                    self._release, keep=keep)
+
+    def warm_up(self, loader_factory: Callable[[str], Tuple],
+                limit: Optional[int] = None,
+                on_complete: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """
+        Load the most active tenants recorded in the usage file on a background thread,
+        stopping early once the memory budget is reached.
+
+        Args:
+            loader_factory: Callable returning (loader[, delta_loader[, id_loader]]) for a tenant
+            limit: Maximum tenants to load, defaults to memory.warmup_tenants
+            on_complete: Optional callable run when warm-up finishes, e.g. closing a session
+
+        Returns:
+            threading.Thread: Started warm-up thread
+        """
+        if limit is None:
+            limit = self._memory_config.get('warmup_tenants', 0)
+
+        def load(tenant_id: str) -> bool:
+            if tenant_id in self._indices:
+                return False
+            self.get_or_build(tenant_id, *loader_factory(tenant_id), record_hit=False)
+            return True
+
+        return start_warm_up(self.active_tenants(limit), load,
+                             lambda: self._budget.exhausted(self._indices), on_complete)
+
+    def active_tenants(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Return tenants ranked by their decayed lookup counts across all processes.
+
+        Args:
+            limit: Optional maximum number of tenants
+
+        Returns:
+            List of tenant identifiers, most active first
+        """
+        return self._usage.active_tenants(limit)
+
+    def save_usage(self) -> Optional[str]:
+        """
+        Merge lookups since the last save into the usage file under the snapshot directory.
+        Counts decay with a half-life of memory.usage_half_life_hours so warm-up favours
+        recently active tenants.
+
+        Returns:
+            Optional[str]: Path of the usage file, or None if snapshots are disabled
+        """
+        return self._usage.save()
+
+    def _update_gauges(self, tenant_id: str) -> None:
+        """Export a tenant's size and residency."""
+        index = self._indices.get(tenant_id)
+        TENANT_VECTORS.labels(tenant_id=tenant_id).set(index.live_count if index is not None else 0)
+        TENANT_RESIDENT_BYTES.labels(tenant_id=tenant_id).set(
+            index.resident_bytes if index is not None else 0
+        )
+        TENANT_RESIDENCY.labels(tenant_id=tenant_id).set(RESIDENCY_LEVELS[index_residency(index)])
+
+    def _release(self, tenant_id: str, index) -> None:
+        """Replace a tenant index with its memory-mapped snapshot, or evict it without one."""
+        demoted = self._demote(tenant_id, index) if self.snapshots_enabled else None
+        with self._lock:
+            # A concurrent rebuild or drop already replaced this index
+            if self._indices.get(tenant_id) is not index:
+                return
+            if demoted is None:
+                del self._indices[tenant_id]
+            else:
+                self._indices[tenant_id] = demoted
+
+        action = 'demoted' if demoted is not None else 'evicted'
+        INDEX_RELEASES.labels(action=action).inc()
+        self._update_gauges(tenant_id)
+        logger.info(
+            "Tenant index released to stay within memory budget",
+            extra={'tenant_id': tenant_id, 'action': action,
+                   'released_bytes': index.resident_bytes}
+        )
+
+    def _demote(self, tenant_id: str, index) -> Optional[TenantIndex]:
+        """Memory-map the tenant's snapshot, writing one first if the index changed since."""
+        try:
+            if self._persisted.get(tenant_id) != (index.ntotal, index.live_count):
+                self.write_snapshot(index)
+            demoted = load_tenant_index(self._snapshots.current(tenant_id), mmap=True)
+            demoted.apply_params(self.index_params(tenant_id))
+            return demoted
+        except Exception as e:
+            logger.warning(
+                f"Tenant index demotion failed, evicting instead: {str(e)}",
+                extra={'tenant_id': tenant_id, 'error': str(e)}
+            )
+            return None
+
+    def _schedule_maintenance(self, tenant_id: str) -> None:
+        """Start a background compaction and snapshot save for a tenant unless one is running."""
+        with self._lock:
+            running = self._maintenance.get(tenant_id)
+            if running is not None and running.is_alive():
+                return
+            thread = threading.Thread(
+                target=self._run_maintenance, args=(tenant_id,),
+                name=f"maintain-{tenant_id}", daemon=True
+            )
+            self._maintenance[tenant_id] = thread
+        thread.start()
+
+    def _run_maintenance(self, tenant_id: str) -> None:
+        """
+        Background maintenance entry point: compact the index if enough vectors are
+        deleted, then save its snapshot if it still has unsaved changes. Failures are
+        logged and retried on the next change.
+        """
+        try:
+            index = self._indices.get(tenant_id)
+            if index is not None and index.needs_compaction:
+                self.compact(tenant_id)
+            if tenant_id in self._dirty:
+                self.save_snapshot(tenant_id)
+        except Exception as e:
+            logger.error(
+                f"Tenant index maintenance failed: {str(e)}",
+                extra={'tenant_id': tenant_id, 'error': str(e)}
+            )
+
+    def _load_snapshot(self, tenant_id: str) -> Optional[TenantIndex]:
+        """Load the current snapshot for a tenant if one exists and is valid."""
+        if not self.snapshots_enabled:
+            return None
+
+        current = self._snapshots.current(tenant_id)
+        if current is None:
+            return None
+
+        try:
+            index = load_tenant_index(current,
+                                      mmap=self._snapshot_config.get('mmap', True))
+            params = self.index_params(tenant_id)
+            if index.shard_count != params['shards']:
+                raise ValueError(f"Snapshot has {index.shard_count} shards, "
+                                 f"configuration expects {params['shards']}")
+            index.apply_params(params)
+            return index
+        except Exception as e:
+            logger.warning(
+                f"Ignoring unreadable tenant index snapshot: {str(e)}",
+                extra={'tenant_id': tenant_id, 'path': current, 'error': str(e)}
+            )
+            return None
+
+
+def index_residency(index) -> IndexResidency:
+    """
+    Return whether a tenant index, None when not loaded, is in memory, memory-mapped or evicted.
+    """
+    if index is None:
+        return IndexResidency.EVICTED
+    if index.mmap and not index.resident_bytes:
+        return IndexResidency.MMAP
+    return IndexResidency.MEMORY
+
+
+def get_index_registry() -> TenantIndexRegistry:
+    """Returns thread-safe singleton instance of the tenant index registry."""
+    global _registry_instance
+
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                vector_config = settings.get_vector_search_settings()
+                _registry_instance = TenantIndexRegistry(
+                    dimension=vector_config.get('dimension',
+                                                VectorSearchConfig.VECTOR_DIMENSION.value),
+                    vector_config=vector_config
+                )
+
+    return _registry_instance
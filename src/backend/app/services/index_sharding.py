@@ -0,0 +1,445 @@
+"""
+Sharded tenant indices for the AI-powered Product Catalog Search System.
+Splits multi-million-vector tenants across TenantIndex shards that are searched in parallel
+on a shared thread pool, with the per-shard results heap-merged into one ranking.
+
+Version: 1.0.0
+"""
+
+import heapq
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # version: ^1.24.0
+import faiss  # version: ^1.7.4
+
+from app.core.config import settings
+from app.services.index_snapshots import SNAPSHOT_SHARD_DIR, read_manifest, write_manifest
+from app.services.vector_index import (
+    DEFAULT_INDEX_PARAMS, DocumentInfo, DocumentRestrictions, TenantIndex, TenantLoader,
+    VectorFetcher, VectorFetchers, filter_key, group_fetchers, rank_documents,
+    validate_index_params
+)
+
+# Shared thread pool for scatter-gather searches over sharded tenant indices
+_shard_pool_lock = threading.Lock()
+_shard_pool: Optional[ThreadPoolExecutor] = None
+
+
+class ShardedTenantIndex:
+    """
+    Tenant index split across several TenantIndex shards for multi-million-vector tenants.
+    Vectors are routed to a shard by a stable hash of their embedding ID; searches scatter
+    to every shard on a shared thread pool (FAISS releases the GIL while searching) and
+    the per-shard top-k lists are heap-merged. Quantized shards return over-fetched
+    candidates that are reranked once, with a single full-precision vector fetch.
+    """
+
+    def __init__(self, tenant_id: str, dimension: int, params: Optional[Dict] = None,
+                 shards: Optional[List[TenantIndex]] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Initialize a sharded tenant index.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            dimension: Vector dimension
+            params: Optional index parameters, 'shards' sets the shard count
+            shards: Optional existing shards, e.g. loaded from a snapshot
+            executor: Optional thread pool for shard searches, defaults to the shared pool
+        """
+        self.tenant_id = tenant_id
+        self.dimension = dimension
+        self.params = {**DEFAULT_INDEX_PARAMS, **(params or {})}
+        self.shards = shards or [TenantIndex(tenant_id, dimension, self.params)
+                                 for _ in range(self.params['shards'])]
+
+        self._executor = executor
+
+        self.source = 'memory'
+        self.watermark: Optional[datetime] = None
+
+    @property
+    def shard_count(self) -> int:
+        """Number of shards the tenant's vectors are split across."""
+        return len(self.shards)
+
+    @property
+    def ntotal(self) -> int:
+        """Number of vectors held across shards, including tombstoned ones."""
+        return sum(shard.ntotal for shard in self.shards)
+
+    @property
+    def live_count(self) -> int:
+        """Number of vectors that can be returned by a search."""
+        return sum(shard.live_count for shard in self.shards)
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether any shard has enough tombstones to be worth compacting."""
+        return any(shard.needs_compaction for shard in self.shards)
+
+    @property
+    def document_count(self) -> int:
+        """Number of distinct documents with live vectors in any shard."""
+        return len(self.document_ids())
+
+    @property
+    def mmap(self) -> bool:
+        """Whether any shard is still served from a memory-mapped snapshot."""
+        return any(shard.mmap for shard in self.shards)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Approximate private memory held across shards."""
+        return sum(shard.resident_bytes for shard in self.shards)
+
+    @property
+    def index_type(self) -> str:
+        """Index type of the largest shard."""
+        return max(self.shards, key=lambda shard: shard.ntotal).index_type
+
+    def add(self, vectors: np.ndarray, chunk_ids: Sequence[str],
+            embedding_ids: Sequence[str], loader: Optional[TenantLoader] = None,
+            documents: Optional[Sequence[DocumentInfo]] = None) -> int:
+        """
+        Route vectors to their shards and add them, see TenantIndex.add().
+
+        Returns:
+            int: Number of vectors actually added
+        """
+        return self._route(TenantIndex.add, vectors, chunk_ids, embedding_ids, documents, loader)
+
+    def upsert(self, vectors: np.ndarray, chunk_ids: Sequence[str],
+               embedding_ids: Sequence[str], loader: Optional[TenantLoader] = None,
+               documents: Optional[Sequence[DocumentInfo]] = None) -> int:
+        """
+        Route vectors to their shards and upsert them, see TenantIndex.upsert().
+
+        Returns:
+            int: Number of vectors written
+        """
+        return self._route(TenantIndex.upsert, vectors, chunk_ids, embedding_ids, documents, loader)
+
+    def train(self, sample: np.ndarray, ntotal: int) -> None:
+        """Train every empty shard for its share of ntotal vectors, see TenantIndex.train()."""
+        for shard in self.shards:
+            shard.train(sample, max(1, ntotal // len(self.shards)))
+
+    def training_size(self, ntotal: int) -> int:
+        """Number of training vectors each shard uses for its share of ntotal vectors."""
+        return self.shards[0].training_size(max(1, ntotal // len(self.shards)))
+
+    def append(self, vectors: np.ndarray, chunk_ids: Sequence[str], embedding_ids: Sequence[str],
+               documents: Optional[Sequence[DocumentInfo]] = None) -> int:
+        """
+        Route vectors to their trained shards for a bulk load, see TenantIndex.append().
+
+        Returns:
+            int: Number of vectors added
+        """
+        return self._route(TenantIndex.append, vectors, chunk_ids, embedding_ids, documents)
+
+    def remove(self, embedding_ids: Sequence[str]) -> int:
+        """
+        Tombstone vectors by embedding ID in their shards.
+
+        Returns:
+            int: Number of vectors removed
+        """
+        removed = 0
+        for shard, positions in self._partition(embedding_ids).items():
+            removed += self.shards[shard].remove([embedding_ids[i] for i in positions])
+        return removed
+
+    def search(self, query_vectors: np.ndarray, top_k: int,
+               vector_fetcher: Optional[VectorFetchers] = None,
+               filters: Optional[Dict] = None,
+               documents: Optional[DocumentRestrictions] = None
+               ) -> List[List[Tuple[str, float]]]:
+        """
+        Search every shard in parallel and merge the per-shard results.
+
+        Args:
+            query_vectors: Query vector or matrix of shape (n, dimension)
+            top_k: Number of neighbours per query
+            vector_fetcher: Optional source of float32 vectors by embedding ID,
+                or one optional source per query
+            filters: Optional metadata filters, see filter_key()
+            documents: Optional document IDs per query to search within, see
+                TenantIndex.search()
+
+        Returns:
+            List of (chunk_id, score) lists, one per query, best match first
+        """
+        queries = np.array(query_vectors, dtype=np.float32).reshape(-1, self.dimension)
+        faiss.normalize_L2(queries)
+        filter_key(filters)
+        fetchers = group_fetchers(vector_fetcher, len(queries))
+
+        rerank = any(fetcher is not None for fetcher, _ in fetchers) and \
+            any(shard.reranks for shard in self.shards)
+        k = top_k * self.params['rerank_factor'] if rerank else top_k
+        per_shard = list((self._executor or get_shard_pool()).map(
+            lambda shard: shard.candidates(queries, k, filters, documents), self.shards
+        ))
+
+        if rerank:
+            return self._rerank(queries, per_shard, top_k, fetchers)
+        return [self._merge(per_shard, row, top_k) for row in range(len(queries))]
+
+    def document_centroids(self, filters: Optional[Dict] = None
+                           ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Merge each shard's partial centroid sums, see TenantIndex.document_centroids()."""
+        parts = [shard.document_centroids(filters) for shard in self.shards]
+        rows: Dict[str, int] = {}
+        for document_ids, _, _ in parts:
+            for document_id in document_ids:
+                rows.setdefault(document_id, len(rows))
+
+        sums = np.zeros((len(rows), self.dimension), dtype=np.float32)
+        counts = np.zeros(len(rows), dtype=np.int64)
+        for document_ids, shard_sums, shard_counts in parts:
+            positions = [rows[document_id] for document_id in document_ids]
+            np.add.at(sums, positions, shard_sums)
+            np.add.at(counts, positions, shard_counts)
+        return list(rows), sums, counts
+
+    def top_documents(self, query_vectors: np.ndarray, top_m: int,
+                      filters: Optional[Dict] = None) -> List[List[str]]:
+        """Select the documents whose merged centroids are closest to each query."""
+        document_ids, sums, _ = self.document_centroids(filters)
+        return rank_documents(query_vectors, document_ids, sums, top_m)
+
+    def __contains__(self, embedding_id: str) -> bool:
+        """Check whether an embedding is already indexed."""
+        return embedding_id in self.shards[self._shard_of(embedding_id)]
+
+    def embedding_ids(self) -> List[str]:
+        """Return the IDs of every live embedding across shards."""
+        return [emb_id for shard in self.shards for emb_id in shard.embedding_ids()]
+
+    def document_ids(self) -> List[str]:
+        """Return the IDs of every document with live vectors in any shard."""
+        return list(set().union(*(shard.document_ids() for shard in self.shards)))
+
+    def chunk_ids_for(self, embedding_ids: Sequence[str]) -> List[str]:
+        """Map indexed embedding IDs to their chunk IDs."""
+        return [chunk_id for shard, positions in self._partition(embedding_ids).items()
+                for chunk_id in self.shards[shard].chunk_ids_for(
+                    [embedding_ids[i] for i in positions])]
+
+    def filter_chunk_ids(self, chunk_ids: Sequence[str], filters: Optional[Dict]) -> List[str]:
+        """Keep the chunk IDs whose vectors match metadata filters, in their original order."""
+        if filter_key(filters) is None:
+            return list(chunk_ids)
+        matched = set()
+        for shard in self.shards:
+            matched.update(shard.filter_chunk_ids(chunk_ids, filters))
+        return [chunk_id for chunk_id in chunk_ids if chunk_id in matched]
+
+    def configure(self, **overrides) -> None:
+        """Update parameters on every shard, see TenantIndex.configure()."""
+        validate_index_params(overrides)
+        self.params.update(overrides)
+        for shard in self.shards:
+            shard.configure(**overrides)
+
+    def apply_params(self, params: Dict) -> None:
+        """Adopt resolved parameters on every shard without rebuilding."""
+        self.params.update(params)
+        for shard in self.shards:
+            shard.apply_params(params)
+
+    def rebuild(self, loader: Optional[TenantLoader] = None) -> None:
+        """Rebuild every shard, see TenantIndex.rebuild()."""
+        for shard in self.shards:
+            shard.rebuild(loader)
+
+    def compact(self) -> int:
+        """
+        Compact shards that have tombstones.
+
+        Returns:
+            int: Number of vectors reclaimed
+        """
+        return sum(shard.compact() for shard in self.shards)
+
+    def describe(self) -> Dict:
+        """Return aggregate size and per-shard index descriptions."""
+        shards = [shard.describe() for shard in self.shards]
+        return {
+            'tenant_id': self.tenant_id,
+            'index_type': self.index_type,
+            'target_index_type': self.params['index_type'],
+            'shards': len(shards),
+            'vector_count': sum(shard['vector_count'] for shard in shards),
+            'deleted_count': sum(shard['deleted_count'] for shard in shards),
+            'document_count': self.document_count,
+            'memory_bytes': sum(shard['memory_bytes'] for shard in shards),
+            'resident_bytes': sum(shard['resident_bytes'] for shard in shards),
+            'source': self.source,
+            'mmap': self.mmap,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'shard_details': shards
+        }
+
+    def save(self, directory: str, embedding_version: str) -> None:
+        """
+        Write each shard into its own subdirectory followed by a top-level manifest.
+
+        Args:
+            directory: Empty directory to write the snapshot into
+            embedding_version: Embedding model version the vectors were produced with
+        """
+        for i, shard in enumerate(self.shards):
+            shard_dir = os.path.join(directory, SNAPSHOT_SHARD_DIR.format(i))
+            os.makedirs(shard_dir)
+            shard.save(shard_dir, embedding_version)
+
+        write_manifest(directory, {
+            'tenant_id': self.tenant_id,
+            'embedding_version': embedding_version,
+            'dimension': self.dimension,
+            'params': self.params,
+            'shards': len(self.shards),
+            'vector_count': self.ntotal,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'created_at': datetime.utcnow().isoformat()
+        })
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'ShardedTenantIndex':
+        """
+        Load a sharded snapshot written by save().
+
+        Args:
+            directory: Snapshot directory
+            mmap: Memory-map each shard's index file
+
+        Returns:
+            ShardedTenantIndex: Loaded tenant index
+
+        Raises:
+            ValueError: If the snapshot is incomplete or has an unknown format
+        """
+        manifest = read_manifest(directory)
+        shards = [TenantIndex.load(os.path.join(directory, SNAPSHOT_SHARD_DIR.format(i)), mmap)
+                  for i in range(manifest['shards'])]
+        index = cls(manifest['tenant_id'], manifest['dimension'], manifest['params'], shards)
+        index.source = 'snapshot'
+        if manifest.get('watermark'):
+            index.watermark = datetime.fromisoformat(manifest['watermark'])
+        return index
+
+    def _shard_of(self, embedding_id: str) -> int:
+        """Stable shard assignment, identical across processes and restarts."""
+        return zlib.crc32(str(embedding_id).encode()) % len(self.shards)
+
+    def _partition(self, embedding_ids: Sequence[str]) -> Dict[int, List[int]]:
+        """Group row positions by the shard their embedding ID routes to."""
+        partition: Dict[int, List[int]] = {}
+        for i, embedding_id in enumerate(embedding_ids):
+            partition.setdefault(self._shard_of(embedding_id), []).append(i)
+        return partition
+
+    def _route(self, method: Callable, vectors: np.ndarray, chunk_ids: Sequence[str],
+               embedding_ids: Sequence[str], documents: Optional[Sequence[DocumentInfo]],
+               *args) -> int:
+        """Apply a TenantIndex write method to each shard's slice of the rows."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if not (len(vectors) == len(chunk_ids) == len(embedding_ids)):
+            raise ValueError("Vectors, chunk IDs and embedding IDs must have the same length")
+
+        written = 0
+        for shard, positions in self._partition(embedding_ids).items():
+            written += method(
+                self.shards[shard], vectors[positions],
+                [chunk_ids[i] for i in positions], [embedding_ids[i] for i in positions],
+                *args, documents=[documents[i] for i in positions] if documents else None
+            )
+        return written
+
+    def _merge(self, per_shard: List[List[List[Tuple[str, str, float]]]], row: int,
+               top_k: int) -> List[Tuple[str, float]]:
+        """Merge one query's index-scored shard candidates into its global top-k."""
+        # Each shard list is sorted best first, so a k-way heap merge yields the global top-k
+        return [(chunk_id, score) for chunk_id, _, score in islice(
+            heapq.merge(*(shard_hits[row] for shard_hits in per_shard), key=lambda hit: -hit[2]),
+            top_k
+        )]
+
+    def _rerank(self, queries: np.ndarray, per_shard: List[List[List[Tuple[str, str, float]]]],
+                top_k: int, fetchers: List[Tuple[Optional[VectorFetcher], List[int]]]
+                ) -> List[List[Tuple[str, float]]]:
+        """
+        Rescore merged candidates with exact inner products, using one vector fetch
+        per group of queries sharing a fetcher. Queries without a fetcher are merged as scored.
+        """
+        results: List[List[Tuple[str, float]]] = [[] for _ in range(len(queries))]
+        for vector_fetcher, rows in fetchers:
+            if vector_fetcher is None:
+                for row in rows:
+                    results[row] = self._merge(per_shard, row, top_k)
+                continue
+
+            embedding_ids = sorted({embedding_id for shard_hits in per_shard
+                                    for row in rows for _, embedding_id, _ in shard_hits[row]})
+            if not embedding_ids:
+                continue
+            exact = np.ascontiguousarray(vector_fetcher(embedding_ids), dtype=np.float32)
+            exact = exact.reshape(-1, self.dimension)
+            faiss.normalize_L2(exact)
+            position = {embedding_id: i for i, embedding_id in enumerate(embedding_ids)}
+
+            for row in rows:
+                hits = [hit for shard_hits in per_shard for hit in shard_hits[row]]
+                hit_vectors = exact[[position[embedding_id] for _, embedding_id, _ in hits]]
+                scores = hit_vectors @ queries[row]
+                order = np.argsort(-scores)[:top_k]
+                results[row] = [(hits[i][0], float(scores[i])) for i in order]
+        return results
+
+
+def create_tenant_index(tenant_id: str, dimension: int, params: Dict):
+    """
+    Create an empty tenant index, sharded when params['shards'] is above 1.
+
+    Returns:
+        TenantIndex or ShardedTenantIndex
+    """
+    if params.get('shards', 1) > 1:
+        return ShardedTenantIndex(tenant_id, dimension, params)
+    return TenantIndex(tenant_id, dimension, params)
+
+
+def load_tenant_index(directory: str, mmap: bool = True):
+    """
+    Load a snapshot written by TenantIndex.save() or ShardedTenantIndex.save().
+
+    Returns:
+        TenantIndex or ShardedTenantIndex
+    """
+    if read_manifest(directory).get('shards'):
+        return ShardedTenantIndex.load(directory, mmap)
+    return TenantIndex.load(directory, mmap)
+
+
+def get_shard_pool() -> ThreadPoolExecutor:
+    """Returns the shared thread pool used to search shards in parallel."""
+    global _shard_pool
+
+    if _shard_pool is None:
+        with _shard_pool_lock:
+            if _shard_pool is None:
+                sharding = settings.get_vector_search_settings().get('sharding', {})
+                threads = sharding.get('search_threads')
+                _shard_pool = ThreadPoolExecutor(max_workers=threads or os.cpu_count(),
+                                                 thread_name_prefix='shard-search')
+
+    return _shard_pool
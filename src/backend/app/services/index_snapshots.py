@@ -0,0 +1,143 @@
+"""
+On-disk tenant index snapshots for the AI-powered Product Catalog Search System.
+Snapshots live under {directory}/{tenant_id}/v{embedding_version}/ in generation directories
+published by atomically repointing a 'current' symlink, so readers never see partial files.
+
+Version: 1.0.0
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Snapshot file layout within a tenant/version directory
+SNAPSHOT_INDEX_FILE = 'index.faiss'
+SNAPSHOT_CHUNK_IDS_FILE = 'chunk_ids.npy'
+SNAPSHOT_EMBEDDING_IDS_FILE = 'embedding_ids.npy'
+SNAPSHOT_DELETED_FILE = 'deleted_labels.npy'
+SNAPSHOT_DOCUMENT_CODES_FILE = 'document_codes.npy'
+SNAPSHOT_DOCUMENTS_FILE = 'documents.npz'
+SNAPSHOT_PROJECTION_FILE = 'projection.npz'
+SNAPSHOT_MANIFEST_FILE = 'manifest.json'
+SNAPSHOT_CURRENT_LINK = 'current'
+SNAPSHOT_SHARD_DIR = 'shard-{:03d}'
+SNAPSHOT_FORMAT_VERSION = 5
+
+# Overlap applied to snapshot watermarks to cover rows committed after they were created
+WATERMARK_SKEW = timedelta(minutes=5)
+
+
+def read_manifest(directory: str) -> Dict:
+    """
+    Read and validate a snapshot manifest.
+
+    Raises:
+        ValueError: If the manifest is missing or has an unknown format
+    """
+    manifest_path = os.path.join(directory, SNAPSHOT_MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"Snapshot manifest missing in {directory}")
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+    return manifest
+
+
+def write_manifest(directory: str, manifest: Dict) -> None:
+    """
+    Write a snapshot manifest. Called after every other snapshot file is written,
+    so a partially written snapshot is never loadable.
+
+    Args:
+        directory: Snapshot directory
+        manifest: Manifest fields, format_version is added
+    """
+    with open(os.path.join(directory, SNAPSHOT_MANIFEST_FILE), 'w') as manifest_file:
+        json.dump({'format_version': SNAPSHOT_FORMAT_VERSION, **manifest}, manifest_file)
+
+
+class SnapshotStore:
+    """
+    Generations of tenant index snapshots on local disk for one embedding version.
+    Each write goes to a new generation directory and is published by atomically
+    repointing the tenant's 'current' symlink; older generations beyond
+    keep_generations are pruned.
+    """
+
+    def __init__(self, directory: str, embedding_version: str, keep_generations: int = 2):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Root snapshot directory
+            embedding_version: Embedding model version, part of every tenant path
+            keep_generations: Snapshot generations kept per tenant
+        """
+        self.directory = directory
+        self.embedding_version = embedding_version
+        self.keep_generations = keep_generations
+
+    def tenant_dir(self, tenant_id: str) -> str:
+        """
+        Return the snapshot directory for a tenant and the store's embedding version.
+
+        Raises:
+            ValueError: If the tenant identifier is not a plain path component
+        """
+        if os.path.basename(tenant_id) != tenant_id or tenant_id in ('', '.', '..'):
+            raise ValueError(f"Invalid tenant identifier for snapshot path: {tenant_id!r}")
+        return os.path.join(self.directory, tenant_id, f"v{self.embedding_version}")
+
+    def current(self, tenant_id: str) -> Optional[str]:
+        """Return the resolved path of a tenant's current snapshot, None if it has none."""
+        current = os.path.join(self.tenant_dir(tenant_id), SNAPSHOT_CURRENT_LINK)
+        if not os.path.exists(current):
+            return None
+        return os.path.realpath(current)
+
+    def write(self, index) -> str:
+        """
+        Save an index into a new generation and publish it as the tenant's current snapshot.
+
+        Args:
+            index: TenantIndex or ShardedTenantIndex to persist
+
+        Returns:
+            str: Path of the written snapshot
+        """
+        tenant_id = str(index.tenant_id)
+        version_dir = self.tenant_dir(tenant_id)
+        generation = f"gen-{time.time_ns()}"
+        snapshot_path = os.path.join(version_dir, generation)
+        os.makedirs(snapshot_path)
+        index.save(snapshot_path, self.embedding_version)
+
+        link_tmp = os.path.join(version_dir, f".{generation}.link")
+        os.symlink(generation, link_tmp)
+        os.replace(link_tmp, os.path.join(version_dir, SNAPSHOT_CURRENT_LINK))
+        self._prune(version_dir)
+
+        logger.info(
+            "Tenant index snapshot saved",
+            extra={'tenant_id': tenant_id, 'path': snapshot_path,
+                   'vector_count': index.ntotal}
+        )
+        return snapshot_path
+
+    def _prune(self, version_dir: str) -> None:
+        """Delete all but the newest snapshot generations."""
+        generations = sorted(
+            (entry for entry in os.listdir(version_dir) if entry.startswith('gen-')),
+            key=lambda entry: int(entry.split('-', 1)[1])
+        )
+        for generation in generations[:-self.keep_generations]:
+            # Processes still mapping an old generation keep their open file handles
+            shutil.rmtree(os.path.join(version_dir, generation), ignore_errors=True)
@@ -0,0 +1,370 @@
+"""
+Per-tenant BM25 inverted index for the AI-powered Product Catalog Search System.
+Complements vector search with exact matching of part numbers, model codes and units.
+
+Version: 1.0.0
+"""
+
+import logging
+import re
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # version: ^1.24.0
+
+from app.constants import TOKEN_PATTERN
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Thread-safe singleton implementation
+_registry_lock = threading.Lock()
+_registry_instance: Optional['LexicalIndexRegistry'] = None
+
+# Loader returning (chunk_ids, contents) for a tenant
+LexicalLoader = Callable[[], Tuple[List[str], List[str]]]
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Compact postings once this fraction of documents is deleted
+COMPACT_DELETED_FRACTION = 0.2
+
+# Term frequencies are stored as uint16 and saturate beyond this
+MAX_TERM_FREQUENCY = 65535
+
+# Compound tokens are also split into their parts at these separators
+TOKEN_SPLIT_PATTERN = re.compile(r"[-./_]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for BM25.
+    Compound codes such as part numbers are emitted whole and as their parts,
+    so "XJ-4500" matches queries for "xj-4500", "xj4500" style parts and "4500".
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of terms, in order, with repeats
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = TOKEN_SPLIT_PATTERN.split(token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+class LexicalIndex:
+    """
+    Incremental BM25 index over a tenant's chunks.
+    Postings are array-backed: per term, a uint32 array of document ordinals and a
+    parallel uint16 array of term frequencies, scored with vectorized numpy operations.
+    """
+
+    def __init__(self, tenant_id: str):
+        """
+        Initialize an empty lexical index.
+
+        Args:
+            tenant_id: Client/tenant identifier
+        """
+        self.tenant_id = tenant_id
+        self._terms: Dict[str, int] = {}
+        self._postings_docs: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._doc_lengths = array('I')
+        self._chunk_ids: List[str] = []
+        self._ordinals: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+        # Deleted flag per ordinal, over-allocated so appends rarely reallocate
+        self._deleted = np.zeros(0, dtype=np.bool_)
+        self._deleted_count = 0
+        self._compactor: Optional[threading.Thread] = None
+
+    @property
+    def doc_count(self) -> int:
+        """Number of searchable chunks."""
+        return len(self._chunk_ids) - self._deleted_count
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether enough chunks are deleted to make rebuilding the postings worthwhile."""
+        return bool(self._deleted_count) and \
+            self._deleted_count >= COMPACT_DELETED_FRACTION * len(self._chunk_ids)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        """Check whether a chunk is indexed."""
+        return str(chunk_id) in self._ordinals
+
+    def add(self, chunk_ids: Sequence[str], contents: Sequence[str]) -> int:
+        """
+        Index chunks, replacing any that are already indexed under the same ID.
+
+        Args:
+            chunk_ids: Chunk identifiers
+            contents: Chunk text for each ID
+
+        Returns:
+            int: Number of chunks indexed
+        """
+        with self._lock:
+            self.remove(chunk_ids)
+            for chunk_id, content in zip(chunk_ids, contents):
+                self._add_document(str(chunk_id), tokenize(content or ''))
+            return len(chunk_ids)
+
+    def remove(self, chunk_ids: Sequence[str]) -> int:
+        """
+        Tombstone chunks; postings are reclaimed in the background once enough are deleted.
+
+        Args:
+            chunk_ids: Chunk identifiers, unknown IDs are ignored
+
+        Returns:
+            int: Number of chunks removed
+        """
+        with self._lock:
+            removed = 0
+            for chunk_id in chunk_ids:
+                ordinal = self._ordinals.pop(str(chunk_id), None)
+                if ordinal is not None:
+                    self._deleted[ordinal] = True
+                    self._deleted_count += 1
+                    self._total_length -= self._doc_lengths[ordinal]
+                    removed += 1
+
+            compact = self.needs_compaction
+        if compact:
+            self._schedule_compaction()
+        return removed
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query: Query text
+            top_k: Maximum number of results
+
+        Returns:
+            List of (chunk_id, bm25_score) tuples, best match first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_count = self.doc_count
+            if not doc_count or not terms:
+                return []
+
+            doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32).astype(np.float32)
+            average_length = self._total_length / doc_count
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / average_length)
+            scores = np.zeros(len(self._chunk_ids), dtype=np.float32)
+            deleted = self._deleted if self._deleted_count else None
+
+            for term in terms:
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                docs = np.frombuffer(self._postings_docs[term_id], dtype=np.uint32)
+                tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16).astype(np.float32)
+                if deleted is not None:
+                    live = ~deleted[docs]
+                    docs, tfs = docs[live], tfs[live]
+                if not len(docs):
+                    continue
+
+                idf = np.log1p((doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+                scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + length_norm[docs])
+
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            matched = matched[np.argsort(-scores[matched], kind='stable')]
+
+            return [(self._chunk_ids[ordinal], float(scores[ordinal])) for ordinal in matched]
+
+    def compact(self) -> None:
+        """Rebuild postings without deleted chunks, renumbering the survivors."""
+        with self._lock:
+            if not self._deleted_count:
+                return
+
+            remap = np.full(len(self._chunk_ids), -1, dtype=np.int64)
+            live = np.flatnonzero(~self._deleted[:len(self._chunk_ids)]).tolist()
+            remap[live] = np.arange(len(live))
+
+            for term_id in range(len(self._postings_docs)):
+                docs = np.frombuffer(self._postings_docs[term_id], dtype=np.uint32)
+                tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16)
+                keep = remap[docs] >= 0
+                self._postings_docs[term_id] = array(
+                    'I', remap[docs[keep]].astype(np.uint32).tobytes()
+                )
+                self._postings_tfs[term_id] = array('H', tfs[keep].tobytes())
+
+            self._doc_lengths = array('I', (self._doc_lengths[ordinal] for ordinal in live))
+            self._chunk_ids = [self._chunk_ids[ordinal] for ordinal in live]
+            self._ordinals = {chunk_id: ordinal for ordinal, chunk_id in enumerate(self._chunk_ids)}
+            self._deleted = np.zeros(len(live), dtype=np.bool_)
+            self._deleted_count = 0
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by postings and document lengths."""
+        with self._lock:
+            postings = sum(docs.itemsize * len(docs) + tfs.itemsize * len(tfs)
+                           for docs, tfs in zip(self._postings_docs, self._postings_tfs))
+            return (postings + self._doc_lengths.itemsize * len(self._doc_lengths)
+                    + self._deleted.nbytes)
+
+    def _schedule_compaction(self) -> None:
+        """Start a background compaction unless one is already running."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self._run_compaction, name=f"lexical-compact-{self.tenant_id}", daemon=True
+            )
+            thread = self._compactor
+        thread.start()
+
+    def _run_compaction(self) -> None:
+        """Background compaction entry point; failures are logged and retried on next removal."""
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(
+                f"Tenant lexical index compaction failed: {str(e)}",
+                extra={'tenant_id': self.tenant_id, 'error': str(e)}
+            )
+
+    def _add_document(self, chunk_id: str, terms: List[str]) -> None:
+        """Append one chunk's postings. Caller must hold the lock."""
+        ordinal = len(self._chunk_ids)
+        self._chunk_ids.append(chunk_id)
+        self._ordinals[chunk_id] = ordinal
+        self._doc_lengths.append(len(terms))
+        if ordinal == len(self._deleted):
+            self._deleted = np.concatenate([self._deleted,
+                                            np.zeros(max(ordinal, 64), dtype=np.bool_)])
+        self._total_length += len(terms)
+
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        for term, frequency in frequencies.items():
+            term_id = self._terms.get(term)
+            if term_id is None:
+                term_id = len(self._postings_docs)
+                self._terms[term] = term_id
+                self._postings_docs.append(array('I'))
+                self._postings_tfs.append(array('H'))
+            self._postings_docs[term_id].append(ordinal)
+            self._postings_tfs[term_id].append(min(frequency, MAX_TERM_FREQUENCY))
+
+
+class LexicalIndexRegistry:
+    """
+    Process-wide registry of tenant lexical indices, built once from the loader
+    and then maintained incrementally as chunks are indexed and removed.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._indices: Dict[str, LexicalIndex] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str) -> Optional[LexicalIndex]:
+        """Return the loaded index for a tenant, if any."""
+        return self._indices.get(str(tenant_id))
+
+    def get_or_build(self, tenant_id: str, loader: LexicalLoader) -> LexicalIndex:
+        """
+        Return the tenant index, building it from the loader on first use.
+        Concurrent callers for the same tenant wait for a single build.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            loader: Callable returning (chunk_ids, contents)
+
+        Returns:
+            LexicalIndex: Shared index for the tenant
+        """
+        tenant_id = str(tenant_id)
+        index = self._indices.get(tenant_id)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(tenant_id, threading.Lock())
+
+        with build_lock:
+            index = self._indices.get(tenant_id)
+            if index is not None:
+                return index
+
+            index = LexicalIndex(tenant_id)
+            chunk_ids, contents = loader()
+            index.add(chunk_ids, contents)
+
+            with self._lock:
+                self._indices[tenant_id] = index
+
+            logger.info(
+                "Tenant lexical index built",
+                extra={'tenant_id': tenant_id, 'chunk_count': index.doc_count,
+                       'memory_bytes': index.memory_bytes()}
+            )
+            return index
+
+    def drop(self, tenant_id: str) -> bool:
+        """
+        Remove a tenant index so the next request rebuilds it.
+
+        Returns:
+            bool: True if an index was removed
+        """
+        with self._lock:
+            return self._indices.pop(str(tenant_id), None) is not None
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists with reciprocal-rank fusion: score = sum(w / (k + rank)).
+
+    Args:
+        rankings: Ranked lists of IDs, best first
+        k: Rank smoothing constant, 60 per Cormack et al.
+        weights: Optional weight per ranking, defaults to 1.0 each
+
+    Returns:
+        List of (id, fused_score) tuples, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def get_lexical_registry() -> LexicalIndexRegistry:
+    """Returns thread-safe singleton instance of the lexical index registry."""
+    global _registry_instance
+
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = LexicalIndexRegistry()
+
+    return _registry_instance
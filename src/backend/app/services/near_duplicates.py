@@ -0,0 +1,315 @@
+"""
+Per-tenant near-duplicate chunk detection for the AI-powered Product Catalog Search System.
+Fingerprints chunk text with 64-bit SimHash so repeated boilerplate (warranty text, safety
+notices, spec blocks shared by model variants) is embedded and indexed once per tenant.
+
+Version: 1.0.0
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np  # version: ^1.24.0
+from prometheus_client import Counter  # version: ^0.16.0
+
+from app.constants import TOKEN_PATTERN
+from app.core.config import settings
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+DUPLICATES_LINKED = Counter(
+    'near_duplicate_chunks_linked_total',
+    'Chunks linked to a canonical chunk instead of being embedded and indexed'
+)
+
+# Thread-safe singleton implementation
+_registry_lock = threading.Lock()
+_registry_instance: Optional['NearDuplicateRegistry'] = None
+
+# Loader returning (chunk_ids, contents) for a tenant
+DuplicateLoader = Callable[[], Tuple[List[str], List[str]]]
+
+# Fingerprint width and shingle length in tokens
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+# Defaults: Manku et al. treat 64-bit SimHashes within 3 bits as near-duplicates
+DEFAULT_MAX_DISTANCE = 3
+DEFAULT_MIN_TOKENS = 8
+
+
+def simhash(tokens: Sequence[str], shingle_size: int = SHINGLE_SIZE) -> int:
+    """
+    Compute a 64-bit SimHash over overlapping token shingles.
+    Texts that share most shingles get fingerprints a few bits apart.
+
+    Args:
+        tokens: Lowercase tokens of the text
+        shingle_size: Tokens per shingle
+
+    Returns:
+        int: Fingerprint
+    """
+    size = min(shingle_size, len(tokens))
+    if size == 0:
+        return 0
+    hashes = np.array([
+        int.from_bytes(
+            hashlib.blake2b(' '.join(tokens[i:i + size]).encode(), digest_size=8).digest(), 'little'
+        )
+        for i in range(len(tokens) - size + 1)
+    ], dtype=np.uint64)
+    # Each shingle votes +1/-1 per bit; the fingerprint keeps the majority
+    ones = ((hashes[:, None] >> BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    majority = (ones * 2 > len(hashes)).astype(np.uint64)
+    return int((majority << BIT_SHIFTS).sum())
+
+
+class NearDuplicateIndex:
+    """
+    SimHash fingerprints of a tenant's indexed chunks with LSH band lookup.
+    Fingerprints are split into max_distance + 1 bands, so by the pigeonhole principle any
+    fingerprint within max_distance bits shares at least one band exactly with the query.
+    """
+
+    def __init__(self, tenant_id: str, max_distance: int = DEFAULT_MAX_DISTANCE,
+                 min_tokens: int = DEFAULT_MIN_TOKENS):
+        """
+        Initialize an empty detector.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            max_distance: Largest Hamming distance treated as a near-duplicate
+            min_tokens: Chunks with fewer tokens are never linked, their SimHash is too unstable
+        """
+        self.tenant_id = tenant_id
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self._band_bits = FINGERPRINT_BITS // (max_distance + 1)
+        self._band_mask = (1 << self._band_bits) - 1
+        self._fingerprints: Dict[str, int] = {}
+        self._bands: List[Dict[int, List[str]]] = [{} for _ in range(max_distance + 1)]
+        self._lock = threading.RLock()
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of canonical chunks fingerprinted."""
+        return len(self._fingerprints)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return str(chunk_id) in self._fingerprints
+
+    def fingerprint(self, content: str) -> Optional[int]:
+        """
+        Fingerprint chunk text.
+
+        Returns:
+            Optional[int]: SimHash, or None if the text is too short to compare
+        """
+        tokens = TOKEN_PATTERN.findall(content.lower())
+        if len(tokens) < self.min_tokens:
+            return None
+        return simhash(tokens)
+
+    def add(self, chunk_ids: Sequence[str], contents: Sequence[str]) -> int:
+        """
+        Fingerprint indexed chunks, skipping ones already present or too short.
+
+        Args:
+            chunk_ids: Chunk identifiers
+            contents: Chunk text aligned with chunk_ids
+
+        Returns:
+            int: Number of chunks added
+        """
+        added = 0
+        with self._lock:
+            for chunk_id, content in zip(chunk_ids, contents):
+                chunk_id = str(chunk_id)
+                if chunk_id in self._fingerprints:
+                    continue
+                fingerprint = self.fingerprint(content)
+                if fingerprint is not None:
+                    self._insert(chunk_id, fingerprint, self._fingerprints, self._bands)
+                    added += 1
+        return added
+
+    def remove(self, chunk_ids: Sequence[str]) -> int:
+        """
+        Forget removed chunks so nothing new is linked to them.
+
+        Returns:
+            int: Number of chunks removed
+        """
+        removed = 0
+        with self._lock:
+            for chunk_id in chunk_ids:
+                fingerprint = self._fingerprints.pop(str(chunk_id), None)
+                if fingerprint is None:
+                    continue
+                for band, buckets in zip(self._band_keys(fingerprint), self._bands):
+                    bucket = buckets.get(band, [])
+                    if str(chunk_id) in bucket:
+                        bucket.remove(str(chunk_id))
+                    if not bucket:
+                        buckets.pop(band, None)
+                removed += 1
+        return removed
+
+    def link(self, chunk_ids: Sequence[str], contents: Sequence[str],
+             exclude: Optional[Set[str]] = None) -> Dict[str, str]:
+        """
+        Find the canonical chunk for each new chunk: the nearest indexed chunk within
+        max_distance bits, or else an earlier near-identical chunk of the same batch.
+        The detector is not modified; new canonical chunks are added once indexed.
+
+        Args:
+            chunk_ids: Identifiers of the new chunks, e.g. positions within a document
+            contents: Chunk text aligned with chunk_ids
+            exclude: Indexed chunks that must not be used as canonical, e.g. the
+                chunks a reprocessed document is about to replace
+
+        Returns:
+            Dict mapping each duplicate chunk ID to its canonical chunk ID
+        """
+        exclude = {str(chunk_id) for chunk_id in exclude or ()}
+        batch_fingerprints: Dict[str, int] = {}
+        batch_bands: List[Dict[int, List[str]]] = [{} for _ in self._bands]
+        duplicates = {}
+
+        for chunk_id, content in zip(chunk_ids, contents):
+            chunk_id = str(chunk_id)
+            fingerprint = self.fingerprint(content)
+            if fingerprint is None:
+                continue
+            with self._lock:
+                canonical = self._nearest(fingerprint, self._fingerprints, self._bands, exclude)
+            if canonical is None:
+                canonical = self._nearest(fingerprint, batch_fingerprints, batch_bands, exclude)
+            if canonical is None:
+                self._insert(chunk_id, fingerprint, batch_fingerprints, batch_bands)
+            else:
+                duplicates[chunk_id] = canonical
+
+        DUPLICATES_LINKED.inc(len(duplicates))
+        return duplicates
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        """Split a fingerprint into its band values."""
+        return [(fingerprint >> (band * self._band_bits)) & self._band_mask
+                for band in range(len(self._bands))]
+
+    def _insert(self, chunk_id: str, fingerprint: int, fingerprints: Dict[str, int],
+                bands: List[Dict[int, List[str]]]) -> None:
+        """Record a fingerprint in a fingerprint table and its band buckets."""
+        fingerprints[chunk_id] = fingerprint
+        for band, buckets in zip(self._band_keys(fingerprint), bands):
+            buckets.setdefault(band, []).append(chunk_id)
+
+    def _nearest(self, fingerprint: int, fingerprints: Dict[str, int],
+                 bands: List[Dict[int, List[str]]], exclude: Set[str]) -> Optional[str]:
+        """Return the closest fingerprinted chunk within max_distance bits, earliest on ties."""
+        best, best_distance = None, self.max_distance + 1
+        for band, buckets in zip(self._band_keys(fingerprint), bands):
+            for candidate in buckets.get(band, ()):
+                if candidate in exclude:
+                    continue
+                distance = (fingerprints[candidate] ^ fingerprint).bit_count()
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+
+class NearDuplicateRegistry:
+    """
+    Process-wide registry of tenant near-duplicate detectors, built once from the loader
+    and then maintained incrementally as chunks are indexed and removed.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE,
+                 min_tokens: int = DEFAULT_MIN_TOKENS):
+        """
+        Initialize an empty registry.
+
+        Args:
+            max_distance: Largest Hamming distance treated as a near-duplicate
+            min_tokens: Minimum tokens for a chunk to be linked
+        """
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self._indices: Dict[str, NearDuplicateIndex] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str) -> Optional[NearDuplicateIndex]:
+        """Return the loaded detector for a tenant, if any."""
+        return self._indices.get(str(tenant_id))
+
+    def get_or_build(self, tenant_id: str, loader: DuplicateLoader) -> NearDuplicateIndex:
+        """
+        Return the tenant detector, building it from the loader on first use.
+        Concurrent callers for the same tenant wait for a single build.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            loader: Callable returning (chunk_ids, contents) of the tenant's indexed chunks
+
+        Returns:
+            NearDuplicateIndex: Shared detector for the tenant
+        """
+        tenant_id = str(tenant_id)
+        index = self._indices.get(tenant_id)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(tenant_id, threading.Lock())
+
+        with build_lock:
+            index = self._indices.get(tenant_id)
+            if index is not None:
+                return index
+
+            index = NearDuplicateIndex(tenant_id, self.max_distance, self.min_tokens)
+            chunk_ids, contents = loader()
+            index.add(chunk_ids, contents)
+
+            with self._lock:
+                self._indices[tenant_id] = index
+
+            logger.info(
+                "Tenant near-duplicate index built",
+                extra={'tenant_id': tenant_id, 'chunk_count': index.chunk_count}
+            )
+            return index
+
+    def drop(self, tenant_id: str) -> bool:
+        """
+        Remove a tenant detector so the next request rebuilds it.
+
+        Returns:
+            bool: True if a detector was removed
+        """
+        with self._lock:
+            return self._indices.pop(str(tenant_id), None) is not None
+
+
+def get_duplicate_registry() -> NearDuplicateRegistry:
+    """Returns thread-safe singleton instance of the near-duplicate registry."""
+    global _registry_instance
+
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                dedup_config = settings.get_vector_search_settings().get('deduplication', {})
+                _registry_instance = NearDuplicateRegistry(
+                    max_distance=dedup_config.get('max_distance', DEFAULT_MAX_DISTANCE),
+                    min_tokens=dedup_config.get('min_tokens', DEFAULT_MIN_TOKENS)
+                )
+
+    return _registry_instance
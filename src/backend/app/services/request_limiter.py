@@ -0,0 +1,288 @@
+"""
+Adaptive concurrency limit for outbound OpenAI requests in the AI-powered Product Catalog
+Search System. One limit is shared by every AIService in the process and adjusted with AIMD:
+it grows additively while request latency stays stable and is cut multiplicatively on
+throttling (HTTP 429) and timeouts, so retries queue locally instead of adding to the overload.
+
+Version: 1.0.0
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Dict, Optional
+
+from prometheus_client import Counter, Gauge  # version: ^0.16.0
+
+from app.core.config import settings
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+LIMIT_GAUGE = Gauge('ai_concurrency_limit', 'Current adaptive limit on concurrent OpenAI requests')
+IN_FLIGHT_GAUGE = Gauge('ai_requests_in_flight', 'OpenAI requests currently running')
+QUEUED_GAUGE = Gauge(
+    'ai_requests_queued', 'OpenAI requests waiting for a concurrency slot', ['priority']
+)
+BACKOFFS = Counter('ai_concurrency_backoffs_total', 'Concurrency limit decreases', ['reason'])
+
+# Limiter defaults used when configuration omits them
+DEFAULT_INITIAL_LIMIT = 8
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 64
+DEFAULT_BACKOFF_RATIO = 0.5
+DEFAULT_LATENCY_TOLERANCE = 2.0
+DEFAULT_BACKGROUND_SHARE = 0.75
+LATENCY_SMOOTHING = 0.1  # Weight of each new sample in the per-kind latency baseline
+
+# Thread-safe singleton implementation
+_limiter_lock = threading.Lock()
+_limiter_instance: Optional['AdaptiveConcurrencyLimiter'] = None
+
+
+class RequestPriority(IntEnum):
+    """Priority of an outbound request; lower values are admitted first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Check whether a failed request signals that the service is overloaded: throttling
+    (HTTP 429), service unavailable (HTTP 503) or a timeout.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        bool: True for overload errors
+    """
+    status = getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+    if status in (429, 503):
+        return True
+    return (isinstance(error, (asyncio.TimeoutError, TimeoutError))
+            or 'Timeout' in type(error).__name__)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter with two priority classes. Interactive requests may use the
+    whole limit and are admitted ahead of queued background requests; background requests
+    are held to background_share of the limit so queries always find free slots.
+
+    State is guarded by a thread lock and waiters are woken on their own event loop, so one
+    limiter can be shared by the API event loop and worker threads running their own loops.
+    """
+
+    def __init__(self, initial_limit: int = DEFAULT_INITIAL_LIMIT,
+                 min_limit: int = DEFAULT_MIN_LIMIT, max_limit: int = DEFAULT_MAX_LIMIT,
+                 backoff_ratio: float = DEFAULT_BACKOFF_RATIO,
+                 latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+                 background_share: float = DEFAULT_BACKGROUND_SHARE):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Concurrent requests allowed before any feedback
+            min_limit: Lower bound of the limit
+            max_limit: Upper bound of the limit
+            backoff_ratio: Factor applied to the limit on overload
+            latency_tolerance: Latency, as a multiple of the baseline, still counted as stable
+            background_share: Fraction of the limit background requests may occupy
+        """
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, self._min_limit), self._max_limit))
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._background_share = background_share
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Dict[RequestPriority, deque] = {
+            priority: deque() for priority in RequestPriority
+        }
+        # Per-kind baseline of latency per unit of request cost
+        self._baselines: Dict[str, float] = {}
+        self._last_backoff = 0.0
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        """Current number of concurrent requests allowed."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Requests currently holding a slot."""
+        return self._in_flight
+
+    def queued(self, priority: Optional[RequestPriority] = None) -> int:
+        """Requests waiting for a slot, optionally for one priority."""
+        if priority is not None:
+            return len(self._waiters[priority])
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriority = RequestPriority.INTERACTIVE,
+                   kind: str = 'default', cost: float = 1.0) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot for one request and feed its outcome back into the limit.
+
+        Args:
+            priority: Request priority class
+            kind: Request kind; latency baselines are kept per kind
+            cost: Relative size of the request, e.g. its input count, used to normalize latency
+
+        Yields:
+            None once a slot is held
+        """
+        saturated = await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self._release(started, kind, cost, saturated, overloaded=is_overload_error(e),
+                          succeeded=False)
+            raise
+        else:
+            self._release(started, kind, cost, saturated, overloaded=False, succeeded=True)
+
+    async def _acquire(self, priority: RequestPriority) -> bool:
+        """
+        Wait until a slot is granted to this request.
+
+        Returns:
+            bool: True if the request started with at least half the limit in use, so the
+                  limit rather than the offered load bounds concurrency
+        """
+        with self._lock:
+            if not self._waiters[RequestPriority.INTERACTIVE] and self._has_capacity(priority) and (
+                    priority == RequestPriority.INTERACTIVE or not self._waiters[priority]):
+                self._in_flight += 1
+                self._publish()
+                return self._in_flight * 2 >= self._limit
+            loop = asyncio.get_running_loop()
+            waiter = [loop.create_future(), loop, False]
+            self._waiters[priority].append(waiter)
+            self._publish()
+
+        try:
+            await waiter[0]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter[2]:
+                    # Granted as the wait was cancelled; hand the slot on
+                    self._in_flight -= 1
+                    self._dispatch()
+                elif waiter in self._waiters[priority]:
+                    self._waiters[priority].remove(waiter)
+                self._publish()
+            raise
+        return True
+
+    def _release(self, started: float, kind: str, cost: float, saturated: bool,
+                 overloaded: bool, succeeded: bool) -> None:
+        """Return a slot and adjust the limit from the request outcome."""
+        latency = (time.monotonic() - started) / max(cost, 1.0)
+        with self._lock:
+            self._in_flight -= 1
+
+            if overloaded:
+                # Requests already running when the limit was last cut report the same
+                # overload; only the first of them cuts it again
+                if started >= self._last_backoff:
+                    self._limit = max(self._min_limit, self._limit * self._backoff_ratio)
+                    self._last_backoff = time.monotonic()
+                    BACKOFFS.labels(reason='overload').inc()
+                    logger.warning("OpenAI concurrency limit reduced",
+                                   extra={'limit': int(self._limit), 'in_flight': self._in_flight})
+            elif succeeded:
+                baseline = self._baselines.get(kind, latency)
+                stable = latency <= baseline * self._latency_tolerance
+                self._baselines[kind] = baseline + LATENCY_SMOOTHING * (latency - baseline)
+                # Grow by about one slot per limit's worth of stable requests, and only
+                # while the limit is close to what holds requests back
+                if stable and saturated:
+                    self._limit = min(self._max_limit, self._limit + 1.0 / self._limit)
+
+            self._dispatch()
+            self._publish()
+
+    def _has_capacity(self, priority: RequestPriority) -> bool:
+        """Check whether a request of a priority may start now. Caller holds the lock."""
+        limit = int(self._limit)
+        if priority == RequestPriority.BACKGROUND:
+            limit = max(1, int(limit * self._background_share))
+        return self._in_flight < limit
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiters, interactive first. Caller holds the lock."""
+        for priority in RequestPriority:
+            waiters = self._waiters[priority]
+            while waiters and self._has_capacity(priority):
+                waiter = waiters.popleft()
+                future, loop, _ = waiter
+                if future.cancelled():
+                    continue
+                waiter[2] = True
+                self._in_flight += 1
+                loop.call_soon_threadsafe(_grant, future)
+            if waiters:
+                # Lower priorities wait behind a blocked higher priority
+                return
+
+    def _publish(self) -> None:
+        """Export the current state as metrics. Caller holds the lock."""
+        LIMIT_GAUGE.set(int(self._limit))
+        IN_FLIGHT_GAUGE.set(self._in_flight)
+        for priority, waiters in self._waiters.items():
+            QUEUED_GAUGE.labels(priority=priority.name.lower()).set(len(waiters))
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return the current limit, running requests and queued requests.
+
+        Returns:
+            Dict of limiter counts
+        """
+        with self._lock:
+            return {
+                'limit': int(self._limit),
+                'in_flight': self._in_flight,
+                'queued_interactive': len(self._waiters[RequestPriority.INTERACTIVE]),
+                'queued_background': len(self._waiters[RequestPriority.BACKGROUND])
+            }
+
+
+def _grant(future: asyncio.Future) -> None:
+    """Wake a waiter on its own event loop."""
+    if not future.done():
+        future.set_result(None)
+
+
+def get_request_limiter() -> AdaptiveConcurrencyLimiter:
+    """Returns thread-safe singleton instance of the outbound OpenAI request limiter."""
+    global _limiter_instance
+
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                limiter_config = settings.get_azure_settings().get('openai_concurrency', {})
+                _limiter_instance = AdaptiveConcurrencyLimiter(
+                    initial_limit=limiter_config.get('initial_limit', DEFAULT_INITIAL_LIMIT),
+                    min_limit=limiter_config.get('min_limit', DEFAULT_MIN_LIMIT),
+                    max_limit=limiter_config.get('max_limit', DEFAULT_MAX_LIMIT),
+                    backoff_ratio=limiter_config.get('backoff_ratio', DEFAULT_BACKOFF_RATIO),
+                    latency_tolerance=limiter_config.get('latency_tolerance',
+                                                         DEFAULT_LATENCY_TOLERANCE),
+                    background_share=limiter_config.get('background_share',
+                                                        DEFAULT_BACKGROUND_SHARE)
+                )
+
+    return _limiter_instance
@@ -0,0 +1,212 @@
+"""
+Dynamic micro-batching of concurrent vector searches for the AI-powered Product Catalog
+Search System. Coalesces single-query searches against the same tenant index into one
+matrix search.
+
+Version: 1.0.0
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np  # version: ^1.24.0
+from prometheus_client import Histogram  # version: ^0.16.0
+
+from app.core.config import settings
+from app.services.vector_index import TenantIndex, VectorFetcher, filter_key
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BATCH_QUEUE_WAIT = Histogram(
+    'vector_search_batch_queue_wait_seconds',
+    'Time a query waits for its micro-batch to execute',
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+BATCH_SIZE = Histogram(
+    'vector_search_batch_size',
+    'Number of queries executed per micro-batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+# Batching defaults used when configuration omits them
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH_SIZE = 32
+
+# Thread-safe singleton implementation
+_batcher_lock = threading.Lock()
+_batcher_instance: Optional['SearchBatcher'] = None
+
+
+class _Batch:
+    """Queries collected for one tenant index and filter while its window is open."""
+
+    def __init__(self, filters: Optional[Dict] = None):
+        self.filters = filters
+        self.queries: List[np.ndarray] = []
+        self.top_ks: List[int] = []
+        self.fetchers: List[Optional[VectorFetcher]] = []
+        self.documents: List[Optional[Sequence[str]]] = []
+        self.enqueued_at: List[float] = []
+        self.futures: List[Future] = []
+        self.full = threading.Event()
+        self.closed = False
+
+    def append(self, query: np.ndarray, top_k: int,
+               vector_fetcher: Optional[VectorFetcher] = None,
+               documents: Optional[Sequence[str]] = None) -> Future:
+        """Add a query and return the future its results will be delivered through."""
+        future = Future()
+        self.queries.append(query)
+        self.top_ks.append(top_k)
+        # Each caller's rerank vectors are read through its own fetcher, i.e. its own session
+        self.fetchers.append(vector_fetcher)
+        self.documents.append(documents)
+        self.enqueued_at.append(time.perf_counter())
+        self.futures.append(future)
+        return future
+
+
+class SearchBatcher:
+    """
+    Leader/follower micro-batcher in front of tenant indices.
+    The first caller for a tenant opens a batch and becomes its leader; callers arriving
+    within the window join it. The leader runs one batched search and fans results out.
+    A lone caller searches immediately, so batching adds no latency at low load.
+    """
+
+    def __init__(self, window_ms: float = DEFAULT_WINDOW_MS,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        """
+        Initialize the batcher.
+
+        Args:
+            window_ms: Longest time a leader waits for more queries, 0 disables batching
+            max_batch_size: Queries per batch, a full batch executes without waiting
+        """
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._open: Dict[Tuple[TenantIndex, Hashable], _Batch] = {}
+        self._active: Dict[TenantIndex, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether queries are coalesced at all."""
+        return self.window > 0 and self.max_batch_size > 1
+
+    def search(self, tenant_index: TenantIndex, query_vector: np.ndarray, top_k: int,
+               vector_fetcher: Optional[VectorFetcher] = None,
+               filters: Optional[Dict] = None,
+               documents: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Search a tenant index for a single query, sharing the FAISS call with
+        concurrent queries for the same tenant and metadata filters.
+
+        Args:
+            tenant_index: Tenant index to search
+            query_vector: Query vector of shape (dimension,)
+            top_k: Number of neighbours to return
+            vector_fetcher: Optional source of float32 vectors for reranking
+            filters: Optional metadata filters, see filter_key()
+            documents: Optional document IDs to search within. Queries restricted to
+                different documents still share a batch
+
+        Returns:
+            List of (chunk_id, score) tuples, best match first
+        """
+        if not self.enabled:
+            return tenant_index.search(
+                query_vector, top_k, vector_fetcher=vector_fetcher, filters=filters,
+                documents=None if documents is None else [documents]
+            )[0]
+
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        # Only queries with identical filters can share one selector, so they batch separately
+        batch_key = (tenant_index, filter_key(filters))
+        with self._lock:
+            active = self._active.get(tenant_index, 0) + 1
+            self._active[tenant_index] = active
+
+            batch = self._open.get(batch_key)
+            leader = batch is None
+            if leader:
+                batch = _Batch(filters)
+                self._open[batch_key] = batch
+            future = batch.append(query, top_k, vector_fetcher, documents)
+
+            if len(batch.queries) >= self.max_batch_size:
+                self._close(batch_key, batch)
+
+        try:
+            if leader:
+                # Only wait for followers when other searches for this tenant are in flight
+                if active > 1:
+                    batch.full.wait(self.window)
+                with self._lock:
+                    self._close(batch_key, batch)
+                self._execute(tenant_index, batch)
+
+            return future.result()
+
+        finally:
+            with self._lock:
+                remaining = self._active[tenant_index] - 1
+                if remaining:
+                    self._active[tenant_index] = remaining
+                else:
+                    del self._active[tenant_index]
+
+    def _close(self, batch_key: Tuple[TenantIndex, Hashable], batch: _Batch) -> None:
+        """Stop a batch accepting queries. Caller must hold the lock."""
+        if not batch.closed:
+            batch.closed = True
+            if self._open.get(batch_key) is batch:
+                del self._open[batch_key]
+            batch.full.set()
+
+    def _execute(self, tenant_index: TenantIndex, batch: _Batch) -> None:
+        """Run one batched search and deliver each caller's results."""
+        started = time.perf_counter()
+        for enqueued_at in batch.enqueued_at:
+            BATCH_QUEUE_WAIT.observe(started - enqueued_at)
+        BATCH_SIZE.observe(len(batch.queries))
+
+        try:
+            restricted = any(documents is not None for documents in batch.documents)
+            results = tenant_index.search(
+                np.vstack(batch.queries), max(batch.top_ks), vector_fetcher=batch.fetchers,
+                filters=batch.filters, documents=batch.documents if restricted else None
+            )
+        except Exception as e:
+            logger.error(
+                f"Batched vector search failed: {str(e)}",
+                extra={'tenant_id': tenant_index.tenant_id, 'batch_size': len(batch.queries)}
+            )
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+
+        for future, hits, top_k in zip(batch.futures, results, batch.top_ks):
+            future.set_result(hits[:top_k])
+
+
+def get_search_batcher() -> SearchBatcher:
+    """Returns thread-safe singleton instance of the search batcher."""
+    global _batcher_instance
+
+    if _batcher_instance is None:
+        with _batcher_lock:
+            if _batcher_instance is None:
+                batching = settings.get_vector_search_settings().get('batching', {})
+                _batcher_instance = SearchBatcher(
+                    window_ms=batching.get('window_ms', DEFAULT_WINDOW_MS)
+                    if batching.get('enabled', True) else 0,
+                    max_batch_size=batching.get('max_batch_size', DEFAULT_MAX_BATCH_SIZE)
+                )
+
+    return _batcher_instance
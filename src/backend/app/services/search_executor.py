@@ -0,0 +1,182 @@
+"""
+Bounded thread pool for blocking vector search work in the AI-powered Product Catalog
+Search System. Lets coroutines await FAISS searches, index builds and chunk hydration
+without blocking the event loop.
+
+Version: 1.0.0
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import status  # version: ^0.103.0
+from prometheus_client import Counter, Gauge, Histogram  # version: ^0.16.0
+
+from app.core.config import settings
+from app.exceptions import BaseAppException
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    'vector_search_executor_queue_depth',
+    'Searches waiting for a free search executor thread'
+)
+EXECUTOR_IN_FLIGHT = Gauge(
+    'vector_search_executor_in_flight',
+    'Searches running on search executor threads'
+)
+EXECUTOR_WAIT = Histogram(
+    'vector_search_executor_wait_seconds',
+    'Time a search waits for a search executor thread',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+EXECUTOR_REJECTED = Counter(
+    'vector_search_executor_rejected_total',
+    'Searches rejected because the search executor queue was full'
+)
+
+# Executor defaults used when configuration omits them
+DEFAULT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_MAX_PENDING = 256
+
+# Thread-safe singleton implementation
+_executor_lock = threading.Lock()
+_executor_instance: Optional['SearchExecutor'] = None
+
+
+class SearchOverloadedError(BaseAppException):
+    """Raised when the search executor already holds its maximum number of pending searches."""
+
+    def __init__(self, pending: int):
+        """
+        Initialize the error.
+
+        Args:
+            pending: Number of searches queued or running when the search was rejected
+        """
+        super().__init__(
+            message="Search capacity exhausted, retry shortly",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            details={'pending': pending}
+        )
+
+
+class SearchExecutor:
+    """
+    Fixed-size thread pool with a bounded queue for blocking search work.
+    FAISS releases the GIL while searching, so searches on the pool run in parallel with
+    each other and with the event loop. Once max_pending searches are queued or running,
+    new ones are rejected instead of queueing without bound behind a slow search.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Threads running searches concurrently
+            max_pending: Searches queued or running before new ones are rejected
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vector-search')
+        self._queued = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        """Number of searches waiting for a thread."""
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        """Number of searches currently executing."""
+        return self._running
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool and await its result.
+
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Any: The callable's return value
+
+        Raises:
+            SearchOverloadedError: If max_pending searches are already queued or running
+        """
+        with self._lock:
+            pending = self._queued + self._running
+            if pending >= self.max_pending:
+                EXECUTOR_REJECTED.inc()
+                raise SearchOverloadedError(pending)
+            self._queued += 1
+            EXECUTOR_QUEUE_DEPTH.set(self._queued)
+
+        submitted = time.perf_counter()
+        started = abandoned = False
+
+        def job() -> Any:
+            nonlocal started
+            with self._lock:
+                # The awaiting caller was cancelled and already released its queue slot
+                if abandoned:
+                    return None
+                started = True
+                self._queued -= 1
+                self._running += 1
+                EXECUTOR_QUEUE_DEPTH.set(self._queued)
+                EXECUTOR_IN_FLIGHT.set(self._running)
+            EXECUTOR_WAIT.observe(time.perf_counter() - submitted)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    EXECUTOR_IN_FLIGHT.set(self._running)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, job)
+        finally:
+            with self._lock:
+                if not started:
+                    abandoned = True
+                    self._queued -= 1
+                    EXECUTOR_QUEUE_DEPTH.set(self._queued)
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running searches to finish."""
+        self._pool.shutdown(wait=True)
+
+
+def get_search_executor() -> SearchExecutor:
+    """Returns thread-safe singleton instance of the search executor."""
+    global _executor_instance
+
+    if _executor_instance is None:
+        with _executor_lock:
+            if _executor_instance is None:
+                executor_config = settings.get_vector_search_settings().get('executor', {})
+                _executor_instance = SearchExecutor(
+                    max_workers=executor_config.get('threads') or DEFAULT_MAX_WORKERS,
+                    max_pending=executor_config.get('max_pending', DEFAULT_MAX_PENDING)
+                )
+                logger.info(
+                    "Search executor started",
+                    extra={'max_workers': _executor_instance.max_workers,
+                           'max_pending': _executor_instance.max_pending}
+                )
+
+    return _executor_instance
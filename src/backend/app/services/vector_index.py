@@ -0,0 +1,1481 @@
+"""
+Per-tenant FAISS indices for the AI-powered Product Catalog Search System.
+Holds one in-memory index per tenant that is built once and shared by every request in the process;
+sharding, snapshots, the memory budget and the registry live in the index_* modules.
+
+Version: 1.0.0
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np  # version: ^1.24.0
+import faiss  # version: ^1.7.4
+from prometheus_client import Histogram  # version: ^0.16.0
+
+from app.constants import IndexType, ProjectionType
+from app.services.index_snapshots import (
+    SNAPSHOT_CHUNK_IDS_FILE, SNAPSHOT_DELETED_FILE, SNAPSHOT_DOCUMENT_CODES_FILE,
+    SNAPSHOT_DOCUMENTS_FILE, SNAPSHOT_EMBEDDING_IDS_FILE, SNAPSHOT_INDEX_FILE,
+    SNAPSHOT_PROJECTION_FILE, read_manifest, write_manifest
+)
+from app.services.vector_projection import VectorProjection
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+INDEX_REBUILD_DURATION = Histogram(
+    'vector_index_rebuild_seconds',
+    'Time spent building a replacement tenant index off to the side', ['operation']
+)
+INDEX_SWAP_DURATION = Histogram(
+    'vector_index_swap_seconds',
+    'Time searches are held while a rebuilt tenant index is published', ['operation'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+)
+
+# Document a vector belongs to: (document_id, document_type, created_at)
+DocumentInfo = Tuple[str, str, datetime]
+
+# Loader returning (vectors, chunk_ids, embedding_ids[, documents]) for a tenant
+TenantLoader = Callable[[], Tuple]
+
+# Fetcher returning full-precision vectors aligned with the requested embedding IDs
+VectorFetcher = Callable[[List[str]], np.ndarray]
+
+# One fetcher for every query, or one per query, e.g. for queries batched from several requests
+VectorFetchers = Union[VectorFetcher, Sequence[Optional[VectorFetcher]]]
+
+# Per-query document IDs a search is restricted to, None for an unrestricted query
+DocumentRestrictions = Sequence[Optional[Sequence[str]]]
+
+# Loader returning (vectors, chunk_ids, embedding_ids[, documents]) created at or after a watermark
+DeltaLoader = Callable[[datetime], Tuple]
+
+# Loader returning the IDs of every embedding the tenant currently has
+IdLoader = Callable[[], Iterable[str]]
+
+# Index parameters used when configuration omits them
+DEFAULT_INDEX_PARAMS = {
+    'index_type': IndexType.FLAT.value,
+    'nlist': None,              # IVF cluster count, None derives 4 * sqrt(N)
+    'nprobe': 8,                # IVF clusters scanned per query
+    'hnsw_m': 32,               # HNSW graph neighbours per node
+    'ef_construction': 200,     # HNSW candidate list size while building
+    'ef_search': 100,           # HNSW candidate list size while searching
+    'ivf_min_vectors': 50000,   # Below this size IVF tenants use exact search
+    'hnsw_min_vectors': 20000,  # Below this size HNSW tenants use exact search
+    'sq8_min_vectors': 10000,   # Below this size SQ8 tenants use exact search
+    'ivf_pq_min_vectors': 100000,  # Below this size IVF-PQ tenants use exact search
+    'ivf_retrain_growth': 4.0,  # Retrain IVF centroids once the tenant grows by this factor
+    'pq_m': 384,                # PQ sub-quantizers, 1536 / 384 = 4 dims per byte (16x smaller)
+    'pq_nbits': 8,              # Bits per PQ sub-quantizer code
+    'rerank': True,             # Rerank quantized candidates against float32 vectors
+    'rerank_factor': 4,         # Candidates fetched per requested result when reranking
+    'compact_deleted_fraction': 0.2,  # Compact once this fraction of vectors is tombstoned
+    'shards': 1,                # Sub-indices searched in parallel, size thresholds apply per shard
+    'projection': ProjectionType.NONE.value,  # Dimension reduction: none, pca or truncate
+    'projection_dim': 256,      # Dimension of projected vectors
+    'projection_min_vectors': 10000  # Below this size tenants index full-dimension vectors
+}
+
+# Parameters that change index structure and therefore require a rebuild
+STRUCTURAL_PARAMS = {'index_type', 'nlist', 'hnsw_m', 'ef_construction', 'pq_m', 'pq_nbits',
+                     'projection', 'projection_dim'}
+
+# Parameters that can only be changed by rebuilding from full-dimension vectors
+PROJECTION_PARAMS = {'projection', 'projection_dim'}
+
+# Index types whose stored codes are lossy approximations of the original vectors
+QUANTIZED_INDEX_TYPES = {IndexType.SQ8.value, IndexType.IVF_PQ.value}
+
+# Size thresholds below which each approximate type falls back to exact search
+MIN_VECTORS_PARAM = {
+    IndexType.IVF_FLAT.value: 'ivf_min_vectors',
+    IndexType.HNSW.value: 'hnsw_min_vectors',
+    IndexType.SQ8.value: 'sq8_min_vectors',
+    IndexType.IVF_PQ.value: 'ivf_pq_min_vectors'
+}
+
+# Index types with IVF coarse quantizers that are retrained as the tenant grows
+IVF_INDEX_TYPES = {IndexType.IVF_FLAT.value, IndexType.IVF_PQ.value}
+
+# Training points per IVF centroid, matching FAISS k-means sampling
+IVF_TRAINING_POINTS_PER_LIST = 256
+IVF_MIN_POINTS_PER_LIST = 39
+
+# Training points for scalar quantizer value ranges
+SQ_TRAINING_POINTS = 65536
+
+# Sample size for fitting PCA projections
+PROJECTION_TRAINING_POINTS = 32768
+
+# Vectors added per call while (re)building an index
+ADD_CHUNK_SIZE = 65536
+
+# Metadata filters accepted by search, matched against the vector's document
+FILTER_KEYS = {'document_id', 'document_type', 'created_after', 'created_before'}
+
+# Filter bitmaps kept per tenant until the index next changes
+FILTER_CACHE_SIZE = 64
+
+# Initial number of document rows reserved for centroid sums, doubled as documents are added
+CENTROID_INITIAL_CAPACITY = 64
+
+
+def filter_key(filters: Optional[Dict]) -> Optional[Tuple]:
+    """
+    Normalize search filters into a hashable key.
+    document_id and document_type take a value or a list of values; created_after
+    (inclusive) and created_before (exclusive) take datetimes.
+
+    Args:
+        filters: Optional filter mapping
+
+    Returns:
+        Optional[Tuple]: Sorted (name, value) pairs, or None when nothing is filtered
+
+    Raises:
+        ValueError: If a filter name is unknown
+    """
+    if not filters:
+        return None
+    unknown = set(filters) - FILTER_KEYS
+    if unknown:
+        raise ValueError(f"Unknown search filters: {sorted(unknown)}")
+
+    key = []
+    for name, value in sorted(filters.items()):
+        if value is None:
+            continue
+        if name in ('created_after', 'created_before'):
+            key.append((name, value.timestamp()))
+        else:
+            values = [value] if isinstance(value, str) or not hasattr(value, '__iter__') else value
+            key.append((name, tuple(sorted(str(item) for item in values))))
+    return tuple(key) or None
+
+
+def rank_documents(query_vectors: np.ndarray, document_ids: Sequence[str], sums: np.ndarray,
+                   top_m: int) -> List[List[str]]:
+    """
+    Rank documents by cosine similarity between each query and the document centroid,
+    the mean of the document's normalized chunk vectors. Cosine ranks a centroid and
+    its sum identically, so the sums are used directly.
+
+    Args:
+        query_vectors: Query vector or matrix of shape (n, dimension)
+        document_ids: Document identifiers aligned with the rows of sums
+        sums: Per-document sums of normalized chunk vectors, shape (documents, dimension)
+        top_m: Number of documents to return per query
+
+    Returns:
+        List of document ID lists, one per query, closest first
+    """
+    queries = np.array(query_vectors, dtype=np.float32).reshape(-1, sums.shape[1])
+    top_m = min(top_m, len(document_ids))
+    if top_m <= 0:
+        return [[] for _ in queries]
+
+    faiss.normalize_L2(queries)
+    centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    scores = queries @ centroids.T
+    top = np.argpartition(-scores, top_m - 1, axis=1)[:, :top_m]
+    return [
+        [document_ids[i] for i in row[np.argsort(-scores[query, row], kind='stable')]]
+        for query, row in enumerate(top)
+    ]
+
+
+def group_fetchers(vector_fetcher: Optional[VectorFetchers], rows: int
+                   ) -> List[Tuple[Optional[VectorFetcher], List[int]]]:
+    """
+    Group query rows by the fetcher that supplies their rerank vectors.
+
+    Args:
+        vector_fetcher: None, one fetcher for every query or one optional fetcher per query
+        rows: Number of queries
+
+    Returns:
+        List of (fetcher, row indices) pairs in first-seen order
+
+    Raises:
+        ValueError: If per-query fetchers do not match the number of queries
+    """
+    if vector_fetcher is None or callable(vector_fetcher):
+        return [(vector_fetcher, list(range(rows)))]
+    if len(vector_fetcher) != rows:
+        raise ValueError(f"Expected {rows} vector fetchers, got {len(vector_fetcher)}")
+
+    groups: Dict[Optional[VectorFetcher], List[int]] = {}
+    for row, fetcher in enumerate(vector_fetcher):
+        groups.setdefault(fetcher, []).append(row)
+    return list(groups.items())
+
+
+def unpack_rows(rows: Tuple
+                ) -> Tuple[np.ndarray, List[str], List[str], Optional[List[DocumentInfo]]]:
+    """Split loader output into vectors, chunk IDs, embedding IDs and optional documents."""
+    vectors, chunk_ids, embedding_ids = rows[:3]
+    return vectors, chunk_ids, embedding_ids, rows[3] if len(rows) > 3 else None
+
+
+def resolve_index_params(vector_config: Dict, tenant_id: Optional[str] = None) -> Dict:
+    """
+    Resolve index parameters for a tenant from vector search configuration.
+
+    Args:
+        vector_config: Vector search settings from get_vector_search_settings()
+        tenant_id: Optional tenant whose overrides should be applied
+
+    Returns:
+        Dict: Merged index parameters
+    """
+    params = dict(DEFAULT_INDEX_PARAMS)
+    params['index_type'] = vector_config.get('index_type', params['index_type'])
+    params.update(vector_config.get('index_settings', {}))
+    params.update(vector_config.get('rebuild_thresholds', {}))
+    params.update(vector_config.get('quantization', {}))
+    if 'shards' in vector_config.get('sharding', {}):
+        params['shards'] = vector_config['sharding']['shards']
+    projection = vector_config.get('projection', {})
+    for key, param in (('method', 'projection'), ('dimension', 'projection_dim'),
+                       ('min_vectors', 'projection_min_vectors')):
+        if key in projection:
+            params[param] = projection[key]
+    if tenant_id is not None:
+        params.update(vector_config.get('tenant_overrides', {}).get(str(tenant_id), {}))
+
+    validate_index_params(params)
+    return params
+
+
+def validate_index_params(params: Dict) -> None:
+    """
+    Validate index parameter names and index type.
+
+    Raises:
+        ValueError: If a parameter or index type is unknown
+    """
+    unknown = set(params) - set(DEFAULT_INDEX_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown index parameters: {sorted(unknown)}")
+    if 'index_type' in params:
+        IndexType(params['index_type'])
+    if 'shards' in params and params['shards'] < 1:
+        raise ValueError(f"Shard count must be at least 1, got {params['shards']}")
+    if 'projection' in params:
+        ProjectionType(params['projection'])
+    if params.get('index_type') == IndexType.IVF_PQ.value and \
+            params.get('projection', ProjectionType.NONE.value) != ProjectionType.NONE.value and \
+            'projection_dim' in params and 'pq_m' in params and \
+            params['projection_dim'] % params['pq_m']:
+        raise ValueError(
+            f"pq_m ({params['pq_m']}) must divide projection_dim ({params['projection_dim']})"
+        )
+
+
+class TenantIndex:
+    """
+    In-memory inner-product index for a single tenant.
+    Vector IDs are dense positions in the index and map back to chunk and embedding IDs.
+    Removed vectors are tombstoned and excluded at search time until the index is compacted.
+    """
+
+    def __init__(self, tenant_id: str, dimension: int, params: Optional[Dict] = None):
+        """
+        Initialize an empty tenant index.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            dimension: Vector dimension
+            params: Optional index parameters, see DEFAULT_INDEX_PARAMS
+        """
+        self.tenant_id = tenant_id
+        self.dimension = dimension
+        self.params = {**DEFAULT_INDEX_PARAMS, **(params or {})}
+
+        # Tenants start on exact search and are promoted as they grow
+        self.index_type = IndexType.FLAT.value
+        self._trained_size = 0
+        self._index = faiss.IndexFlatIP(dimension)
+        # Optional map to the smaller space the FAISS index holds vectors in
+        self._projection: Optional[VectorProjection] = None
+        self._chunk_ids: List[str] = []
+        self._embedding_keys: List[str] = []
+        self._embedding_ids: Dict[str, int] = {}
+
+        # Tombstoned vector IDs and the cached bitmap of live IDs passed to FAISS
+        self._deleted: Set[int] = set()
+        self._live_bitmap: Optional[np.ndarray] = None
+        self._live_selector: Optional[faiss.IDSelector] = None
+
+        # Metadata filter columns: a document code per vector ID (-1 when unknown)
+        # indexing per-document ID, type and creation time tables
+        self._doc_codes = np.empty(0, dtype=np.int32)
+        self._doc_keys: List[str] = []
+        self._doc_lookup: Dict[str, int] = {}
+        self._doc_types: List[str] = []
+        self._doc_created: List[float] = []
+        self._filter_cache: 'OrderedDict[Tuple, Tuple[np.ndarray, faiss.IDSelector, int]]' = \
+            OrderedDict()
+        self._chunk_labels: Optional[Dict[str, int]] = None
+        # Live vector IDs sorted by document code and each code's start offset, so the
+        # vectors of a few documents are gathered without a pass over the whole tenant
+        self._doc_positions: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        # Per-document sums of normalized full-dimension vectors and live vector counts by
+        # document code, for ranking documents by centroid before searching their chunks
+        self._doc_sums = np.zeros((0, dimension), dtype=np.float32)
+        self._doc_counts = np.zeros(0, dtype=np.int64)
+
+        # Snapshot bookkeeping: where the index came from and what it already covers
+        self.source = 'memory'
+        self.mmap = False
+        self.watermark: Optional[datetime] = None
+        self._snapshot_path: Optional[str] = None
+
+        # FAISS indices are not safe for concurrent mutation and search. Writers serialize on
+        # the write lock and hold the search lock only to mutate in place or publish a rebuilt
+        # index, so rebuilds and snapshot writes never hold up searches
+        self._lock = threading.RLock()
+        self._write_lock = threading.RLock()
+
+    @property
+    def ntotal(self) -> int:
+        """Number of vectors held by the index, including tombstoned ones."""
+        return self._index.ntotal
+
+    @property
+    def live_count(self) -> int:
+        """Number of vectors that can be returned by a search."""
+        return self._index.ntotal - len(self._deleted)
+
+    @property
+    def deleted_fraction(self) -> float:
+        """Fraction of stored vectors that are tombstoned."""
+        return len(self._deleted) / self._index.ntotal if self._index.ntotal else 0.0
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether enough vectors are tombstoned to be worth compacting."""
+        return bool(self._deleted) and \
+            self.deleted_fraction >= self.params['compact_deleted_fraction']
+
+    @property
+    def quantized(self) -> bool:
+        """Whether the index stores lossy vector codes."""
+        return self.index_type in QUANTIZED_INDEX_TYPES
+
+    @property
+    def projected(self) -> bool:
+        """Whether the index holds reduced-dimension projections of the vectors."""
+        return self._projection is not None
+
+    @property
+    def reranks(self) -> bool:
+        """Whether searches rerank candidates against full-precision vectors when possible."""
+        return (self.quantized or self.projected) and self.params['rerank']
+
+    @property
+    def shard_count(self) -> int:
+        """Number of shards the tenant's vectors are split across."""
+        return 1
+
+    @property
+    def document_count(self) -> int:
+        """Number of documents with live vectors."""
+        return int(np.count_nonzero(self._doc_counts > 0))
+
+    @property
+    def resident_bytes(self) -> int:
+        """Approximate private memory held by the index; a memory-mapped snapshot holds none."""
+        return 0 if self.mmap else self._bytes_per_vector() * self._index.ntotal
+
+    def add(self, vectors: np.ndarray, chunk_ids: Sequence[str],
+            embedding_ids: Sequence[str], loader: Optional[TenantLoader] = None,
+            documents: Optional[Sequence[DocumentInfo]] = None) -> int:
+        """
+        Normalize and add vectors, skipping embeddings that are already indexed.
+
+        Args:
+            vectors: Matrix of shape (n, dimension)
+            chunk_ids: Chunk ID for each row
+            embedding_ids: Embedding ID for each row
+            loader: Optional source of full-precision vectors for retraining quantized indices
+            documents: Optional (document_id, document_type, created_at) for each row,
+                rows without one never match a metadata filter
+
+        Returns:
+            int: Number of vectors actually added
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if not (len(vectors) == len(chunk_ids) == len(embedding_ids)):
+            raise ValueError("Vectors, chunk IDs and embedding IDs must have the same length")
+
+        with self._write_lock:
+            keep = [i for i, emb_id in enumerate(embedding_ids)
+                    if str(emb_id) not in self._embedding_ids]
+            if not keep:
+                return 0
+
+            batch = vectors[keep].copy()
+            faiss.normalize_L2(batch)
+
+            start = self._index.ntotal
+            target_type = self._target_index_type(len(batch))
+            if start == 0 and (target_type != self.index_type
+                               or self._target_projection(len(batch))):
+                # Initial load builds the target type directly instead of promoting later
+                index, projection = self._build_index(target_type, batch)
+                with self._lock:
+                    self._index, self._projection = index, projection
+                    self.index_type = target_type
+                    self._trained_size = len(batch)
+                    self.mmap = False
+                    self._append_ids(keep, chunk_ids, embedding_ids, documents, start, batch)
+            else:
+                self._ensure_writable()
+                with self._lock:
+                    self._index.add(self._project(batch))
+                    self._append_ids(keep, chunk_ids, embedding_ids, documents, start, batch)
+
+            if self._needs_rebuild():
+                self.rebuild(loader)
+
+            return len(keep)
+
+    def train(self, sample: np.ndarray, ntotal: int) -> None:
+        """
+        Replace an empty index with one of the type appropriate for ntotal vectors,
+        trained on a sample, ready for append(). Used by offline bulk builds that
+        stream vectors instead of holding the whole tenant in memory.
+
+        Args:
+            sample: Training vectors, at least training_size(ntotal) rows when available
+            ntotal: Number of vectors the index will hold once loaded
+
+        Raises:
+            ValueError: If the index already holds vectors
+        """
+        with self._write_lock, self._lock:
+            if self._index.ntotal:
+                raise ValueError("Only an empty index can be trained for a bulk load")
+
+            index_type = self._target_index_type(ntotal)
+            training = np.array(sample, dtype=np.float32).reshape(-1, self.dimension)
+            faiss.normalize_L2(training)
+            projection = self._fit_projection(training, ntotal)
+            if projection is not None:
+                training = projection.apply(training)
+            self._index = self._create_index(index_type, training, ntotal,
+                                             projection.dimension if projection else self.dimension)
+            self._projection = projection
+            self._apply_search_params(self._index)
+            self.index_type = index_type
+            self._trained_size = ntotal
+            self.mmap = False
+
+    def training_size(self, ntotal: int) -> int:
+        """Number of training vectors the index type for ntotal vectors uses, 0 if untrained."""
+        return min(ntotal, self._training_size(self._target_index_type(ntotal), ntotal))
+
+    def append(self, vectors: np.ndarray, chunk_ids: Sequence[str], embedding_ids: Sequence[str],
+               documents: Optional[Sequence[DocumentInfo]] = None) -> int:
+        """
+        Add vectors to a trained index without deduplication or size-threshold rebuilds.
+        Intended for bulk loads after train(), where the caller guarantees unique IDs.
+
+        Args:
+            vectors: Matrix of shape (n, dimension)
+            chunk_ids: Chunk ID for each row
+            embedding_ids: Embedding ID for each row
+            documents: Optional (document_id, document_type, created_at) for each row
+
+        Returns:
+            int: Number of vectors added
+        """
+        batch = np.array(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if not (len(batch) == len(chunk_ids) == len(embedding_ids)):
+            raise ValueError("Vectors, chunk IDs and embedding IDs must have the same length")
+        faiss.normalize_L2(batch)
+
+        with self._write_lock:
+            self._ensure_writable()
+            with self._lock:
+                start = self._index.ntotal
+                for offset in range(0, len(batch), ADD_CHUNK_SIZE):
+                    self._index.add(self._project(batch[offset:offset + ADD_CHUNK_SIZE]))
+                self._append_ids(range(len(batch)), chunk_ids, embedding_ids, documents, start,
+                                 batch)
+            return len(batch)
+
+    def upsert(self, vectors: np.ndarray, chunk_ids: Sequence[str],
+               embedding_ids: Sequence[str], loader: Optional[TenantLoader] = None,
+               documents: Optional[Sequence[DocumentInfo]] = None) -> int:
+        """
+        Add vectors, replacing any that are already indexed under the same embedding ID.
+
+        Args:
+            vectors: Matrix of shape (n, dimension)
+            chunk_ids: Chunk ID for each row
+            embedding_ids: Embedding ID for each row
+            loader: Optional source of full-precision vectors for retraining quantized indices
+            documents: Optional (document_id, document_type, created_at) for each row
+
+        Returns:
+            int: Number of vectors written
+        """
+        with self._write_lock:
+            self.remove(embedding_ids)
+            return self.add(vectors, chunk_ids, embedding_ids, loader, documents)
+
+    def remove(self, embedding_ids: Sequence[str]) -> int:
+        """
+        Tombstone vectors by embedding ID. Their storage is reclaimed by compact().
+
+        Args:
+            embedding_ids: Embedding identifiers to remove, unknown IDs are ignored
+
+        Returns:
+            int: Number of vectors removed
+        """
+        with self._write_lock, self._lock:
+            labels = [self._embedding_ids.pop(str(emb_id)) for emb_id in embedding_ids
+                      if str(emb_id) in self._embedding_ids]
+            if labels:
+                self._deleted.update(labels)
+                self._invalidate_selectors()
+                codes = self._doc_codes[labels]
+                if self.projected:
+                    # Projected indices cannot give back full-dimension vectors; their contribution
+                    # stays in the centroid until the document empties or the index is rebuilt
+                    self._update_centroids(codes, None, -1)
+                elif self.quantized:
+                    # Vectors were added at full precision, so subtracting their lossy
+                    # reconstructions would drift the sums; re-sum the affected documents instead
+                    self._update_centroids(codes, None, -1)
+                    self._resum_centroids(codes)
+                else:
+                    self._update_centroids(
+                        codes, self._index.reconstruct_batch(np.array(labels, dtype=np.int64)), -1
+                    )
+            return len(labels)
+
+    def search(self, query_vectors: np.ndarray, top_k: int,
+               vector_fetcher: Optional[VectorFetchers] = None,
+               filters: Optional[Dict] = None,
+               documents: Optional[DocumentRestrictions] = None
+               ) -> List[List[Tuple[str, float]]]:
+        """
+        Search the index for one or more query vectors.
+        Quantized indices over-fetch candidates and rerank them against full-precision
+        vectors when a fetcher is supplied and reranking is enabled. Metadata filters
+        are applied inside FAISS through an ID selector bitmap.
+
+        Args:
+            query_vectors: Query vector or matrix of shape (n, dimension)
+            top_k: Number of neighbours per query
+            vector_fetcher: Optional source of float32 vectors by embedding ID,
+                or one optional source per query
+            filters: Optional metadata filters, see filter_key()
+            documents: Optional document IDs per query to search within, on top of the
+                filters. Resolved per query and never cached, unlike filters
+
+        Returns:
+            List of (chunk_id, score) lists, one per query, best match first
+        """
+        queries = np.array(query_vectors, dtype=np.float32).reshape(-1, self.dimension)
+        faiss.normalize_L2(queries)
+        key = filter_key(filters)
+        fetchers = group_fetchers(vector_fetcher, len(queries))
+
+        with self._lock:
+            rerank = self.reranks and any(fetcher is not None for fetcher, _ in fetchers)
+            k = top_k * self.params['rerank_factor'] if rerank else top_k
+            scores, labels = self._search_labels(queries, k, key, documents)
+
+            if rerank and labels.size:
+                scores, labels = self._rerank(queries, scores, labels, top_k, fetchers)
+
+            return [
+                [(self._chunk_ids[label], float(score))
+                 for score, label in zip(row_scores, row_labels) if label >= 0]
+                for row_scores, row_labels in zip(scores, labels)
+            ]
+
+    def candidates(self, queries: np.ndarray, k: int, filters: Optional[Dict] = None,
+                   documents: Optional[DocumentRestrictions] = None
+                   ) -> List[List[Tuple[str, str, float]]]:
+        """
+        Return index-scored candidates without reranking, for callers that merge and
+        rerank results from several indices at once.
+
+        Args:
+            queries: Normalized query matrix of shape (n, dimension)
+            k: Number of candidates per query
+            filters: Optional metadata filters, see filter_key()
+            documents: Optional document IDs per query to search within, see search()
+
+        Returns:
+            List of (chunk_id, embedding_id, score) lists, one per query, best first
+        """
+        with self._lock:
+            scores, labels = self._search_labels(queries, k, filter_key(filters), documents)
+            return [
+                [(self._chunk_ids[label], self._embedding_keys[label], float(score))
+                 for score, label in zip(row_scores, row_labels) if label >= 0]
+                for row_scores, row_labels in zip(scores, labels)
+            ]
+
+    def document_centroids(self, filters: Optional[Dict] = None
+                           ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Return the centroid sums of documents with live vectors that match metadata filters.
+
+        Args:
+            filters: Optional metadata filters, see filter_key()
+
+        Returns:
+            Tuple of (document IDs, sums of shape (documents, dimension), live vector counts)
+        """
+        key = filter_key(filters)
+        with self._lock:
+            count = len(self._doc_keys)
+            matched = self._doc_counts[:count] > 0
+            if key:
+                matched &= self._document_mask(dict(key))
+            codes = np.flatnonzero(matched)
+            return ([self._doc_keys[code] for code in codes], self._doc_sums[codes],
+                    self._doc_counts[codes])
+
+    def top_documents(self, query_vectors: np.ndarray, top_m: int,
+                      filters: Optional[Dict] = None) -> List[List[str]]:
+        """
+        Select the documents whose centroids are closest to each query, the first level
+        of hierarchical retrieval. Vectors without a document are never selected.
+
+        Args:
+            query_vectors: Query vector or matrix of shape (n, dimension)
+            top_m: Number of documents per query
+            filters: Optional metadata filters the documents must match
+
+        Returns:
+            List of document ID lists, one per query, closest first
+        """
+        document_ids, sums, _ = self.document_centroids(filters)
+        return rank_documents(query_vectors, document_ids, sums, top_m)
+
+    def __contains__(self, embedding_id: str) -> bool:
+        """Check whether an embedding is already indexed."""
+        return str(embedding_id) in self._embedding_ids
+
+    def embedding_ids(self) -> List[str]:
+        """Return the IDs of every live (not tombstoned) embedding in the index."""
+        with self._lock:
+            return list(self._embedding_ids)
+
+    def document_ids(self) -> List[str]:
+        """Return the IDs of every document with live vectors in the index."""
+        with self._lock:
+            codes = np.flatnonzero(self._doc_counts[:len(self._doc_keys)] > 0)
+            return [self._doc_keys[code] for code in codes]
+
+    def chunk_ids_for(self, embedding_ids: Sequence[str]) -> List[str]:
+        """
+        Map indexed embedding IDs to their chunk IDs.
+
+        Args:
+            embedding_ids: Embedding identifiers, unknown IDs are skipped
+
+        Returns:
+            List of chunk identifiers
+        """
+        with self._lock:
+            return [self._chunk_ids[self._embedding_ids[str(emb_id)]]
+                    for emb_id in embedding_ids if str(emb_id) in self._embedding_ids]
+
+    def filter_chunk_ids(self, chunk_ids: Sequence[str], filters: Optional[Dict]) -> List[str]:
+        """
+        Keep the chunk IDs whose vectors match metadata filters, e.g. to filter
+        candidates that came from another retriever.
+
+        Args:
+            chunk_ids: Chunk identifiers
+            filters: Optional metadata filters, see filter_key()
+
+        Returns:
+            List of matching chunk identifiers in their original order
+        """
+        key = filter_key(filters)
+        if key is None:
+            return list(chunk_ids)
+
+        with self._lock:
+            bitmap = self._filter_selector(key)[0]
+            if self._chunk_labels is None:
+                self._chunk_labels = {self._chunk_ids[label]: label
+                                      for label in self._embedding_ids.values()}
+            matched = []
+            for chunk_id in chunk_ids:
+                label = self._chunk_labels.get(str(chunk_id))
+                if label is not None and bitmap[label >> 3] >> (label & 7) & 1:
+                    matched.append(chunk_id)
+            return matched
+
+    def configure(self, **overrides) -> None:
+        """
+        Update index parameters, rebuilding only when the index structure changes.
+
+        Args:
+            **overrides: Index parameters to update, see DEFAULT_INDEX_PARAMS
+        """
+        validate_index_params(overrides)
+
+        with self._write_lock:
+            structural = any(
+                key in STRUCTURAL_PARAMS and self.params.get(key) != value
+                for key, value in overrides.items()
+            )
+            with self._lock:
+                self.params.update(overrides)
+
+            if structural or self._needs_rebuild():
+                self.rebuild()
+            else:
+                with self._lock:
+                    self._apply_search_params(self._index)
+
+    def apply_params(self, params: Dict) -> None:
+        """
+        Adopt resolved parameters for a loaded index without rebuilding it,
+        applying query-time knobs immediately.
+
+        Args:
+            params: Index parameters, see DEFAULT_INDEX_PARAMS
+        """
+        with self._write_lock, self._lock:
+            self.params.update(params)
+            self._apply_search_params(self._index)
+
+    def rebuild(self, loader: Optional[TenantLoader] = None) -> None:
+        """
+        Rebuild the index as the type appropriate for its current size,
+        retraining IVF centroids and quantizers from the vectors it holds.
+        The replacement is built off to the side while searches keep using the current
+        index, then published with a reference swap; writers wait for the rebuild.
+
+        Args:
+            loader: Optional source of full-precision vectors, used when the current index
+                is quantized or projected so retraining does not compound approximation error
+        """
+        with self._write_lock:
+            build_start = time.perf_counter()
+            ntotal = self.live_count
+            index_type = self._target_index_type(ntotal)
+            vectors, projection = self._source_vectors(loader) if ntotal else (None, None)
+            live = self._live_labels() if self._deleted else None
+            if live is not None:
+                vectors = vectors[live] if ntotal else None
+
+            # Full-dimension source vectors also refresh the document centroids, dropping
+            # any drift left by removals from quantized or projected indices
+            centroids = None
+            if vectors is not None and projection is None:
+                codes = self._doc_codes[live] if live is not None else self._doc_codes
+                centroids = self._centroid_sums(codes, vectors)
+
+            index, projection = self._build_index(index_type, vectors, projection)
+            INDEX_REBUILD_DURATION.labels(operation='rebuild').observe(
+                time.perf_counter() - build_start
+            )
+            self._publish('rebuild', index, projection, live, index_type, ntotal, centroids)
+
+            logger.info(
+                "Tenant index rebuilt",
+                extra={'tenant_id': self.tenant_id, 'index_type': index_type,
+                       'vector_count': ntotal,
+                       'projection': self._projection.method if self._projection else None}
+            )
+
+    def compact(self) -> int:
+        """
+        Physically drop tombstoned vectors and renumber the remaining ones.
+        Trained quantizers and IVF centroids are reused unless the index also
+        crossed a size threshold, in which case it is rebuilt instead.
+
+        Returns:
+            int: Number of vectors reclaimed
+        """
+        with self._write_lock:
+            reclaimed = len(self._deleted)
+            if not reclaimed:
+                return 0
+            if self._needs_rebuild():
+                self.rebuild()
+                return reclaimed
+
+            build_start = time.perf_counter()
+            source = self._private_index() if self.mmap else self._index
+            live = self._live_labels()
+            vectors = source.reconstruct_n(0, source.ntotal)[live]
+
+            index = faiss.clone_index(source)
+            index.reset()
+            for start in range(0, len(vectors), ADD_CHUNK_SIZE):
+                index.add(vectors[start:start + ADD_CHUNK_SIZE])
+            self._apply_search_params(index)
+            INDEX_REBUILD_DURATION.labels(operation='compact').observe(
+                time.perf_counter() - build_start
+            )
+            self._publish('compact', index, self._projection, live, self.index_type,
+                          self._trained_size)
+
+            logger.info(
+                "Tenant index compacted",
+                extra={'tenant_id': self.tenant_id, 'index_type': self.index_type,
+                       'vector_count': self._index.ntotal, 'reclaimed': reclaimed}
+            )
+            return reclaimed
+
+    def describe(self) -> Dict:
+        """Return index type, size and active tuning parameters."""
+        with self._lock:
+            description = {
+                'tenant_id': self.tenant_id,
+                'index_type': self.index_type,
+                'target_index_type': self.params['index_type'],
+                'vector_count': self.live_count,
+                'deleted_count': len(self._deleted),
+                'document_count': self.document_count,
+                'bytes_per_vector': self._bytes_per_vector(),
+                'memory_bytes': self._bytes_per_vector() * self._index.ntotal,
+                'resident_bytes': self.resident_bytes,
+                'source': self.source,
+                'mmap': self.mmap,
+                'watermark': self.watermark.isoformat() if self.watermark else None
+            }
+            if self._projection is not None:
+                description.update({'projection': self._projection.method,
+                                    'projection_dim': self._projection.dimension})
+            if self.index_type in IVF_INDEX_TYPES:
+                description.update({'nlist': self._index.nlist, 'nprobe': self._index.nprobe})
+            elif self.index_type == IndexType.HNSW.value:
+                description.update({'hnsw_m': self.params['hnsw_m'],
+                                    'ef_search': self._index.hnsw.efSearch})
+            return description
+
+    def save(self, directory: str, embedding_version: str) -> None:
+        """
+        Write the index, ID mappings and manifest into a new snapshot directory.
+
+        Args:
+            directory: Empty directory to write the snapshot into
+            embedding_version: Embedding model version the vectors were produced with
+        """
+        # Searches only read, so excluding writers is enough for a consistent snapshot
+        with self._write_lock:
+            faiss.write_index(self._index, os.path.join(directory, SNAPSHOT_INDEX_FILE))
+            np.save(os.path.join(directory, SNAPSHOT_CHUNK_IDS_FILE), np.array(self._chunk_ids))
+            np.save(os.path.join(directory, SNAPSHOT_EMBEDDING_IDS_FILE),
+                    np.array(self._embedding_keys))
+            np.save(os.path.join(directory, SNAPSHOT_DELETED_FILE),
+                    np.array(sorted(self._deleted), dtype=np.int64))
+            np.save(os.path.join(directory, SNAPSHOT_DOCUMENT_CODES_FILE), self._doc_codes)
+            np.savez(os.path.join(directory, SNAPSHOT_DOCUMENTS_FILE),
+                     keys=np.array(self._doc_keys, dtype=str),
+                     types=np.array(self._doc_types, dtype=str),
+                     created=np.array(self._doc_created, dtype=np.float64),
+                     centroid_sums=self._doc_sums[:len(self._doc_keys)],
+                     centroid_counts=self._doc_counts[:len(self._doc_keys)])
+            if self._projection is not None:
+                self._projection.save(os.path.join(directory, SNAPSHOT_PROJECTION_FILE))
+            manifest = {
+                'tenant_id': self.tenant_id,
+                'embedding_version': embedding_version,
+                'dimension': self.dimension,
+                'index_type': self.index_type,
+                'projection': self._projection.method if self._projection else None,
+                'params': self.params,
+                'vector_count': self._index.ntotal,
+                'trained_size': self._trained_size,
+                'watermark': self.watermark.isoformat() if self.watermark else None,
+                'created_at': datetime.utcnow().isoformat()
+            }
+
+        write_manifest(directory, manifest)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'TenantIndex':
+        """
+        Load a snapshot written by save().
+        With mmap the vector data stays in the OS page cache shared by every process
+        and is only copied into private memory on the first mutation.
+
+        Args:
+            directory: Snapshot directory
+            mmap: Memory-map the index file instead of reading it into memory
+
+        Returns:
+            TenantIndex: Loaded tenant index
+
+        Raises:
+            ValueError: If the snapshot is incomplete or has an unknown format
+        """
+        manifest = read_manifest(directory)
+        index = cls(manifest['tenant_id'], manifest['dimension'], manifest['params'])
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        index._index = faiss.read_index(os.path.join(directory, SNAPSHOT_INDEX_FILE), flags)
+        index._chunk_ids = np.load(os.path.join(directory, SNAPSHOT_CHUNK_IDS_FILE)).tolist()
+        index._embedding_keys = np.load(
+            os.path.join(directory, SNAPSHOT_EMBEDDING_IDS_FILE)
+        ).tolist()
+        index._deleted = set(np.load(os.path.join(directory, SNAPSHOT_DELETED_FILE)).tolist())
+        index._embedding_ids = {emb_id: label for label, emb_id in enumerate(index._embedding_keys)
+                                if label not in index._deleted}
+        index._doc_codes = np.load(os.path.join(directory, SNAPSHOT_DOCUMENT_CODES_FILE))
+        with np.load(os.path.join(directory, SNAPSHOT_DOCUMENTS_FILE)) as documents:
+            index._doc_keys = documents['keys'].tolist()
+            index._doc_types = documents['types'].tolist()
+            index._doc_created = documents['created'].tolist()
+            index._doc_sums = documents['centroid_sums']
+            index._doc_counts = documents['centroid_counts']
+        index._doc_lookup = {doc_id: code for code, doc_id in enumerate(index._doc_keys)}
+        if manifest.get('projection'):
+            index._projection = VectorProjection.load(
+                os.path.join(directory, SNAPSHOT_PROJECTION_FILE))
+        if not (index._index.ntotal == len(index._chunk_ids) == len(index._embedding_keys)
+                == len(index._doc_codes)):
+            raise ValueError(f"Snapshot in {directory} has inconsistent vector and ID counts")
+
+        index.index_type = manifest['index_type']
+        index._trained_size = manifest['trained_size']
+        index._apply_search_params(index._index)
+        index.source = 'snapshot'
+        index.mmap = mmap
+        index._snapshot_path = os.path.join(directory, SNAPSHOT_INDEX_FILE)
+        if manifest.get('watermark'):
+            index.watermark = datetime.fromisoformat(manifest['watermark'])
+        return index
+
+    def _ensure_writable(self) -> None:
+        """Copy a memory-mapped index into private memory before mutating it."""
+        if not self.mmap:
+            return
+        index = self._private_index()
+        with self._lock:
+            self._index = index
+            self.mmap = False
+
+    def _private_index(self) -> faiss.Index:
+        """Return a private in-memory copy of a memory-mapped index."""
+        if isinstance(self._index, faiss.IndexIVF):
+            # Mapped IVF lists are on-disk inverted lists, which FAISS cannot clone
+            index = faiss.read_index(self._snapshot_path)
+        else:
+            index = faiss.clone_index(self._index)
+        self._apply_search_params(index)
+        return index
+
+    def _target_index_type(self, ntotal: int) -> str:
+        """Return the index type to use at a given tenant size."""
+        target = self.params['index_type']
+        if ntotal == 0:
+            return IndexType.FLAT.value
+        min_vectors_param = MIN_VECTORS_PARAM.get(target)
+        if min_vectors_param and ntotal < self.params[min_vectors_param]:
+            return IndexType.FLAT.value
+        return target
+
+    def _target_projection(self, ntotal: int) -> Optional[str]:
+        """Return the projection method to use at a given tenant size, None for full dimension."""
+        method = self.params['projection']
+        if method == ProjectionType.NONE.value or \
+                ntotal < max(1, self.params['projection_min_vectors']):
+            return None
+        return method
+
+    def _needs_rebuild(self) -> bool:
+        """Check whether the tenant crossed a size threshold since the last build."""
+        ntotal = self.live_count
+        if self._target_index_type(ntotal) != self.index_type:
+            return True
+        if self._projection is None and self._target_projection(ntotal):
+            return True
+        if self.index_type in IVF_INDEX_TYPES:
+            return ntotal > self._trained_size * self.params['ivf_retrain_growth']
+        return False
+
+    def _nlist(self, ntotal: int) -> int:
+        """Number of IVF lists, bounded so every list gets enough training points."""
+        nlist = self.params['nlist'] or int(4 * math.sqrt(ntotal))
+        return max(1, min(nlist, ntotal // IVF_MIN_POINTS_PER_LIST))
+
+    def _build_index(self, index_type: str, vectors: Optional[np.ndarray],
+                     projection: Optional[VectorProjection] = None
+                     ) -> Tuple[faiss.Index, Optional[VectorProjection]]:
+        """
+        Create, train and fill a FAISS index of the requested type, fitting the
+        configured projection first unless the vectors are already projected.
+
+        Args:
+            index_type: IndexType value
+            vectors: Normalized vectors to add, in vector ID order
+            projection: Projection the vectors are already expressed in, if any
+
+        Returns:
+            Tuple of (populated index, projection its vectors are expressed in)
+        """
+        ntotal = 0 if vectors is None else len(vectors)
+        if projection is None and ntotal:
+            projection = self._fit_projection(vectors, ntotal)
+            if projection is not None:
+                vectors = projection.apply(vectors)
+        index = self._create_index(index_type, vectors, ntotal,
+                                   projection.dimension if projection else self.dimension)
+
+        for start in range(0, ntotal, ADD_CHUNK_SIZE):
+            index.add(vectors[start:start + ADD_CHUNK_SIZE])
+
+        self._apply_search_params(index)
+        return index, projection
+
+    def _fit_projection(self, vectors: np.ndarray, ntotal: int) -> Optional[VectorProjection]:
+        """Fit the projection configured for ntotal vectors on a sample, None for full dimension."""
+        method = self._target_projection(ntotal)
+        if method is None:
+            return None
+        projection = VectorProjection.fit(
+            method, self._training_sample(vectors, PROJECTION_TRAINING_POINTS),
+            self.params['projection_dim']
+        )
+        logger.info(
+            "Tenant index projection fitted",
+            extra={'tenant_id': self.tenant_id, 'projection': method,
+                   'projection_dim': projection.dimension,
+                   'explained_variance': projection.explained_variance}
+        )
+        return projection
+
+    def _create_index(self, index_type: str, training: Optional[np.ndarray],
+                      ntotal: int, dimension: Optional[int] = None) -> faiss.Index:
+        """
+        Create an empty FAISS index of the requested type sized for ntotal vectors,
+        training IVF centroids and quantizers on the given normalized vectors.
+        """
+        sample_size = self._training_size(index_type, ntotal)
+        dimension = dimension or self.dimension
+
+        if index_type in IVF_INDEX_TYPES:
+            nlist = self._nlist(ntotal)
+            quantizer = faiss.IndexFlatIP(dimension)
+            if index_type == IndexType.IVF_PQ.value:
+                index = faiss.IndexIVFPQ(quantizer, dimension, nlist, self.params['pq_m'],
+                                         self.params['pq_nbits'], faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, dimension, nlist,
+                                           faiss.METRIC_INNER_PRODUCT)
+            index.train(self._training_sample(training, sample_size))
+            # Keep vector ID -> list lookups so the index can be reconstructed on retrain
+            index.make_direct_map()
+        elif index_type == IndexType.HNSW.value:
+            index = faiss.IndexHNSWFlat(dimension, self.params['hnsw_m'],
+                                        faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.params['ef_construction']
+        elif index_type == IndexType.SQ8.value:
+            index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit,
+                                               faiss.METRIC_INNER_PRODUCT)
+            index.train(self._training_sample(training, sample_size))
+        else:
+            index = faiss.IndexFlatIP(dimension)
+
+        return index
+
+    def _training_size(self, index_type: str, ntotal: int) -> int:
+        """Number of training vectors used for an index type at a given tenant size."""
+        sample_size = 0
+        if index_type in IVF_INDEX_TYPES:
+            sample_size = self._nlist(ntotal) * IVF_TRAINING_POINTS_PER_LIST
+            if index_type == IndexType.IVF_PQ.value:
+                sample_size = max(sample_size,
+                                  2 ** self.params['pq_nbits'] * IVF_TRAINING_POINTS_PER_LIST)
+        elif index_type == IndexType.SQ8.value:
+            sample_size = SQ_TRAINING_POINTS
+        if self._target_projection(ntotal) == ProjectionType.PCA.value:
+            sample_size = max(sample_size, PROJECTION_TRAINING_POINTS)
+        return sample_size
+
+    def _training_sample(self, vectors: np.ndarray, sample_size: int) -> np.ndarray:
+        """Return a deterministic random sample of at most sample_size vectors."""
+        if len(vectors) <= sample_size:
+            return vectors
+        sample = np.random.default_rng(0).choice(len(vectors), size=sample_size, replace=False)
+        return vectors[np.sort(sample)]
+
+    def _source_vectors(self, loader: Optional[TenantLoader]
+                        ) -> Tuple[np.ndarray, Optional[VectorProjection]]:
+        """
+        Return normalized vectors for every vector ID, preferring full-precision,
+        full-dimension values from the loader when the current index is quantized or
+        projected, together with the projection the returned vectors are expressed in.
+        """
+        vectors = self._index.reconstruct_n(0, self._index.ntotal)
+        if not (self.quantized or self.projected) or loader is None:
+            return vectors, self._projection
+
+        loaded, _, loaded_ids, _ = unpack_rows(loader())
+        rows = [(self._embedding_ids[str(emb_id)], i) for i, emb_id in enumerate(loaded_ids)
+                if str(emb_id) in self._embedding_ids]
+        if self.projected:
+            if len(rows) < self.live_count:
+                # Vectors missing from the loader only exist in the projected space
+                return vectors, self._projection
+            vectors = np.zeros((self._index.ntotal, self.dimension), dtype=np.float32)
+        if rows:
+            labels, positions = (list(column) for column in zip(*rows))
+            exact = np.ascontiguousarray(loaded[positions], dtype=np.float32)
+            faiss.normalize_L2(exact)
+            vectors[labels] = exact
+        return vectors, None
+
+    def _search_labels(self, queries: np.ndarray, k: int, key: Optional[Tuple],
+                       documents: Optional[DocumentRestrictions] = None
+                       ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run the FAISS search, returning empty (n, 0) arrays when nothing can match.
+        Unrestricted queries share one search; each document-restricted query searches
+        through a selector over just its documents' vector IDs.
+        """
+        if documents is None or all(document_ids is None for document_ids in documents):
+            available = self._filter_selector(key)[2] if key else self.live_count
+            if available == 0:
+                return (np.empty((len(queries), 0), dtype=np.float32),
+                        np.empty((len(queries), 0), dtype=np.int64))
+            return self._index.search(self._project(queries), min(k, available),
+                                      params=self._search_parameters(key))
+
+        if len(documents) != len(queries):
+            raise ValueError(f"Expected {len(queries)} document restrictions, got {len(documents)}")
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+
+        unrestricted = [row for row, document_ids in enumerate(documents) if document_ids is None]
+        if unrestricted:
+            row_scores, row_labels = self._search_labels(queries[unrestricted], k, key)
+            scores[unrestricted, :row_labels.shape[1]] = row_scores
+            labels[unrestricted, :row_labels.shape[1]] = row_labels
+
+        for row, document_ids in enumerate(documents):
+            if document_ids is None:
+                continue
+            allowed = self._document_labels(document_ids, key)
+            if not len(allowed):
+                continue
+            # IDSelectorBatch hashes just these IDs; the search parameters only keep a raw
+            # pointer to it, so the local reference keeps it alive for the call
+            selector = faiss.IDSelectorBatch(allowed)
+            row_scores, row_labels = self._index.search(
+                self._project(queries[row:row + 1]), min(k, len(allowed)),
+                params=self._selector_parameters(selector)
+            )
+            scores[row, :row_labels.shape[1]] = row_scores[0]
+            labels[row, :row_labels.shape[1]] = row_labels[0]
+        return scores, labels
+
+    def _rerank(self, queries: np.ndarray, scores: np.ndarray, labels: np.ndarray, top_k: int,
+                fetchers: List[Tuple[Optional[VectorFetcher], List[int]]]
+                ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rescore quantized candidates with exact inner products on float32 vectors,
+        fetching each group of queries' candidates through that group's own fetcher.
+        Queries without a fetcher keep their index-scored order.
+
+        Returns:
+            Tuple of (scores, labels) arrays of shape (n_queries, top_k)
+        """
+        out_scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        out_labels = np.full((len(queries), top_k), -1, dtype=np.int64)
+        width = min(top_k, labels.shape[1])
+
+        for vector_fetcher, rows in fetchers:
+            if vector_fetcher is None:
+                out_scores[rows, :width] = scores[rows, :width]
+                out_labels[rows, :width] = labels[rows, :width]
+                continue
+
+            group_labels = labels[rows]
+            candidates = np.unique(group_labels[group_labels >= 0])
+            if not len(candidates):
+                continue
+            exact = np.ascontiguousarray(
+                vector_fetcher([self._embedding_keys[label] for label in candidates]),
+                dtype=np.float32
+            ).reshape(-1, self.dimension)
+            faiss.normalize_L2(exact)
+            position = {label: i for i, label in enumerate(candidates)}
+
+            for row, row_labels in zip(rows, group_labels):
+                row_labels = row_labels[row_labels >= 0]
+                if not len(row_labels):
+                    continue
+                row_scores = exact[[position[label] for label in row_labels]] @ queries[row]
+                order = np.argsort(-row_scores)[:top_k]
+                out_scores[row, :len(order)] = row_scores[order]
+                out_labels[row, :len(order)] = row_labels[order]
+
+        return out_scores, out_labels
+
+    def _live_labels(self) -> np.ndarray:
+        """Return the vector IDs that are not tombstoned, in ascending order."""
+        live = np.ones(self._index.ntotal, dtype=bool)
+        live[list(self._deleted)] = False
+        return np.flatnonzero(live)
+
+    def _publish(self, operation: str, index: faiss.Index, projection: Optional[VectorProjection],
+                 live: Optional[np.ndarray], index_type: str, trained_size: int,
+                 centroids: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """
+        Swap in an index built off to the side, read-copy-update style. ID mappings for the
+        live vectors are prepared before taking the search lock, so searches only wait for
+        the reference swap; searches already running finish on the index they started with.
+
+        Args:
+            operation: 'rebuild' or 'compact', for metrics
+            index: Replacement FAISS index
+            projection: Projection the replacement holds vectors in
+            live: Old vector IDs the replacement holds as 0..n-1, None if IDs are unchanged
+            index_type: IndexType value of the replacement
+            trained_size: Tenant size the replacement was trained for
+            centroids: Recomputed (sums, counts) of document centroids, None to keep them
+        """
+        if live is not None:
+            chunk_ids = [self._chunk_ids[label] for label in live]
+            embedding_keys = [self._embedding_keys[label] for label in live]
+            embedding_ids = {emb_id: label for label, emb_id in enumerate(embedding_keys)}
+            doc_codes = self._doc_codes[live]
+
+        swap_start = time.perf_counter()
+        with self._lock:
+            self._index, self._projection = index, projection
+            self.index_type = index_type
+            self._trained_size = trained_size
+            self.mmap = False
+            if centroids is not None:
+                self._doc_sums, self._doc_counts = centroids
+            if live is not None:
+                self._chunk_ids, self._embedding_keys = chunk_ids, embedding_keys
+                self._embedding_ids, self._doc_codes = embedding_ids, doc_codes
+                self._deleted = set()
+                self._invalidate_selectors()
+        INDEX_SWAP_DURATION.labels(operation=operation).observe(time.perf_counter() - swap_start)
+
+    def _append_ids(self, rows: Sequence[int], chunk_ids: Sequence[str],
+                    embedding_ids: Sequence[str], documents: Optional[Sequence[DocumentInfo]],
+                    start: int, vectors: np.ndarray) -> None:
+        """
+        Record ID mappings and document codes for rows just added at vector ID start,
+        and add their normalized full-dimension vectors to the document centroids.
+        """
+        for offset, i in enumerate(rows):
+            self._chunk_ids.append(str(chunk_ids[i]))
+            self._embedding_keys.append(str(embedding_ids[i]))
+            self._embedding_ids[str(embedding_ids[i])] = start + offset
+        codes = np.array([self._document_code(documents[i]) if documents else -1 for i in rows],
+                         dtype=np.int32)
+        self._doc_codes = np.concatenate([self._doc_codes, codes])
+        self._update_centroids(codes, vectors, 1)
+        self._invalidate_selectors()
+
+    def _update_centroids(self, codes: np.ndarray, vectors: Optional[np.ndarray],
+                          sign: int) -> None:
+        """
+        Add (sign 1) or subtract (sign -1) vectors from their documents' centroid sums.
+        Without vectors only the counts change. A document left without live vectors
+        has its sum reset, so it starts afresh if the document is indexed again.
+        """
+        if len(self._doc_keys) > len(self._doc_counts):
+            capacity = max(len(self._doc_keys), 2 * len(self._doc_counts),
+                           CENTROID_INITIAL_CAPACITY)
+            sums = np.zeros((capacity, self.dimension), dtype=np.float32)
+            sums[:len(self._doc_sums)] = self._doc_sums
+            counts = np.zeros(capacity, dtype=np.int64)
+            counts[:len(self._doc_counts)] = self._doc_counts
+            self._doc_sums, self._doc_counts = sums, counts
+
+        known = codes >= 0
+        codes = codes[known]
+        np.add.at(self._doc_counts, codes, sign)
+        if vectors is not None:
+            np.add.at(self._doc_sums, codes, sign * vectors[known])
+        if sign < 0:
+            self._doc_sums[codes[self._doc_counts[codes] <= 0]] = 0
+
+    def _resum_centroids(self, codes: np.ndarray) -> None:
+        """Recompute the centroid sums of the given documents from their live vectors."""
+        codes = np.unique(codes[codes >= 0])
+        codes = codes[self._doc_counts[codes] > 0]
+        if not len(codes):
+            return
+        labels = np.flatnonzero(np.isin(self._doc_codes, codes))
+        labels = labels[np.fromiter((label not in self._deleted for label in labels.tolist()),
+                                    dtype=bool, count=len(labels))]
+        self._doc_sums[codes] = 0
+        np.add.at(self._doc_sums, self._doc_codes[labels], self._index.reconstruct_batch(labels))
+
+    def _centroid_sums(self, codes: np.ndarray,
+                       vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute document centroid sums and counts from scratch for vectors with these codes."""
+        sums = np.zeros((len(self._doc_counts), self.dimension), dtype=np.float32)
+        counts = np.zeros(len(self._doc_counts), dtype=np.int64)
+        known = codes >= 0
+        np.add.at(sums, codes[known], vectors[known])
+        np.add.at(counts, codes[known], 1)
+        return sums, counts
+
+    def _invalidate_selectors(self) -> None:
+        """Drop cached bitmaps and lookups after vectors are added, removed or renumbered."""
+        self._live_bitmap = None
+        self._filter_cache.clear()
+        self._chunk_labels = None
+        self._doc_positions = None
+
+    def _document_code(self, document: Optional[DocumentInfo]) -> int:
+        """Return the code of a document in the attribute tables, registering it if new."""
+        if document is None:
+            return -1
+        document_id, document_type, created_at = document
+        code = self._doc_lookup.get(str(document_id))
+        if code is None:
+            code = len(self._doc_keys)
+            self._doc_lookup[str(document_id)] = code
+            self._doc_keys.append(str(document_id))
+            self._doc_types.append(str(document_type))
+            self._doc_created.append(created_at.timestamp() if created_at else float('nan'))
+        return code
+
+    def _filter_selector(self, key: Tuple) -> Tuple[np.ndarray, faiss.IDSelector, int]:
+        """
+        Return the packed bitmap, FAISS selector and match count for a filter key.
+        Filters are evaluated per document and gathered through the document code
+        column, so the cost is one pass over the vector IDs per distinct filter.
+        """
+        cached = self._filter_cache.get(key)
+        if cached is not None:
+            self._filter_cache.move_to_end(key)
+            return cached
+
+        documents = self._document_mask(dict(key))
+        matched = np.zeros(self._index.ntotal, dtype=bool)
+        known = self._doc_codes >= 0
+        matched[known] = documents[self._doc_codes[known]]
+        if self._deleted:
+            matched[list(self._deleted)] = False
+
+        bitmap = np.packbits(matched, bitorder='little')
+        # FAISS keeps a raw pointer to the bitmap, so the cache holds both
+        cached = (bitmap, faiss.IDSelectorBitmap(bitmap), int(matched.sum()))
+        self._filter_cache[key] = cached
+        if len(self._filter_cache) > FILTER_CACHE_SIZE:
+            self._filter_cache.popitem(last=False)
+        return cached
+
+    def _document_labels(self, document_ids: Sequence[str], key: Optional[Tuple]) -> np.ndarray:
+        """
+        Return the live vector IDs of the given documents that also match a filter key.
+        Costs one slice per document once the position table is built, which happens
+        once per index change rather than once per query.
+        """
+        if self._doc_positions is None:
+            live = self._doc_codes >= 0
+            if self._deleted:
+                live[list(self._deleted)] = False
+            labels = np.flatnonzero(live)
+            order = labels[np.argsort(self._doc_codes[labels], kind='stable')]
+            offsets = np.searchsorted(self._doc_codes[order], np.arange(len(self._doc_keys) + 1))
+            self._doc_positions = (order, offsets)
+
+        order, offsets = self._doc_positions
+        codes = [self._doc_lookup[str(doc_id)] for doc_id in document_ids
+                 if str(doc_id) in self._doc_lookup]
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        labels = np.concatenate([order[offsets[code]:offsets[code + 1]] for code in codes])
+        if key:
+            bitmap = self._filter_selector(key)[0]
+            labels = labels[(bitmap[labels >> 3] >> (labels & 7)) & 1 == 1]
+        return labels.astype(np.int64)
+
+    def _document_mask(self, spec: Dict) -> np.ndarray:
+        """Return which documents, by document code, match a normalized filter spec."""
+        documents = np.ones(len(self._doc_keys), dtype=bool)
+        if 'document_id' in spec:
+            documents[:] = False
+            documents[[self._doc_lookup[doc_id] for doc_id in spec['document_id']
+                       if doc_id in self._doc_lookup]] = True
+        if 'document_type' in spec:
+            documents &= np.isin(np.array(self._doc_types, dtype=str), spec['document_type'])
+        created = np.array(self._doc_created, dtype=np.float64)
+        if 'created_after' in spec:
+            documents &= created >= spec['created_after']
+        if 'created_before' in spec:
+            documents &= created < spec['created_before']
+        return documents
+
+    def _search_parameters(self, key: Optional[Tuple] = None) -> Optional[faiss.SearchParameters]:
+        """
+        Return per-query search parameters that exclude tombstoned vectors and
+        vectors outside the metadata filter, or None when nothing is excluded.
+        """
+        if key is not None:
+            selector = self._filter_selector(key)[1]
+        elif not self._deleted:
+            return None
+        else:
+            if self._live_bitmap is None:
+                live = np.ones(self._index.ntotal, dtype=bool)
+                live[list(self._deleted)] = False
+                self._live_bitmap = np.packbits(live, bitorder='little')
+                # FAISS keeps a raw pointer to the bitmap, so both are held on the instance
+                self._live_selector = faiss.IDSelectorBitmap(self._live_bitmap)
+            selector = self._live_selector
+        return self._selector_parameters(selector)
+
+    def _selector_parameters(self, selector: faiss.IDSelector) -> faiss.SearchParameters:
+        """Wrap an ID selector in search parameters for the current index type."""
+        # Per-query parameters replace the index-level knobs, so carry them over
+        if isinstance(self._index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self._index.nprobe)
+        if isinstance(self._index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self._index.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+    def _bytes_per_vector(self) -> int:
+        """Approximate resident bytes per vector for the current index type."""
+        dimension = self._projection.dimension if self._projection else self.dimension
+        if self.index_type == IndexType.SQ8.value:
+            return dimension
+        if self.index_type == IndexType.IVF_PQ.value:
+            return self.params['pq_m'] * self.params['pq_nbits'] // 8 + 8
+        if self.index_type == IndexType.IVF_FLAT.value:
+            return dimension * 4 + 8
+        if self.index_type == IndexType.HNSW.value:
+            return dimension * 4 + self.params['hnsw_m'] * 2 * 4
+        return dimension * 4
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        """Map normalized vectors into the space the FAISS index holds."""
+        return self._projection.apply(vectors) if self._projection is not None else vectors
+
+    def _apply_search_params(self, index: faiss.Index) -> None:
+        """Apply query-time recall/latency knobs to an index."""
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = min(self.params['nprobe'], index.nlist)
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.params['ef_search']
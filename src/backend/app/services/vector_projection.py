@@ -0,0 +1,121 @@
+"""
+Dimension-reducing projections for tenant vector indices.
+Maps normalized embeddings to a smaller space, either by PCA fitted on a tenant sample
+or by truncation to the leading dimensions, and persists the mapping with the index.
+
+Version: 1.0.0
+"""
+
+from typing import Optional
+
+import numpy as np  # version: ^1.24.0
+
+from app.constants import ProjectionType
+
+# Guard against division by zero when renormalizing projected vectors
+EPSILON = 1e-8
+
+
+class VectorProjection:
+    """
+    Linear map from full embeddings to the smaller space a tenant index searches.
+    Projected vectors are renormalized so inner products stay cosine similarities.
+    """
+
+    def __init__(self, method: str, input_dimension: int, dimension: int,
+                 mean: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None,
+                 explained_variance: Optional[float] = None):
+        """
+        Initialize a projection.
+
+        Args:
+            method: ProjectionType value other than none
+            input_dimension: Dimension of the embeddings being projected
+            dimension: Dimension of the projected vectors
+            mean: PCA mean of shape (input_dimension,)
+            components: PCA components of shape (dimension, input_dimension)
+            explained_variance: Fraction of sample variance kept by PCA
+        """
+        if ProjectionType(method) == ProjectionType.NONE:
+            raise ValueError("A projection needs a method other than 'none'")
+        if not 0 < dimension < input_dimension:
+            raise ValueError(
+                f"Projection dimension must be between 1 and {input_dimension - 1}, got {dimension}"
+            )
+        self.method = method
+        self.input_dimension = input_dimension
+        self.dimension = dimension
+        self.mean = mean
+        self.components = components
+        self.explained_variance = explained_variance
+
+    @classmethod
+    def fit(cls, method: str, vectors: np.ndarray, dimension: int) -> 'VectorProjection':
+        """
+        Fit a projection to a sample of normalized embeddings.
+
+        Args:
+            method: ProjectionType value other than none
+            vectors: Sample matrix of shape (n, input_dimension)
+            dimension: Dimension of the projected vectors
+
+        Returns:
+            VectorProjection: Fitted projection
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        input_dimension = vectors.shape[1]
+        if method != ProjectionType.PCA.value:
+            return cls(method, input_dimension, dimension)
+
+        if len(vectors) < 2:
+            raise ValueError("PCA needs at least two sample vectors")
+        mean = vectors.mean(axis=0)
+        centered = vectors - mean
+        covariance = (centered.T @ centered).astype(np.float64) / (len(vectors) - 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        # eigh returns ascending eigenvalues; keep the largest
+        order = np.argsort(eigenvalues)[::-1][:dimension]
+        total = float(eigenvalues.clip(min=0).sum())
+        explained = float(eigenvalues[order].clip(min=0).sum()) / total if total else 1.0
+        return cls(method, input_dimension, dimension, mean=mean.astype(np.float32),
+                   components=np.ascontiguousarray(eigenvectors[:, order].T, dtype=np.float32),
+                   explained_variance=explained)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Project and renormalize vectors.
+
+        Args:
+            vectors: Matrix of shape (n, input_dimension)
+
+        Returns:
+            numpy.ndarray: Contiguous float32 matrix of shape (n, dimension)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.input_dimension)
+        if self.method == ProjectionType.PCA.value:
+            projected = (vectors - self.mean) @ self.components.T
+        else:
+            projected = vectors[:, :self.dimension].copy()
+        projected /= np.maximum(np.linalg.norm(projected, axis=1, keepdims=True), EPSILON)
+        return np.ascontiguousarray(projected, dtype=np.float32)
+
+    def save(self, path: str) -> None:
+        """Write the projection to an .npz file."""
+        arrays = {'method': np.array(self.method),
+                  'input_dimension': np.array(self.input_dimension),
+                  'dimension': np.array(self.dimension)}
+        if self.components is not None:
+            arrays.update(mean=self.mean, components=self.components,
+                          explained_variance=np.array(self.explained_variance))
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'VectorProjection':
+        """Read a projection written by save()."""
+        with np.load(path) as arrays:
+            pca = 'components' in arrays
+            return cls(str(arrays['method']), int(arrays['input_dimension']),
+                       int(arrays['dimension']),
+                       mean=arrays['mean'] if pca else None,
+                       components=arrays['components'] if pca else None,
+                       explained_variance=float(arrays['explained_variance']) if pca else None)
@@ -5,19 +5,33 @@ Provides efficient semantic search capabilities with tenant isolation, monitorin
 Version: 1.0.0
 """
 
+import asyncio
+import functools
 import logging
+import threading
 import numpy as np  # version: ^1.24.0
-from typing import List, Dict, Optional
-import faiss  # version: ^1.7.4
+from datetime import datetime
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from redis import Redis  # version: ^4.5.0
+from redis.asyncio import Redis as AsyncRedis  # version: ^4.5.0
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from tenacity import retry, stop_after_attempt, wait_exponential  # version: ^8.2.0
-from prometheus_client import Counter, Histogram, Gauge  # version: ^0.16.0
+from tenacity import (  # version: ^8.2.0
+    retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+)
+from prometheus_client import Counter, Histogram  # version: ^0.16.0
 
-from app.models.embedding import Embedding
+from app.models.embedding import Embedding, decode_vector
 from app.models.chunk import Chunk
+from app.models.document import Document
 from app.core.config import settings
 from app.constants import VectorSearchConfig
+from app.services.index_registry import get_index_registry
+from app.services.vector_index import TenantIndex, filter_key
+from app.services.search_batcher import get_search_batcher
+from app.services.search_executor import SearchOverloadedError, get_search_executor
+from app.services.lexical_index import LexicalIndex, get_lexical_registry, reciprocal_rank_fusion
+from app.services.near_duplicates import NearDuplicateIndex, get_duplicate_registry
 
 # Configure module logger
 logger = logging.getLogger(__name__)
@@ -27,7 +41,41 @@ SEARCH_REQUESTS = Counter('vector_search_requests_total', 'Total number of vecto
 SEARCH_LATENCY = Histogram('vector_search_latency_seconds', 'Vector search latency in seconds')
 CACHE_HITS = Counter('vector_search_cache_hits_total', 'Number of cache hits')
 CACHE_MISSES = Counter('vector_search_cache_misses_total', 'Number of cache misses')
-INDEX_SIZE = Gauge('vector_search_index_size', 'Number of vectors in the index')
+HIERARCHICAL_SEARCHES = Counter(
+    'vector_search_hierarchical_total',
+    'Searches restricted to the chunks of the documents with the closest centroids'
+)
+
+# Rows fetched per round trip when building a tenant index
+LOAD_BATCH_SIZE = 1000
+
+# Seconds search results stay cached
+SEARCH_CACHE_TTL = 300
+
+
+def _holds_session(method):
+    """Serialize a method's use of the service's database session across executor threads."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._db_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ChunkRecord:
+    """
+    Column values of a chunk returned by search, hydrated without ORM instances,
+    identity-map bookkeeping or relationship loads.
+    """
+
+    __slots__ = ('chunk_id', 'document_id', 'content', 'metadata')
+
+    def __init__(self, chunk_id: str, document_id: str, content: str, metadata: Dict):
+        self.chunk_id = chunk_id
+        self.document_id = document_id
+        self.content = content
+        self.metadata = metadata
+
 
 class VectorSearchService:
     """
@@ -35,7 +83,8 @@ class VectorSearchService:
     tenant isolation, and caching capabilities.
     """
 
-    def __init__(self, db_session: Session, cache_client: Redis, config: Dict = None):
+    def __init__(self, db_session: Session, cache_client: Redis, config: Dict = None,
+                 async_cache_client: Optional[AsyncRedis] = None):
         """
         Initialize vector search service with configuration and connections.
 
@@ -43,9 +92,14 @@ class VectorSearchService:
             db_session: SQLAlchemy session for database operations
             cache_client: Redis client for caching
             config: Optional configuration override
+            async_cache_client: Optional asyncio Redis client used by asearch()
         """
         self.db = db_session
         self._cache = cache_client
+        self._async_cache = async_cache_client
+
+        # Sessions are not thread-safe; asearch() calls may share one from executor threads
+        self._db_lock = threading.RLock()
         
         # Load configuration
         vector_config = config or settings.get_vector_search_settings()
@@ -55,31 +109,50 @@ class VectorSearchService:
                                                     VectorSearchConfig.SIMILARITY_THRESHOLD.value)
         self.BATCH_SIZE = vector_config.get('batch_size', VectorSearchConfig.BATCH_SIZE.value)
 
-        # Initialize FAISS index with GPU support if available
-        try:
-            res = faiss.StandardGpuResources()
-            config = faiss.GpuIndexFlatIPConfig()
-            config.device = 0
-            self._index = faiss.GpuIndexFlatIP(res, self.VECTOR_DIMENSION, config)
-            logger.info("GPU-enabled FAISS index initialized successfully")
-        except Exception as e:
-            logger.warning(f"GPU initialization failed, falling back to CPU: {str(e)}")
-            self._index = faiss.IndexFlatIP(self.VECTOR_DIMENSION)
+        # Process-wide registry of per-tenant indices shared across requests
+        self._registry = get_index_registry()
+
+        # Coalesces concurrent single-query searches into batched index searches
+        self._batcher = get_search_batcher()
+
+        # Bounded thread pool asearch() runs blocking index and database work on
+        self._executor = get_search_executor()
+
+        # Per-tenant BM25 indices fused with vector results when query text is supplied
+        self._lexical_registry = get_lexical_registry()
+        hybrid_config = vector_config.get('hybrid', {})
+        self.HYBRID_ENABLED = hybrid_config.get('enabled', True)
+        self.RRF_K = hybrid_config.get('rrf_k', 60)
+        self.HYBRID_CANDIDATES = hybrid_config.get('candidates', 50)
+
+        # Two-level retrieval on large tenants: top documents by centroid, then their chunks
+        hierarchical_config = vector_config.get('hierarchical', {})
+        self.HIERARCHICAL_ENABLED = hierarchical_config.get('enabled', False)
+        self.HIERARCHICAL_MIN_DOCUMENTS = hierarchical_config.get('min_documents', 1000)
+        self.HIERARCHICAL_TOP_DOCUMENTS = hierarchical_config.get('top_documents', 50)
 
-        # Initialize tenant-specific indices
-        self._tenant_indices = {}
+        # Per-tenant SimHash detectors linking near-duplicate chunks to a canonical chunk
+        self._duplicate_registry = get_duplicate_registry()
+        self.DEDUP_ENABLED = vector_config.get('deduplication', {}).get('enabled', False)
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def search(self, query_embedding: np.ndarray, tenant_id: str, 
-              top_k: Optional[int] = None, threshold: Optional[float] = None) -> List[Dict]:
+              top_k: Optional[int] = None, threshold: Optional[float] = None,
+              query_text: Optional[str] = None, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Perform vector similarity search with tenant isolation and caching.
+        When query text is supplied, BM25 matches are fused with the vector results by
+        reciprocal-rank fusion so exact part numbers and codes are not missed.
+        Metadata filters restrict results inside the index search itself.
 
         Args:
             query_embedding: Query vector
             tenant_id: Client/tenant identifier
             top_k: Optional override for number of results
             threshold: Optional override for similarity threshold
+            query_text: Optional query text for hybrid lexical retrieval
+            filters: Optional metadata filters: document_id and document_type (a value or
+                list of values), created_after and created_before (datetimes)
 
         Returns:
             List of similar chunks with scores and metadata
@@ -87,72 +160,167 @@ class VectorSearchService:
         SEARCH_REQUESTS.inc()
         with SEARCH_LATENCY.time():
             try:
-                # Parameter validation
-                if query_embedding.shape[0] != self.VECTOR_DIMENSION:
-                    raise ValueError(f"Query embedding must have dimension {self.VECTOR_DIMENSION}")
-
-                top_k = top_k or self.TOP_K
-                threshold = threshold or self.SIMILARITY_THRESHOLD
-
-                # Check cache
-                cache_key = f"search:{tenant_id}:{hash(query_embedding.tobytes())}"
+                self._validate_query(query_embedding)
+                cache_key = self._cache_key(query_embedding, tenant_id, query_text, filters)
                 cached_result = self._cache.get(cache_key)
                 if cached_result:
                     CACHE_HITS.inc()
                     return cached_result
 
                 CACHE_MISSES.inc()
+                results = self._search_uncached(query_embedding, tenant_id, top_k, threshold,
+                                                query_text, filters)
 
-                # Normalize query vector
-                faiss.normalize_L2(query_embedding.reshape(1, -1))
+                # Cache results
+                self._cache.setex(cache_key, SEARCH_CACHE_TTL, results)
+                return results
 
-                # Get tenant-specific embeddings
-                embeddings = self.db.query(Embedding).join(Chunk).filter(
-                    Chunk.document.has(client_id=tenant_id)
-                ).all()
+            except Exception as e:
+                logger.error(f"Vector search error: {str(e)}", 
+                           extra={'tenant_id': tenant_id, 'error': str(e)})
+                raise
 
-                if not embeddings:
-                    logger.warning(f"No embeddings found for tenant {tenant_id}")
-                    return []
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_not_exception_type(SearchOverloadedError), reraise=True)
+    async def asearch(self, query_embedding: np.ndarray, tenant_id: str,
+                      top_k: Optional[int] = None, threshold: Optional[float] = None,
+                      query_text: Optional[str] = None,
+                      filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Awaitable search() for async callers.
+        Index search, hydration and any index build run on the bounded search executor,
+        so a slow search occupies one executor thread rather than the event loop.
+        Overload is raised immediately instead of being retried.
 
-                # Perform similarity search
-                vectors = np.vstack([emb.get_vector() for emb in embeddings])
-                faiss.normalize_L2(vectors)
-                
-                scores, indices = self._index.search(query_embedding.reshape(1, -1), top_k)
-                
-                # Filter results by threshold
-                results = []
-                for score, idx in zip(scores[0], indices[0]):
-                    if score < threshold:
-                        continue
-                        
-                    embedding = embeddings[idx]
-                    chunk = embedding.chunk
-                    
-                    result = {
-                        'chunk_id': str(chunk.id),
-                        'document_id': str(chunk.document_id),
-                        'content': chunk.content,
-                        'similarity_score': float(score),
-                        'metadata': chunk.metadata
-                    }
-                    results.append(result)
+        Args:
+            query_embedding: Query vector
+            tenant_id: Client/tenant identifier
+            top_k: Optional override for number of results
+            threshold: Optional override for similarity threshold
+            query_text: Optional query text for hybrid lexical retrieval
+            filters: Optional metadata filters, as for search()
 
-                # Cache results
-                self._cache.setex(
-                    cache_key,
-                    300,  # 5 minute TTL
-                    results
+        Returns:
+            List of similar chunks with scores and metadata
+
+        Raises:
+            SearchOverloadedError: If the search executor queue is full
+        """
+        SEARCH_REQUESTS.inc()
+        with SEARCH_LATENCY.time():
+            try:
+                self._validate_query(query_embedding)
+                cache_key = self._cache_key(query_embedding, tenant_id, query_text, filters)
+                cached_result = await self._cache_get(cache_key)
+                if cached_result:
+                    CACHE_HITS.inc()
+                    return cached_result
+
+                CACHE_MISSES.inc()
+                results = await self._executor.run(
+                    self._search_uncached, query_embedding, tenant_id, top_k, threshold,
+                    query_text, filters
                 )
 
+                await self._cache_setex(cache_key, SEARCH_CACHE_TTL, results)
                 return results
 
             except Exception as e:
-                logger.error(f"Vector search error: {str(e)}", 
+                logger.error(f"Vector search error: {str(e)}",
                            extra={'tenant_id': tenant_id, 'error': str(e)})
                 raise
 
+    def _validate_query(self, query_embedding: np.ndarray) -> None:
+        """Reject query embeddings of the wrong dimension."""
+        if query_embedding.shape[0] != self.VECTOR_DIMENSION:
+            raise ValueError(f"Query embedding must have dimension {self.VECTOR_DIMENSION}")
+
+    def _cache_key(self, query_embedding: np.ndarray, tenant_id: str,
+                   query_text: Optional[str], filters: Optional[Dict]) -> str:
+        """Build the result cache key for a search."""
+        cache_key = f"search:{tenant_id}:{hash(query_embedding.tobytes())}"
+        if self.HYBRID_ENABLED and query_text and query_text.strip():
+            cache_key += f":{hash(query_text)}"
+        filters_key = filter_key(filters)
+        if filters_key:
+            cache_key += f":{hash(filters_key)}"
+        return cache_key
+
+    async def _cache_get(self, key: str):
+        """Read a cached result through the async client, or the sync client off the event loop."""
+        if self._async_cache is not None:
+            return await self._async_cache.get(key)
+        return await asyncio.to_thread(self._cache.get, key)
+
+    async def _cache_setex(self, key: str, ttl: int, value) -> None:
+        """Write a cached result through the async client, or the sync client off the event loop."""
+        if self._async_cache is not None:
+            await self._async_cache.setex(key, ttl, value)
+        else:
+            await asyncio.to_thread(self._cache.setex, key, ttl, value)
+
+    def _search_uncached(self, query_embedding: np.ndarray, tenant_id: str,
+                         top_k: Optional[int], threshold: Optional[float],
+                         query_text: Optional[str], filters: Optional[Dict]) -> List[Dict]:
+        """
+        Search the tenant index and hydrate the hits, bypassing the result cache.
+        Blocking; asearch() runs it on the search executor.
+
+        Returns:
+            List of similar chunks with scores and metadata
+        """
+        top_k = top_k or self.TOP_K
+        threshold = threshold or self.SIMILARITY_THRESHOLD
+        hybrid = self.HYBRID_ENABLED and bool(query_text and query_text.strip())
+
+        # Get the shared tenant index, building it on first use
+        tenant_index = self._get_tenant_index(tenant_id)
+        if tenant_index.ntotal == 0:
+            logger.warning(f"No embeddings found for tenant {tenant_id}")
+            return []
+
+        # Perform similarity search and filter by threshold
+        hits = [
+            (chunk_id, score)
+            for chunk_id, score in self._batcher.search(
+                tenant_index, query_embedding,
+                max(top_k, self.HYBRID_CANDIDATES) if hybrid else top_k,
+                vector_fetcher=self._fetch_vectors, filters=filters,
+                documents=self._hierarchical_documents(tenant_index, query_embedding, filters)
+            )
+            if score >= threshold
+        ]
+
+        lexical_scores, fusion_scores = {}, {}
+        if hybrid:
+            hits, lexical_scores, fusion_scores = self._fuse_lexical(
+                hits, query_embedding, query_text, tenant_id, top_k,
+                tenant_index=tenant_index, filters=filters
+            )
+
+        # Hydrate only the chunks that made the cut, in one query
+        chunks = self._hydrate_chunks([chunk_id for chunk_id, _ in hits])
+
+        results = []
+        for chunk_id, score in hits:
+            chunk = chunks.get(chunk_id)
+            if chunk is None:
+                continue
+
+            result = {
+                'chunk_id': chunk_id,
+                'document_id': chunk.document_id,
+                'content': chunk.content,
+                'similarity_score': float(score),
+                'metadata': chunk.metadata
+            }
+            if hybrid:
+                result['lexical_score'] = lexical_scores.get(chunk_id, 0.0)
+                result['fusion_score'] = fusion_scores[chunk_id]
+            results.append(result)
+
+        return results
+
     def batch_index(self, embeddings: List[Embedding], tenant_id: str) -> None:
         """
         Index batch of embeddings with optimized processing.
@@ -165,32 +333,739 @@ class VectorSearchService:
             if not embeddings:
                 return
 
+            tenant_index = self._get_tenant_index(tenant_id)
+            documents = self._load_chunk_documents([emb.chunk_id for emb in embeddings])
+
             # Process in batches
+            added = 0
             for i in range(0, len(embeddings), self.BATCH_SIZE):
                 batch = embeddings[i:i + self.BATCH_SIZE]
                 
-                # Extract and normalize vectors
-                vectors = np.vstack([emb.get_vector() for emb in batch])
-                faiss.normalize_L2(vectors)
-                
-                # Add to index
-                self._index.add(vectors)
-                
-                # Update tenant-specific index
-                if tenant_id not in self._tenant_indices:
-                    self._tenant_indices[tenant_id] = set()
-                self._tenant_indices[tenant_id].update([emb.id for emb in batch])
+                # Upsert into the shared tenant index, replacing re-indexed embeddings
+                added += tenant_index.upsert(
+                    np.vstack([emb.get_vector() for emb in batch]),
+                    [emb.chunk_id for emb in batch],
+                    [emb.id for emb in batch],
+                    loader=lambda: self._load_tenant_vectors(tenant_id),
+                    documents=[documents[str(emb.chunk_id)] for emb in batch]
+                )
+
+            # Keep a loaded lexical index in step; an unloaded one picks the chunks up on build
+            lexical_index = self._lexical_registry.get(tenant_id)
+            if lexical_index is not None:
+                lexical_index.add([emb.chunk_id for emb in embeddings],
+                                  [emb.chunk.content for emb in embeddings])
+            duplicate_index = self._duplicate_registry.get(tenant_id)
+            if duplicate_index is not None:
+                duplicate_index.add([emb.chunk_id for emb in embeddings],
+                                    [emb.chunk.content for emb in embeddings])
+
+            # Persisted with the next background snapshot; restarts catch up from the database
+            self._registry.mark_dirty(tenant_id, added)
 
-            # Update metrics
-            INDEX_SIZE.set(self._index.ntotal)
+            # Update tenant gauges; growth may push other tenants out of the memory budget
+            self._registry.refresh_tenant(tenant_id)
             
-            logger.info(f"Successfully indexed {len(embeddings)} embeddings for tenant {tenant_id}")
+            logger.info(f"Successfully indexed {added} embeddings for tenant {tenant_id}")
 
         except Exception as e:
             logger.error(f"Batch indexing error: {str(e)}", 
                         extra={'tenant_id': tenant_id, 'batch_size': len(embeddings)})
             raise
 
+    def remove_embeddings(self, embedding_ids: List[str], tenant_id: str,
+                          chunk_ids: Optional[List[str]] = None) -> int:
+        """
+        Remove embeddings from the tenant index and persist the updated snapshot.
+
+        Args:
+            embedding_ids: Embedding identifiers to remove
+            tenant_id: Client/tenant identifier
+            chunk_ids: Optional chunks without vectors, e.g. linked near-duplicates,
+                to drop from the lexical index as well
+
+        Returns:
+            int: Number of vectors removed
+        """
+        try:
+            lexical_index = self._lexical_registry.get(tenant_id)
+            if lexical_index is not None and chunk_ids:
+                lexical_index.remove(chunk_ids)
+            if not embedding_ids:
+                return 0
+
+            # Load the index so removals also reach the on-disk snapshot
+            tenant_index = self._get_tenant_index(tenant_id)
+            removed_chunk_ids = tenant_index.chunk_ids_for(embedding_ids)
+            if lexical_index is not None:
+                lexical_index.remove(removed_chunk_ids)
+            duplicate_index = self._duplicate_registry.get(tenant_id)
+            if duplicate_index is not None:
+                duplicate_index.remove(removed_chunk_ids)
+
+            removed = self._registry.remove(tenant_id, [str(emb_id) for emb_id in embedding_ids])
+
+            logger.info(f"Removed {removed} embeddings for tenant {tenant_id}")
+            return removed
+
+        except Exception as e:
+            logger.error(f"Embedding removal error: {str(e)}",
+                        extra={'tenant_id': tenant_id, 'batch_size': len(embedding_ids)})
+            raise
+
+    def remove_document(self, document_id: str, tenant_id: str,
+                        keep_embedding_ids: Optional[List[str]] = None,
+                        keep_chunk_ids: Optional[List[str]] = None) -> int:
+        """
+        Remove a document's embeddings from the tenant index. When keep_embedding_ids
+        is given, the document's other chunk rows are deleted from the database too.
+        Near-duplicates in other documents linked to the removed chunks are promoted first.
+
+        Args:
+            document_id: Document identifier
+            tenant_id: Client/tenant identifier
+            keep_embedding_ids: Optional embeddings to keep, e.g. those stored by reprocessing
+            keep_chunk_ids: Optional chunks without embeddings to keep, e.g. linked
+                near-duplicates stored by reprocessing
+
+        Returns:
+            int: Number of vectors removed
+        """
+        keep = {str(emb_id) for emb_id in keep_embedding_ids or []}
+        keep_chunks = {str(chunk_id) for chunk_id in keep_chunk_ids or []}
+        embedding_ids = [
+            emb_id for emb_id in self.document_embedding_ids(document_id) if emb_id not in keep
+        ]
+        stale_chunk_ids = self._stale_chunk_ids(document_id, keep, keep_chunks)
+        promoted = self.promote_duplicates(stale_chunk_ids)
+        removed = self.remove_embeddings(embedding_ids, tenant_id, chunk_ids=stale_chunk_ids)
+        if keep_embedding_ids is not None:
+            self._delete_stale_chunks(document_id, keep, keep_chunks)
+        self.batch_index(promoted, tenant_id)
+        return removed
+
+    @_holds_session
+    def store_embeddings(self, document_id: str, contents: List[str], vectors: List[np.ndarray],
+                         sequences: List[int]) -> List[Embedding]:
+        """
+        Persist a processed document's chunks with their embeddings.
+
+        Args:
+            document_id: Document identifier
+            contents: Chunk texts
+            vectors: Embedding vectors aligned with contents
+            sequences: Chunk positions within the document, aligned with contents
+
+        Returns:
+            List of stored Embedding rows with their chunks loaded, ready for batch_index()
+        """
+        embeddings = []
+        try:
+            for content, vector, sequence in zip(contents, vectors, sequences):
+                chunk = Chunk(document_id, content, sequence)
+                embedding = Embedding(chunk.id, vector)
+                embedding.chunk = chunk
+                self.db.add(chunk)
+                self.db.add(embedding)
+                embeddings.append(embedding)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        # Commit expires the rows; refresh them and their chunks in one query, not one per row
+        if embeddings:
+            self.db.query(Embedding).filter(
+                Embedding.id.in_([embedding.id for embedding in embeddings])
+            ).all()
+        return embeddings
+
+    @_holds_session
+    def store_duplicates(self, document_id: str, contents: List[str], sequences: List[int],
+                         canonical_chunk_ids: List[str]) -> List[str]:
+        """
+        Persist a processed document's near-duplicate chunks, linked to their canonical
+        chunks instead of carrying an embedding of their own.
+
+        Args:
+            document_id: Document identifier
+            contents: Chunk texts
+            sequences: Chunk positions within the document, aligned with contents
+            canonical_chunk_ids: Stored chunk whose embedding each chunk shares
+
+        Returns:
+            List of stored chunk identifiers, ready for index_linked_chunks()
+        """
+        chunk_ids = []
+        try:
+            for content, sequence, canonical_chunk_id in zip(contents, sequences,
+                                                             canonical_chunk_ids):
+                chunk = Chunk(document_id, content, sequence, canonical_chunk_id=canonical_chunk_id)
+                self.db.add(chunk)
+                chunk_ids.append(str(chunk.id))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return chunk_ids
+
+    def index_linked_chunks(self, chunk_ids: List[str], contents: List[str],
+                            tenant_id: str) -> None:
+        """
+        Add linked near-duplicate chunks to a loaded lexical index. They have no vector
+        of their own, so BM25 is how their document's own copy of the text is found.
+
+        Args:
+            chunk_ids: Linked chunk identifiers
+            contents: Chunk texts aligned with chunk_ids
+            tenant_id: Client/tenant identifier
+        """
+        lexical_index = self._lexical_registry.get(tenant_id)
+        if lexical_index is not None and chunk_ids:
+            lexical_index.add(chunk_ids, contents)
+
+    @_holds_session
+    def promote_duplicates(self, chunk_ids: List[str]) -> List[Embedding]:
+        """
+        Give near-duplicates linked to chunks that are about to be removed an embedding
+        of their own. The first duplicate of each canonical chunk gets a copy of its vector,
+        without an embedding call, and the other duplicates are re-pointed to it.
+        Call before deleting the chunks, since deleting a chunk unlinks its duplicates.
+
+        Args:
+            chunk_ids: Identifiers of the chunks being removed
+
+        Returns:
+            List of stored Embedding rows for the promoted chunks, ready for batch_index()
+        """
+        stale_chunk_ids = [str(chunk_id) for chunk_id in chunk_ids]
+        if not stale_chunk_ids:
+            return []
+        dependents = self.db.query(Chunk).filter(
+            Chunk.canonical_chunk_id.in_(stale_chunk_ids), ~Chunk.id.in_(stale_chunk_ids)
+        ).order_by(Chunk.created_at, Chunk.sequence).all()
+        if not dependents:
+            return []
+
+        vectors = {
+            str(chunk_id): vector
+            for chunk_id, vector in self.db.query(Embedding.chunk_id, Embedding.vector).filter(
+                Embedding.chunk_id.in_(stale_chunk_ids)
+            )
+        }
+        successors: Dict[str, str] = {}
+        embeddings = []
+        try:
+            for chunk in dependents:
+                canonical_chunk_id = str(chunk.canonical_chunk_id)
+                if canonical_chunk_id in successors:
+                    chunk.canonical_chunk_id = successors[canonical_chunk_id]
+                    continue
+                vector = vectors.get(canonical_chunk_id)
+                if vector is None:
+                    continue
+                embedding = Embedding(chunk.id, decode_vector(vector))
+                embedding.chunk = chunk
+                chunk.canonical_chunk_id = None
+                self.db.add(embedding)
+                embeddings.append(embedding)
+                successors[canonical_chunk_id] = chunk.id
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        if embeddings:
+            self.db.query(Embedding).filter(
+                Embedding.id.in_([embedding.id for embedding in embeddings])
+            ).all()
+        logger.info(
+            "Near-duplicate chunks promoted",
+            extra={'promoted_count': len(embeddings),
+                   'relinked_count': len(dependents) - len(embeddings)}
+        )
+        return embeddings
+
+    async def link_near_duplicates(self, chunk_ids: List[str], contents: List[str], tenant_id: str,
+                                   document_id: Optional[str] = None) -> Dict[str, str]:
+        """
+        Link chunks that nearly duplicate an indexed chunk of the tenant, or an earlier
+        chunk of the same batch, to that canonical chunk so they need not be embedded.
+        The tenant detector is built from the database off the event loop on first use.
+
+        Args:
+            chunk_ids: Identifiers of the new chunks, e.g. positions within a document
+            contents: Chunk text aligned with chunk_ids
+            tenant_id: Client/tenant identifier
+            document_id: Optional document being reprocessed, whose current chunks are
+                never used as canonical since they are about to be replaced
+
+        Returns:
+            Dict mapping each duplicate chunk ID to its canonical chunk ID
+        """
+        if not self.DEDUP_ENABLED or not chunk_ids:
+            return {}
+
+        def link() -> Dict[str, str]:
+            exclude = set(self.document_chunk_ids(document_id)) if document_id is not None else None
+            return self._get_duplicate_index(tenant_id).link(chunk_ids, contents, exclude=exclude)
+
+        duplicates = await asyncio.to_thread(link)
+        logger.info(
+            "Near-duplicate chunks linked",
+            extra={'tenant_id': tenant_id, 'chunk_count': len(chunk_ids),
+                   'duplicate_count': len(duplicates)}
+        )
+        return duplicates
+
+    @_holds_session
+    def document_chunk_ids(self, document_id: str) -> List[str]:
+        """
+        Look up the chunk IDs of a document.
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            List of chunk identifiers
+        """
+        return [
+            str(chunk_id)
+            for (chunk_id,) in self.db.query(Chunk.id).filter(Chunk.document_id == document_id)
+        ]
+
+    @_holds_session
+    def document_embedding_ids(self, document_id: str) -> List[str]:
+        """
+        Look up the embedding IDs of a document's chunks.
+        Call before deleting the document, since the embedding rows are deleted with it.
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            List of embedding identifiers
+        """
+        return [
+            str(embedding_id)
+            for (embedding_id,) in self.db.query(Embedding.id).join(
+                Chunk, Embedding.chunk_id == Chunk.id
+            ).filter(Chunk.document_id == document_id)
+        ]
+
+    @_holds_session
+    def _stale_chunk_ids(self, document_id: str, keep_embedding_ids: Set[str],
+                         keep_chunk_ids: Set[str]) -> List[str]:
+        """Look up a document's chunks other than the kept ones and the kept embeddings' chunks."""
+        kept_chunk_ids = self.db.query(Embedding.chunk_id).filter(
+            Embedding.id.in_(list(keep_embedding_ids))
+        )
+        return [
+            str(chunk_id)
+            for (chunk_id,) in self.db.query(Chunk.id).filter(
+                Chunk.document_id == document_id,
+                ~Chunk.id.in_(kept_chunk_ids),
+                ~Chunk.id.in_(list(keep_chunk_ids))
+            )
+        ]
+
+    @_holds_session
+    def _delete_stale_chunks(self, document_id: str, keep_embedding_ids: Set[str],
+                             keep_chunk_ids: Optional[Set[str]] = None) -> int:
+        """Delete a document's chunks other than the kept ones and the kept embeddings' chunks."""
+        kept_chunk_ids = self.db.query(Embedding.chunk_id).filter(
+            Embedding.id.in_(list(keep_embedding_ids))
+        )
+        try:
+            # Embedding rows go with their chunks through the ON DELETE CASCADE foreign key
+            deleted = self.db.query(Chunk).filter(
+                Chunk.document_id == document_id,
+                ~Chunk.id.in_(kept_chunk_ids),
+                ~Chunk.id.in_(list(keep_chunk_ids or ()))
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return deleted
+
+    def clear_index(self, tenant_id: str) -> None:
+        """
+        Drop the tenant index so it is rebuilt from the database on next use.
+
+        Args:
+            tenant_id: Client/tenant identifier
+        """
+        self._registry.drop(tenant_id)
+        self._lexical_registry.drop(tenant_id)
+        self._duplicate_registry.drop(tenant_id)
+        logger.info(f"Cleared vector index for tenant {tenant_id}")
+
+    def warm_up(self, on_complete: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """
+        Load the most active tenants' indices on a background thread, e.g. at startup.
+        The service's database session must stay open until on_complete runs.
+
+        Args:
+            on_complete: Optional callable run when warm-up finishes, e.g. closing the session
+
+        Returns:
+            threading.Thread: Started warm-up thread
+        """
+        return self._registry.warm_up(self._tenant_loaders, on_complete=on_complete)
+
+    def _get_tenant_index(self, tenant_id: str) -> TenantIndex:
+        """
+        Get the shared index for a tenant, loading its embeddings once per process.
+
+        Args:
+            tenant_id: Client/tenant identifier
+
+        Returns:
+            TenantIndex: Shared tenant index
+        """
+        return self._registry.get_or_build(tenant_id, *self._tenant_loaders(tenant_id))
+
+    def _tenant_loaders(self, tenant_id: str) -> Tuple[Callable, Callable, Callable]:
+        """Return the (loader, delta_loader, id_loader) triple that reads a tenant's embeddings."""
+        return (
+            lambda: self._load_tenant_vectors(tenant_id),
+            lambda since: self._load_tenant_vectors(tenant_id, since=since),
+            lambda: self._load_tenant_embedding_ids(tenant_id)
+        )
+
+    def _hierarchical_documents(self, tenant_index: TenantIndex, query_embedding: np.ndarray,
+                                filters: Optional[Dict]) -> Optional[List[str]]:
+        """
+        Select the documents whose centroids are closest to the query, to restrict the
+        vector search to their chunks once a tenant has enough documents for it to pay off.
+        The selection is passed to the index separately from the filters, so it does not
+        build or cache a filter bitmap per query and queries still share micro-batches.
+        Lexical matches are not restricted, so exact codes in other documents still surface.
+
+        Args:
+            tenant_index: Tenant index being searched
+            query_embedding: Query vector
+            filters: Optional metadata filters from the caller
+
+        Returns:
+            Optional[List[str]]: Document IDs to search within, None to search them all
+        """
+        if not self.HIERARCHICAL_ENABLED or \
+                tenant_index.document_count < self.HIERARCHICAL_MIN_DOCUMENTS:
+            return None
+
+        documents = tenant_index.top_documents(
+            query_embedding, self.HIERARCHICAL_TOP_DOCUMENTS, filters
+        )[0]
+        HIERARCHICAL_SEARCHES.inc()
+        return documents
+
+    @_holds_session
+    def _hydrate_chunks(self, chunk_ids: List[str]) -> Dict[str, ChunkRecord]:
+        """
+        Load the columns search results need for the given chunks with a single IN query.
+
+        Args:
+            chunk_ids: Chunk identifiers of the final hits
+
+        Returns:
+            Dict mapping chunk_id to its ChunkRecord; chunks deleted since indexing are absent
+        """
+        if not chunk_ids:
+            return {}
+
+        rows = self.db.query(
+            Chunk.id, Chunk.document_id, Chunk.content, Chunk.metadata
+        ).filter(
+            Chunk.id.in_(chunk_ids)
+        )
+        return {
+            str(chunk_id): ChunkRecord(str(chunk_id), str(document_id), content, metadata)
+            for chunk_id, document_id, content, metadata in rows
+        }
+
+    @_holds_session
+    def _load_chunk_documents(self, chunk_ids: List[str]) -> Dict[str, Tuple[str, str, datetime]]:
+        """
+        Load the document attributes metadata filters need for the given chunks with a
+        single IN query.
+
+        Args:
+            chunk_ids: Chunk identifiers being indexed
+
+        Returns:
+            Dict mapping chunk_id to (document_id, document_type, created_at)
+        """
+        if not chunk_ids:
+            return {}
+
+        rows = self.db.query(
+            Chunk.id, Document.id, Document.type, Document.created_at
+        ).join(
+            Document, Chunk.document_id == Document.id
+        ).filter(
+            Chunk.id.in_(chunk_ids)
+        )
+        return {
+            str(chunk_id): (str(document_id), document_type, created_at)
+            for chunk_id, document_id, document_type, created_at in rows
+        }
+
+    def _fuse_lexical(self, hits: List[Tuple[str, float]], query_embedding: np.ndarray,
+                      query_text: str, tenant_id: str, top_k: int,
+                      tenant_index: Optional[TenantIndex] = None,
+                      filters: Optional[Dict] = None
+                      ) -> Tuple[List[Tuple[str, float]], Dict[str, float], Dict[str, float]]:
+        """
+        Fuse vector hits with BM25 hits by reciprocal-rank fusion.
+        Lexical matches bypass the similarity threshold; their cosine similarity is
+        computed from the stored unit vectors so every result carries a real score.
+
+        Args:
+            hits: Vector (chunk_id, similarity) hits above the threshold, best first
+            query_embedding: Query vector
+            query_text: Query text
+            tenant_id: Client/tenant identifier
+            top_k: Number of fused results
+            tenant_index: Tenant index used to apply metadata filters to lexical hits
+            filters: Optional metadata filters
+
+        Returns:
+            Tuple of (fused (chunk_id, similarity) hits, lexical scores, fusion scores)
+        """
+        lexical_hits = self._get_lexical_index(tenant_id).search(
+            query_text, max(top_k, self.HYBRID_CANDIDATES)
+        )
+        if filters and tenant_index is not None:
+            allowed = set(tenant_index.filter_chunk_ids([chunk_id for chunk_id, _ in lexical_hits],
+                                                        filters))
+            # Linked near-duplicates have no vector in the index; match them against their
+            # own document
+            allowed.update(self._filter_linked_chunks(
+                [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in allowed], filters
+            ))
+            lexical_hits = [(chunk_id, score) for chunk_id, score in lexical_hits
+                            if chunk_id in allowed]
+        fused = reciprocal_rank_fusion(
+            [[chunk_id for chunk_id, _ in hits], [chunk_id for chunk_id, _ in lexical_hits]],
+            k=self.RRF_K
+        )[:top_k]
+
+        similarities = dict(hits)
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in similarities]
+        if missing:
+            similarities.update(self._chunk_similarities(query_embedding, missing))
+
+        return (
+            [(chunk_id, similarities.get(chunk_id, 0.0)) for chunk_id, _ in fused],
+            dict(lexical_hits),
+            dict(fused)
+        )
+
+    @_holds_session
+    def _chunk_similarities(self, query_embedding: np.ndarray,
+                            chunk_ids: List[str]) -> Dict[str, float]:
+        """
+        Compute cosine similarity between the query and stored chunk vectors.
+        Linked near-duplicates are scored with their canonical chunk's vector.
+
+        Args:
+            query_embedding: Query vector
+            chunk_ids: Chunk identifiers
+
+        Returns:
+            Dict mapping chunk_id to similarity
+        """
+        rows = self.db.query(Chunk.id, Embedding.vector).join(
+            Embedding, Embedding.chunk_id == func.coalesce(Chunk.canonical_chunk_id, Chunk.id)
+        ).filter(
+            Chunk.id.in_(chunk_ids)
+        ).all()
+        if not rows:
+            return {}
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-8)
+        # Stored vectors are unit length, so one matrix product gives the cosines
+        vectors = decode_vector(b''.join(vector for _, vector in rows))
+        vectors = vectors.reshape(-1, self.VECTOR_DIMENSION)
+        return {str(chunk_id): float(score) for (chunk_id, _), score in zip(rows, vectors @ query)}
+
+    @_holds_session
+    def _filter_linked_chunks(self, chunk_ids: List[str], filters: Dict) -> List[str]:
+        """
+        Keep the linked near-duplicate chunks whose own documents match metadata filters.
+
+        Args:
+            chunk_ids: Chunk identifiers the tenant index could not match
+            filters: Metadata filters, see filter_key()
+
+        Returns:
+            List of matching linked chunk identifiers
+        """
+        if not chunk_ids:
+            return []
+
+        query = self.db.query(Chunk.id).join(
+            Document, Chunk.document_id == Document.id
+        ).filter(
+            Chunk.id.in_(chunk_ids), Chunk.canonical_chunk_id.isnot(None)
+        )
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name == 'created_after':
+                query = query.filter(Document.created_at >= value)
+            elif name == 'created_before':
+                query = query.filter(Document.created_at < value)
+            else:
+                scalar = isinstance(value, str) or not hasattr(value, '__iter__')
+                values = [value] if scalar else list(value)
+                column = Document.id if name == 'document_id' else Document.type
+                query = query.filter(column.in_(values))
+        return [str(chunk_id) for (chunk_id,) in query]
+
+    def _get_lexical_index(self, tenant_id: str) -> LexicalIndex:
+        """
+        Get the shared BM25 index for a tenant, loading its chunks once per process.
+
+        Args:
+            tenant_id: Client/tenant identifier
+
+        Returns:
+            LexicalIndex: Shared tenant lexical index
+        """
+        return self._lexical_registry.get_or_build(
+            tenant_id, lambda: self._load_tenant_chunks(tenant_id, include_linked=True)
+        )
+
+    def _get_duplicate_index(self, tenant_id: str) -> NearDuplicateIndex:
+        """
+        Get the shared near-duplicate detector for a tenant, loading its chunks once per process.
+
+        Args:
+            tenant_id: Client/tenant identifier
+
+        Returns:
+            NearDuplicateIndex: Shared tenant detector
+        """
+        return self._duplicate_registry.get_or_build(
+            tenant_id, lambda: self._load_tenant_chunks(tenant_id)
+        )
+
+    @_holds_session
+    def _load_tenant_chunks(self, tenant_id: str,
+                            include_linked: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        Stream a tenant's embedded chunk text from the database.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            include_linked: Whether to include near-duplicates linked to a canonical chunk
+
+        Returns:
+            Tuple of (chunk_ids, contents)
+        """
+        query = self.db.query(Chunk.id, Chunk.content)
+        if include_linked:
+            query = query.outerjoin(Embedding, Embedding.chunk_id == Chunk.id).filter(
+                or_(Embedding.id.isnot(None), Chunk.canonical_chunk_id.isnot(None))
+            )
+        else:
+            query = query.join(Embedding, Embedding.chunk_id == Chunk.id)
+        rows = query.filter(
+            Chunk.document.has(client_id=tenant_id)
+        ).yield_per(LOAD_BATCH_SIZE)
+
+        chunk_ids, contents = [], []
+        for chunk_id, content in rows:
+            chunk_ids.append(str(chunk_id))
+            contents.append(content)
+        return chunk_ids, contents
+
+    @_holds_session
+    def _load_tenant_vectors(self, tenant_id: str, since: Optional[datetime] = None):
+        """
+        Stream a tenant's embeddings from the database without hydrating ORM objects.
+
+        Args:
+            tenant_id: Client/tenant identifier
+            since: Optional watermark, only embeddings created at or after it are loaded
+
+        Returns:
+            Tuple of (vectors, chunk_ids, embedding_ids, documents) where documents holds
+            (document_id, document_type, created_at) for metadata filters
+        """
+        query = self.db.query(
+            Embedding.id, Embedding.chunk_id, Embedding.vector,
+            Document.id, Document.type, Document.created_at
+        ).join(
+            Chunk, Embedding.chunk_id == Chunk.id
+        ).join(
+            Document, Chunk.document_id == Document.id
+        ).filter(
+            Document.client_id == tenant_id
+        )
+        if since is not None:
+            query = query.filter(Embedding.created_at >= since)
+        rows = query.yield_per(LOAD_BATCH_SIZE)
+
+        buffers, chunk_ids, embedding_ids, documents = [], [], [], []
+        for embedding_id, chunk_id, vector, document_id, document_type, created_at in rows:
+            buffers.append(vector)
+            chunk_ids.append(str(chunk_id))
+            embedding_ids.append(str(embedding_id))
+            documents.append((str(document_id), document_type, created_at))
+
+        # One join and one frombuffer instead of boxing every float
+        vectors = decode_vector(b''.join(buffers)).reshape(-1, self.VECTOR_DIMENSION)
+        return vectors, chunk_ids, embedding_ids, documents
+
+    @_holds_session
+    def _load_tenant_embedding_ids(self, tenant_id: str) -> List[str]:
+        """
+        Load the IDs of every embedding a tenant currently has, to drop vectors
+        deleted since the tenant's snapshot was written.
+
+        Args:
+            tenant_id: Client/tenant identifier
+
+        Returns:
+            List of embedding identifiers
+        """
+        rows = self.db.query(Embedding.id).join(
+            Chunk, Embedding.chunk_id == Chunk.id
+        ).join(
+            Document, Chunk.document_id == Document.id
+        ).filter(
+            Document.client_id == tenant_id
+        ).yield_per(LOAD_BATCH_SIZE)
+        return [str(embedding_id) for embedding_id, in rows]
+
+    @_holds_session
+    def _fetch_vectors(self, embedding_ids: List[str]) -> np.ndarray:
+        """
+        Fetch full-precision vectors for reranking quantized search candidates.
+
+        Args:
+            embedding_ids: Embedding identifiers to fetch
+
+        Returns:
+            numpy.ndarray: Matrix of vectors aligned with embedding_ids
+        """
+        rows = self.db.query(Embedding.id, Embedding.vector).filter(
+            Embedding.id.in_(embedding_ids)
+        ).all()
+        by_id = {str(embedding_id): vector for embedding_id, vector in rows}
+
+        vectors = np.zeros((len(embedding_ids), self.VECTOR_DIMENSION), dtype=np.float32)
+        for i, embedding_id in enumerate(embedding_ids):
+            vector = by_id.get(str(embedding_id))
+            if vector is not None:
+                vectors[i] = decode_vector(vector)
+        return vectors
+
 def cosine_similarity(vector_a: np.ndarray, vector_b: np.ndarray) -> float:
     """
     Calculate cosine similarity with optimized numpy operations.
@@ -6,25 +6,24 @@ Version: 1.0.0
 """
 
 import logging
-import numpy as np  # version: ^1.24.0
 from uuid import UUID
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
+import numpy as np  # version: ^1.24.0
 from tenacity import retry, stop_after_attempt, wait_exponential  # version: ^8.2.0
-import openai  # version: ^1.3.0
 from prometheus_client import Counter  # version: ^0.17.0
 
 from app.tasks.celery_app import celery_app
 from app.services.vector_search import VectorSearchService
+from app.services.ai_service import embedding_batch_splits, embedding_input_failures, is_input_error
+from app.services.embedding_packer import count_tokens, get_packing_budgets, pack_requests
+from app.services.embedding_provider import EmbeddingProvider, get_embedding_provider
 from app.models.embedding import Embedding
 
 # Configure module logger
 logger = logging.getLogger(__name__)
 
 # Constants from technical specifications
-BATCH_SIZE = 32
-EMBEDDING_MODEL = "text-embedding-ada-002"
-EMBEDDING_DIMENSION = 1536
 MAX_RETRIES = 3
 RETRY_DELAY = 5
 
@@ -34,6 +33,32 @@ embedding_generation_counter = Counter(
     'Total number of embeddings generated'
 )
 
+
+def _embed_or_split(provider: EmbeddingProvider, texts: List[str],
+                    headers: Dict) -> List[Optional[np.ndarray]]:
+    """
+    Embed texts in one request, halving it while the API rejects its inputs, so one
+    oversized chunk is skipped instead of failing and retrying the whole task.
+
+    Returns:
+        List of vectors aligned with texts, None where an input was rejected on its own
+    """
+    try:
+        return provider.embed(texts, headers=headers)
+
+    except Exception as e:
+        if not is_input_error(e):
+            raise
+        if len(texts) == 1:
+            embedding_input_failures.inc()
+            return [None]
+
+        embedding_batch_splits.inc()
+        middle = len(texts) // 2
+        return (_embed_or_split(provider, texts[:middle], headers)
+                + _embed_or_split(provider, texts[middle:], headers))
+
+
 @celery_app.task(
     name='tasks.generate_embeddings',
     queue='embedding',
@@ -55,43 +80,59 @@ def generate_embeddings(chunks: List[Dict], tenant_id: UUID) -> List[Dict]:
     Returns:
         List of generated embeddings with metadata and validation status
     """
+    budgets = get_packing_budgets()
     logger.info(
         "Starting embedding generation task",
         extra={
             'tenant_id': str(tenant_id),
             'chunk_count': len(chunks),
-            'batch_size': BATCH_SIZE
+            'max_request_tokens': budgets['max_tokens']
         }
     )
 
     results = []
     start_time = datetime.utcnow()
+    provider = get_embedding_provider()
 
     try:
-        # Process chunks in optimized batches
-        for i in range(0, len(chunks), BATCH_SIZE):
-            batch = chunks[i:i + BATCH_SIZE]
+        # Pack chunks into requests by token count up to the per-request budgets
+        token_counts = count_tokens([chunk['content'] for chunk in chunks], provider.model)
+        requests = pack_requests(token_counts, **budgets)
+
+        for batch_index, (start, end) in enumerate(requests):
+            batch = chunks[start:end]
             batch_texts = [chunk['content'] for chunk in batch]
 
-            # Generate embeddings with OpenAI API
-            response = openai.Embedding.create(
-                input=batch_texts,
-                model=EMBEDDING_MODEL
+            # Generate embeddings with the configured provider, one request per batch
+            batch_vectors = _embed_or_split(
+                provider,
+                batch_texts,
+                headers={'X-Tenant-ID': str(tenant_id)}
             )
 
             # Process and validate embeddings
-            for j, embedding_data in enumerate(response['data']):
-                chunk = batch[j]
-                embedding_vector = np.array(embedding_data['embedding'])
+            batch_tokens = token_counts[start:end]
+            for chunk, embedding_vector, token_count in zip(batch, batch_vectors, batch_tokens):
+                # Skip chunks the API rejects even on their own, e.g. over the token limit
+                if embedding_vector is None:
+                    logger.warning(
+                        "Embedding input rejected",
+                        extra={
+                            'tenant_id': str(tenant_id),
+                            'chunk_id': chunk.get('id'),
+                            'token_count': token_count
+                        }
+                    )
+                    continue
 
                 # Validate embedding dimension
-                if embedding_vector.shape[0] != EMBEDDING_DIMENSION:
+                if embedding_vector.shape[0] != provider.dimension:
                     logger.error(
                         "Invalid embedding dimension",
                         extra={
                             'tenant_id': str(tenant_id),
                             'chunk_id': chunk.get('id'),
-                            'expected_dim': EMBEDDING_DIMENSION,
+                            'expected_dim': provider.dimension,
                             'actual_dim': embedding_vector.shape[0]
                         }
                     )
@@ -102,9 +143,9 @@ def generate_embeddings(chunks: List[Dict], tenant_id: UUID) -> List[Dict]:
                     chunk_id=chunk['id'],
                     embedding_vector=embedding_vector,
                     metadata={
-                        'model': EMBEDDING_MODEL,
+                        'model': provider.model,
                         'processing_time': (datetime.utcnow() - start_time).total_seconds(),
-                        'token_count': embedding_data['token_count']
+                        'token_count': token_count
                     }
                 )
 
@@ -115,7 +156,8 @@ def generate_embeddings(chunks: List[Dict], tenant_id: UUID) -> List[Dict]:
                 f"Processed batch of {len(batch)} chunks",
                 extra={
                     'tenant_id': str(tenant_id),
-                    'batch_index': i // BATCH_SIZE
+                    'batch_index': batch_index,
+                    'token_count': sum(batch_tokens)
                 }
             )
 
@@ -167,10 +209,11 @@ def index_embeddings(embedding_ids: List[UUID], tenant_id: UUID) -> bool:
         ).all()
 
         # Validate embeddings
+        dimension = get_embedding_provider().dimension
         valid_embeddings = []
         for emb in embeddings:
             vector = emb.get_vector()
-            if vector.shape[0] == EMBEDDING_DIMENSION:
+            if vector.shape[0] == dimension:
                 valid_embeddings.append(emb)
             else:
                 logger.warning(
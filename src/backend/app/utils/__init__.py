@@ -27,7 +27,8 @@ from .document_utils import (
 # Import vector operation utilities
 from .vector_utils import (
     calculate_cosine_similarity,
-    batch_similarity_search
+    batch_similarity_search,
+    batch_similarity_search_matrix
 )
 
 # Define package exports
@@ -47,7 +48,8 @@ __all__ = [
     
     # Vector operation utilities
     'calculate_cosine_similarity',
-    'batch_similarity_search'
+    'batch_similarity_search',
+    'batch_similarity_search_matrix'
 ]
 
 # Package metadata
@@ -9,7 +9,7 @@ logging - Comprehensive logging for error tracking and performance monitoring
 
 import numpy as np
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
@@ -133,13 +133,90 @@ def calculate_cosine_similarity(vector1: np.ndarray, vector2: np.ndarray) -> flo
         logger.error(f"Error during cosine similarity calculation: {str(e)}")
         raise
 
-def batch_similarity_search(query_vector: np.ndarray, vector_list: List[np.ndarray]) -> List[Tuple[int, float]]:
+def normalize_matrix(matrix: np.ndarray) -> np.ndarray:
     """
-    Performs memory-efficient batch similarity search between query vector and multiple vectors.
+    Normalizes every row of a matrix to unit length in a single vectorized pass.
+    Zero rows are left as zero vectors, matching normalize_vector.
+    
+    Args:
+        matrix (np.ndarray): Input matrix of shape (N, d)
+        
+    Returns:
+        np.ndarray: Contiguous float32 matrix with unit-length rows
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms >= EPSILON)
+
+def batch_similarity_search_matrix(query_vectors: np.ndarray, matrix: np.ndarray,
+                                   top_k: Optional[int] = None,
+                                   threshold: float = SIMILARITY_THRESHOLD,
+                                   normalized: bool = False) -> List[List[Tuple[int, float]]]:
+    """
+    Vectorized similarity search of one or more queries against a contiguous vector matrix.
+    Scores every row with a single matrix product, applies the threshold as a mask and
+    selects top-k with argpartition instead of a full sort.
+    
+    Args:
+        query_vectors (np.ndarray): Query of shape (d,) or batch of queries of shape (Q, d)
+        matrix (np.ndarray): Vectors to search of shape (N, d), ideally contiguous float32
+        top_k (Optional[int]): Maximum results per query, None returns every match
+        threshold (float): Minimum similarity score for a match
+        normalized (bool): Skip normalization when matrix rows are already unit length
+        
+    Returns:
+        List[List[Tuple[int, float]]]: Per query, (row_index, similarity_score) tuples sorted
+        by descending score
+        
+    Raises:
+        ValueError: If the query or matrix shape does not match VECTOR_DIMENSION
+    """
+    queries = np.asarray(query_vectors, dtype=np.float32)
+    queries = queries.reshape(1, -1) if queries.ndim == 1 else queries
+    if queries.ndim != 2 or queries.shape[1] != VECTOR_DIMENSION:
+        raise ValueError(
+            f"Query vectors must have shape (Q, {VECTOR_DIMENSION}), got {queries.shape}"
+        )
+    if matrix.ndim != 2 or matrix.shape[1] != VECTOR_DIMENSION:
+        raise ValueError(
+            f"Vector matrix must have shape (N, {VECTOR_DIMENSION}), got {matrix.shape}"
+        )
+
+    if not normalized:
+        matrix = normalize_matrix(matrix)
+    scores = normalize_matrix(queries) @ matrix.T
+    np.clip(scores, -1.0, 1.0, out=scores)
+
+    # Masked scores never survive the threshold filter below
+    scores[scores < threshold] = -np.inf
+
+    partial = top_k is not None and top_k < scores.shape[1]
+    if partial:
+        top_candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+
+    results = []
+    for row, row_scores in enumerate(scores):
+        candidates = top_candidates[row] if partial else np.arange(len(row_scores))
+        candidates = candidates[np.isfinite(row_scores[candidates])]
+        candidates = candidates[np.argsort(-row_scores[candidates], kind='stable')]
+        results.append(list(zip(candidates.tolist(), row_scores[candidates].tolist())))
+
+    return results
+
+def batch_similarity_search(query_vector: np.ndarray,
+                            vector_list: Union[np.ndarray, List[np.ndarray]],
+                            top_k: Optional[int] = None,
+                            threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[int, float]]:
+    """
+    Performs batch similarity search between a query vector and multiple vectors.
+    An (N, d) matrix is searched directly; a list of vectors is stacked once, skipping
+    vectors with invalid dimensions.
     
     Args:
         query_vector (np.ndarray): Query vector to compare against
-        vector_list (List[np.ndarray]): List of vectors to search through
+        vector_list (Union[np.ndarray, List[np.ndarray]]): Matrix or list of vectors to search
+        top_k (Optional[int]): Maximum number of results, None returns every match
+        threshold (float): Minimum similarity score for a match
         
     Returns:
         List[Tuple[int, float]]: Sorted list of (index, similarity_score) tuples above threshold
@@ -147,45 +224,32 @@ def batch_similarity_search(query_vector: np.ndarray, vector_list: List[np.ndarr
     Raises:
         ValueError: If vector validation fails or input list is empty
     """
-    logger.debug(f"Starting batch similarity search with {len(vector_list)} vectors")
-    
-    if not vector_list:
+    if len(vector_list) == 0:
         error_msg = "Empty vector list provided for batch search"
         logger.error(error_msg)
         raise ValueError(error_msg)
-    
+
+    if not validate_vector_dimension(query_vector):
+        error_msg = "Invalid query vector dimension"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
     try:
-        # Validate query vector
-        if not validate_vector_dimension(query_vector):
-            error_msg = "Invalid query vector dimension"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
-        
-        # Normalize query vector once
-        normalized_query = normalize_vector(query_vector)
-        results = []
-        
-        # Process in batches
-        for i in range(0, len(vector_list), BATCH_SIZE):
-            batch = vector_list[i:i + BATCH_SIZE]
-            logger.debug(f"Processing batch {i//BATCH_SIZE + 1}")
-            
-            for j, vector in enumerate(batch):
-                try:
-                    if validate_vector_dimension(vector):
-                        similarity = calculate_cosine_similarity(normalized_query, vector)
-                        if similarity >= SIMILARITY_THRESHOLD:
-                            results.append((i + j, similarity))
-                except Exception as e:
-                    logger.warning(f"Skipping vector {i + j} due to error: {str(e)}")
-                    continue
-        
-        # Sort results by similarity score in descending order
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        logger.debug(f"Batch similarity search completed. Found {len(results)} matches above threshold")
-        return results
-        
+        if isinstance(vector_list, np.ndarray) and vector_list.ndim == 2:
+            return batch_similarity_search_matrix(query_vector, vector_list, top_k, threshold)[0]
+
+        positions = [i for i, vector in enumerate(vector_list) if validate_vector_dimension(vector)]
+        if len(positions) < len(vector_list):
+            logger.warning(
+                f"Skipping {len(vector_list) - len(positions)} vectors with invalid dimensions"
+            )
+        if not positions:
+            return []
+
+        matrix = np.vstack([vector_list[i] for i in positions]).astype(np.float32, copy=False)
+        results = batch_similarity_search_matrix(query_vector, matrix, top_k, threshold)[0]
+        return [(positions[row], score) for row, score in results]
+
     except Exception as e:
         logger.error(f"Error during batch similarity search: {str(e)}")
-        raise
\ No newline at end of file
+        raise
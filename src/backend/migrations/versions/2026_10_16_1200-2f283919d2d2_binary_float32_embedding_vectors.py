@@ -0,0 +1,117 @@
+"""binary float32 embedding vectors
+
+Revision ID: 2f283919d2d2
+Revises: None
+Create Date: 2026-10-16 12:00:00
+
+Replaces the float8[] embeddings.embedding column with a unit-length float32 bytea
+column (embeddings.vector), backfilling existing rows in batches so the table is never
+loaded into memory at once.
+"""
+import logging
+from typing import Optional, List
+
+import numpy as np  # version: ^1.24.0
+from alembic import op  # version: 1.12.0
+import sqlalchemy as sa  # version: 2.0.0
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+# Configure migration logger
+logger = logging.getLogger('alembic.migration')
+
+# Revision identifiers
+revision: str = '2f283919d2d2'
+down_revision: Optional[str] = None
+branch_labels: Optional[List[str]] = None
+depends_on: Optional[List[str]] = None
+
+# Rows converted per round trip during backfill
+BACKFILL_BATCH_SIZE = 1000
+EPSILON = 1e-8
+
+def encode_vector(values: List[float]) -> bytes:
+    """
+    Encode a float array as unit-length little-endian float32 bytes.
+    Kept local so the migration does not change if the model helpers do.
+    """
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm >= EPSILON:
+        vector = vector / norm
+    return vector.astype('<f4', copy=False).tobytes()
+
+def convert_in_batches(connection: Connection, source: str, target: str, convert) -> int:
+    """
+    Convert one embeddings column into another in keyset-paginated batches.
+
+    Args:
+        connection: SQLAlchemy connection object
+        source: Column to read
+        target: Column to write
+        convert: Function mapping a source value to a target value
+
+    Returns:
+        int: Number of rows converted
+    """
+    converted = 0
+    last_id = None
+    while True:
+        query = f"SELECT id, {source} FROM embeddings WHERE {source} IS NOT NULL"
+        params = {'limit': BACKFILL_BATCH_SIZE}
+        if last_id is not None:
+            query += " AND id > :last_id"
+            params['last_id'] = last_id
+        rows = connection.execute(sa.text(query + " ORDER BY id LIMIT :limit"), params).fetchall()
+        if not rows:
+            return converted
+
+        connection.execute(
+            sa.text(f"UPDATE embeddings SET {target} = :value WHERE id = :id"),
+            [{'id': row_id, 'value': convert(value)} for row_id, value in rows]
+        )
+        converted += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"Converted {converted} embeddings from {source} to {target}")
+
+def upgrade() -> None:
+    """
+    Add the binary vector column, backfill it and drop the float8[] column.
+    """
+    try:
+        connection = op.get_bind()
+        logger.info(f"Starting upgrade migration {revision}")
+
+        op.add_column('embeddings', sa.Column('vector', sa.LargeBinary(), nullable=True))
+        convert_in_batches(connection, 'embedding', 'vector', encode_vector)
+        op.alter_column('embeddings', 'vector', nullable=False)
+        op.drop_column('embeddings', 'embedding')
+
+        logger.info(f"Completed upgrade migration {revision}")
+
+    except SQLAlchemyError as e:
+        logger.error(f"Migration failed: {str(e)}")
+        raise
+
+def downgrade() -> None:
+    """
+    Restore the float8[] column from the binary vectors. Values stay unit length.
+    """
+    try:
+        connection = op.get_bind()
+        logger.info(f"Starting downgrade migration {revision}")
+
+        op.add_column('embeddings', sa.Column('embedding', postgresql.ARRAY(sa.Float()), nullable=True))
+        convert_in_batches(
+            connection, 'vector', 'embedding',
+            lambda value: np.frombuffer(value, dtype='<f4').astype(float).tolist()
+        )
+        op.alter_column('embeddings', 'embedding', nullable=False)
+        op.drop_column('embeddings', 'vector')
+
+        logger.info(f"Completed downgrade migration {revision}")
+
+    except SQLAlchemyError as e:
+        logger.error(f"Downgrade failed: {str(e)}")
+        raise
@@ -0,0 +1,65 @@
+"""chunk canonical links
+
+Revision ID: 8c1d4b7a93f0
+Revises: 2f283919d2d2
+Create Date: 2026-10-16 13:00:00
+
+Adds chunks.canonical_chunk_id so a near-duplicate chunk stored without an embedding
+points at the chunk whose vector it shares. The link is cleared if the canonical row is
+deleted without its duplicates being promoted first.
+"""
+import logging
+from typing import Optional, List
+
+from alembic import op  # version: 1.12.0
+import sqlalchemy as sa  # version: 2.0.0
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+# Configure migration logger
+logger = logging.getLogger('alembic.migration')
+
+# Revision identifiers
+revision: str = '8c1d4b7a93f0'
+down_revision: Optional[str] = '2f283919d2d2'
+branch_labels: Optional[List[str]] = None
+depends_on: Optional[List[str]] = None
+
+def upgrade() -> None:
+    """
+    Add the nullable self-referencing canonical chunk column and its index.
+    """
+    try:
+        logger.info(f"Starting upgrade migration {revision}")
+
+        op.add_column('chunks', sa.Column('canonical_chunk_id', postgresql.UUID(), nullable=True))
+        op.create_foreign_key(
+            'fk_chunks_canonical_chunk_id', 'chunks', 'chunks',
+            ['canonical_chunk_id'], ['id'], ondelete='SET NULL'
+        )
+        op.create_index('ix_chunks_canonical_chunk_id', 'chunks', ['canonical_chunk_id'])
+
+        logger.info(f"Completed upgrade migration {revision}")
+
+    except SQLAlchemyError as e:
+        logger.error(f"Migration failed: {str(e)}")
+        raise
+
+def downgrade() -> None:
+    """
+    Drop the canonical chunk column. Linked duplicates are deleted first since they
+    have no embedding of their own and would otherwise be unreachable.
+    """
+    try:
+        logger.info(f"Starting downgrade migration {revision}")
+
+        op.execute("DELETE FROM chunks WHERE canonical_chunk_id IS NOT NULL")
+        op.drop_index('ix_chunks_canonical_chunk_id', table_name='chunks')
+        op.drop_constraint('fk_chunks_canonical_chunk_id', 'chunks', type_='foreignkey')
+        op.drop_column('chunks', 'canonical_chunk_id')
+
+        logger.info(f"Completed downgrade migration {revision}")
+
+    except SQLAlchemyError as e:
+        logger.error(f"Downgrade failed: {str(e)}")
+        raise
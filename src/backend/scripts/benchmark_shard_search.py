@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark for sharded scatter-gather vector search.
+Compares single-query latency and throughput of one tenant index against the same
+vectors split into one shard per core, pinning the process to 8/16/32 cores in turn.
+
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np  # version: ^1.24.0
+import faiss  # version: ^1.7.4
+
+from app.services.index_sharding import ShardedTenantIndex
+from app.services.vector_index import TenantIndex
+
+# Configure logging
+logger = logging.getLogger('benchmark')
+
+# Constants
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+WARMUP_QUERIES = 20
+BUILD_CHUNK_SIZE = 100000
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse benchmark command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark sharded vector search against a single index')
+    parser.add_argument('--vectors', type=int, default=1000000, help='Synthetic tenant size')
+    parser.add_argument('--dimension', type=int, default=1536, help='Vector dimension')
+    parser.add_argument('--cores', default='8,16,32',
+                        help='Comma separated core counts; each run uses one shard per core')
+    parser.add_argument('--index-type', default='flat',
+                        help='Index type for the single index and shards')
+    parser.add_argument('--queries', type=int, default=200, help='Timed queries per configuration')
+    parser.add_argument('--top-k', type=int, default=10, help='Neighbours per query')
+    parser.add_argument('--output', help='Optional path to write the JSON results to')
+    return parser.parse_args()
+
+
+def pin_cores(cores: int, available: List[int]) -> int:
+    """
+    Restrict the process, and FAISS's OpenMP pool, to the first N of the available cores.
+
+    Args:
+        cores: Requested core count
+        available: Cores the process was allowed to use at start-up
+
+    Returns:
+        int: Number of cores actually in use
+    """
+    if available:
+        os.sched_setaffinity(0, available[:cores])
+        cores = min(cores, len(available))
+    faiss.omp_set_num_threads(cores)
+    return cores
+
+
+def build(index, vectors: np.ndarray) -> float:
+    """Add vectors in chunks and return the build time in seconds."""
+    started = time.perf_counter()
+    for start in range(0, len(vectors), BUILD_CHUNK_SIZE):
+        end = start + BUILD_CHUNK_SIZE
+        ids = [str(i) for i in range(start, min(end, len(vectors)))]
+        index.add(vectors[start:end], ids, ids)
+    return time.perf_counter() - started
+
+
+def measure(index, queries: np.ndarray, top_k: int) -> Dict[str, float]:
+    """
+    Time single-query searches issued back to back.
+
+    Returns:
+        Dict: p50/p95/p99 latency in milliseconds and sequential queries per second
+    """
+    for query in queries[:WARMUP_QUERIES]:
+        index.search(query, top_k)
+
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        query_started = time.perf_counter()
+        index.search(query, top_k)
+        latencies.append(time.perf_counter() - query_started)
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3), 'qps': round(len(queries) / elapsed, 1)}
+
+
+def run(args: argparse.Namespace) -> List[Dict]:
+    """
+    Benchmark a single index and a sharded index at each core count.
+
+    Returns:
+        List of result records
+    """
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dimension), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+    params = {'index_type': args.index_type}
+
+    # Captured once, since pinning narrows the affinity mask for later runs
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+
+    results = []
+    for requested in (int(cores) for cores in args.cores.split(',')):
+        cores = pin_cores(requested, available)
+
+        single = TenantIndex('benchmark', args.dimension, params)
+        single_build = build(single, vectors)
+        baseline = measure(single, queries, args.top_k)
+        del single
+
+        with ThreadPoolExecutor(max_workers=cores, thread_name_prefix='shard-search') as executor:
+            sharded = ShardedTenantIndex('benchmark', args.dimension, {**params, 'shards': cores},
+                                         executor=executor)
+            sharded_build = build(sharded, vectors)
+            timings = measure(sharded, queries, args.top_k)
+            del sharded
+
+        record = {
+            'cores': cores,
+            'shards': cores,
+            'vectors': args.vectors,
+            'dimension': args.dimension,
+            'index_type': args.index_type,
+            'single': {**baseline, 'build_seconds': round(single_build, 2)},
+            'sharded': {**timings, 'build_seconds': round(sharded_build, 2)},
+            'p50_speedup': round(baseline['p50_ms'] / timings['p50_ms'], 2)
+        }
+        results.append(record)
+        logger.info(json.dumps(record))
+
+    return results
+
+
+def main() -> int:
+    """
+    Benchmark entry point.
+
+    Returns:
+        int: Exit code
+    """
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    try:
+        results = run(args)
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump(results, output_file, indent=2)
+        return EXIT_SUCCESS
+    except Exception as e:
+        logger.error(f"Benchmark failed: {str(e)}")
+        return EXIT_FAILURE
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Benchmark and recall suite for tenant vector indices.
+Builds synthetic tenants of each size for every index type and projection and reports build time,
+resident memory, single-query latency percentiles, batched throughput and recall@k
+against exact search as JSON. A previous report can be passed as a baseline to fail
+the run on recall or latency regressions.
+
+Version: 1.0.0
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np  # version: ^1.24.0
+import faiss  # version: ^1.7.4
+
+from app.constants import ProjectionType
+from app.services.vector_index import MIN_VECTORS_PARAM, TenantIndex
+
+# Configure logging
+logger = logging.getLogger('benchmark')
+
+# Constants
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+REPORT_VERSION = 1
+WARMUP_QUERIES = 20
+BUILD_CHUNK_SIZE = 100000
+GENERATE_CHUNK_SIZE = 100000
+CLUSTER_COUNT = 256
+CLUSTER_SPREAD = 0.6
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse benchmark command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark vector index types for speed, memory and recall')
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma separated tenant sizes')
+    parser.add_argument('--dimension', type=int, default=1536, help='Vector dimension')
+    parser.add_argument('--index-types', default='flat,ivf_flat,hnsw,sq8,ivf_pq',
+                        help='Comma separated index types to benchmark')
+    parser.add_argument('--projections', default='none',
+                        help='Comma separated projections as method:dimension, '
+                             'e.g. none,pca:256,truncate:512')
+    parser.add_argument('--params', default='{}',
+                        help='JSON object of index parameter overrides, e.g. {"nprobe": 32}')
+    parser.add_argument('--queries', type=int, default=500, help='Timed queries per configuration')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='Neighbours per query and k for recall@k')
+    parser.add_argument('--batch-size', type=int, default=32, help='Queries per batched search')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic tenants')
+    parser.add_argument('--output', help='Optional path to write the JSON report to')
+    parser.add_argument('--baseline', help='Previous JSON report to check for regressions')
+    parser.add_argument('--max-recall-drop', type=float, default=0.01,
+                        help='Allowed absolute drop in recall@k against the baseline')
+    parser.add_argument('--max-latency-increase', type=float, default=0.2,
+                        help='Allowed relative increase in p95 latency against the baseline')
+    return parser.parse_args()
+
+
+def resident_bytes() -> int:
+    """Return the current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def generate_tenant(size: int, queries: int, dimension: int,
+                    rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate clustered, normalized vectors resembling document embeddings, plus queries
+    drawn from the same distribution. Vectors are produced in chunks to bound temporaries.
+
+    Returns:
+        Tuple of (vectors, queries) matrices
+    """
+    centers = rng.standard_normal((CLUSTER_COUNT, dimension), dtype=np.float32)
+
+    def sample(count: int, out: np.ndarray) -> None:
+        for start in range(0, count, GENERATE_CHUNK_SIZE):
+            end = min(start + GENERATE_CHUNK_SIZE, count)
+            chunk = centers[rng.integers(0, CLUSTER_COUNT, end - start)]
+            chunk += CLUSTER_SPREAD * rng.standard_normal(chunk.shape, dtype=np.float32)
+            faiss.normalize_L2(chunk)
+            out[start:end] = chunk
+
+    vectors = np.empty((size, dimension), dtype=np.float32)
+    query_vectors = np.empty((queries, dimension), dtype=np.float32)
+    sample(size, vectors)
+    sample(queries, query_vectors)
+    return vectors, query_vectors
+
+
+def parse_projection(spec: str) -> Tuple[str, Optional[int]]:
+    """Split a method:dimension projection spec, e.g. pca:256, into its parts."""
+    method, _, dimension = spec.partition(':')
+    ProjectionType(method)
+    return method, int(dimension) if dimension else None
+
+
+def build(index_type: str, projection: Tuple[str, Optional[int]], vectors: np.ndarray,
+          overrides: Dict) -> Tuple[TenantIndex, float, int]:
+    """
+    Build an index of the given type and projection through the bulk-load path.
+
+    Returns:
+        Tuple of (index, build seconds, resident bytes added by the build)
+    """
+    params = {**overrides, 'index_type': index_type, 'projection': projection[0],
+              'projection_min_vectors': 1}
+    if projection[1]:
+        params['projection_dim'] = projection[1]
+    if index_type in MIN_VECTORS_PARAM:
+        params[MIN_VECTORS_PARAM[index_type]] = 1
+
+    gc.collect()
+    rss_before = resident_bytes()
+    started = time.perf_counter()
+
+    index = TenantIndex('benchmark', vectors.shape[1], params)
+    sample_size = index.training_size(len(vectors))
+    sample = vectors[np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)]
+    index.train(sample, len(vectors))
+    del sample
+    for start in range(0, len(vectors), BUILD_CHUNK_SIZE):
+        end = min(start + BUILD_CHUNK_SIZE, len(vectors))
+        ids = [str(i) for i in range(start, end)]
+        index.append(vectors[start:end], ids, ids)
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    return index, elapsed, max(0, resident_bytes() - rss_before)
+
+
+def measure_latency(search: Callable[[np.ndarray], List], queries: np.ndarray) -> Dict[str, float]:
+    """
+    Time single-query searches issued back to back.
+
+    Returns:
+        Dict: p50/p95/p99 latency in milliseconds
+    """
+    for query in queries[:WARMUP_QUERIES]:
+        search(query)
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - started)
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3)}
+
+
+def measure_batched_qps(search: Callable[[np.ndarray], List], queries: np.ndarray,
+                        batch_size: int) -> float:
+    """Return queries per second when searching batch_size queries per call."""
+    search(queries[:batch_size])
+    started = time.perf_counter()
+    for start in range(0, len(queries), batch_size):
+        search(queries[start:start + batch_size])
+    return round(len(queries) / (time.perf_counter() - started), 1)
+
+
+def recall_at_k(results: List[List[Tuple[str, float]]], exact: np.ndarray) -> float:
+    """Mean fraction of the exact top-k neighbours returned for each query."""
+    k = exact.shape[1]
+    found = [len({int(chunk_id) for chunk_id, _ in hits[:k]} & set(truth.tolist()))
+             for hits, truth in zip(results, exact)]
+    return round(float(np.mean(found)) / k, 4)
+
+
+def run(args: argparse.Namespace) -> List[Dict]:
+    """
+    Benchmark every index type and projection at every tenant size.
+
+    Returns:
+        List of result records
+    """
+    overrides = json.loads(args.params)
+    configurations = [(index_type, parse_projection(spec))
+                      for index_type in args.index_types.split(',')
+                      for spec in args.projections.split(',')]
+    rng = np.random.default_rng(args.seed)
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        vectors, queries = generate_tenant(size, args.queries, args.dimension, rng)
+        _, exact = faiss.knn(queries, vectors, args.top_k, metric=faiss.METRIC_INNER_PRODUCT)
+
+        def fetch(embedding_ids: List[str], vectors: np.ndarray = vectors) -> np.ndarray:
+            return vectors[np.array(embedding_ids, dtype=np.int64)]
+
+        for index_type, projection in configurations:
+            index, build_seconds, rss = build(index_type, projection, vectors, overrides)
+            # Quantized and projected indices rerank at full precision, as in production
+            fetcher: Optional[Callable] = fetch if index.reranks else None
+
+            def search(batch: np.ndarray, index: TenantIndex = index,
+                       fetcher: Optional[Callable] = fetcher) -> List:
+                return index.search(batch, args.top_k, vector_fetcher=fetcher)
+
+            description = index.describe()
+            record = {
+                'vectors': size,
+                'dimension': args.dimension,
+                'index_type': description['index_type'],
+                'projection': description.get('projection', ProjectionType.NONE.value),
+                'projection_dim': description.get('projection_dim', args.dimension),
+                'build_seconds': round(build_seconds, 2),
+                'rss_bytes': rss,
+                'index_bytes': description['memory_bytes'],
+                **measure_latency(search, queries),
+                'batched_qps': measure_batched_qps(search, queries, args.batch_size),
+                f'recall_at_{args.top_k}': recall_at_k(search(queries), exact),
+                'params': {name: description[name]
+                           for name in ('nlist', 'nprobe', 'hnsw_m', 'ef_search')
+                           if name in description}
+            }
+            if index.reranks:
+                record['rerank_factor'] = index.params['rerank_factor']
+            results.append(record)
+            logger.info(json.dumps(record))
+
+            # The bound defaults keep the index alive until the search function goes too
+            del index, fetcher, search
+            gc.collect()
+
+        del vectors, queries, fetch
+
+    return results
+
+
+def find_regressions(results: List[Dict], baseline: Dict, args: argparse.Namespace) -> List[str]:
+    """
+    Compare results against a baseline report with the same sizes, index types and projections.
+
+    Returns:
+        List of human-readable regression descriptions
+    """
+    recall_key = f'recall_at_{args.top_k}'
+
+    def key(record: Dict) -> Tuple:
+        return (record['vectors'], record['index_type'],
+                record.get('projection', ProjectionType.NONE.value), record.get('projection_dim'))
+
+    previous = {key(record): record for record in baseline.get('results', [])}
+
+    regressions = []
+    for record in results:
+        before = previous.get(key(record))
+        if before is None:
+            continue
+        label = (f"{record['index_type']}/{record['projection']}:{record['projection_dim']}"
+                 f" @ {record['vectors']}")
+        if recall_key in before and record[recall_key] < before[recall_key] - args.max_recall_drop:
+            regressions.append(
+                f"{label}: {recall_key} {before[recall_key]} -> {record[recall_key]}")
+        if record['p95_ms'] > before['p95_ms'] * (1 + args.max_latency_increase):
+            regressions.append(f"{label}: p95 {before['p95_ms']}ms -> {record['p95_ms']}ms")
+    return regressions
+
+
+def main() -> int:
+    """
+    Benchmark entry point.
+
+    Returns:
+        int: Exit code, failure when the run errors or regresses against the baseline
+    """
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    try:
+        results = run(args)
+        report = {
+            'version': REPORT_VERSION,
+            'created_at': datetime.utcnow().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'faiss': faiss.__version__,
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'faiss_threads': faiss.omp_get_max_threads()
+            },
+            'config': {'top_k': args.top_k, 'queries': args.queries, 'batch_size': args.batch_size,
+                       'seed': args.seed, 'params': json.loads(args.params)},
+            'results': results
+        }
+
+        if args.baseline:
+            with open(args.baseline) as baseline_file:
+                report['regressions'] = find_regressions(results, json.load(baseline_file), args)
+            for regression in report['regressions']:
+                logger.error(f"Regression: {regression}")
+
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+        return EXIT_FAILURE if report.get('regressions') else EXIT_SUCCESS
+    except Exception as e:
+        logger.error(f"Benchmark failed: {str(e)}")
+        return EXIT_FAILURE
+
+
+if __name__ == '__main__':
+    sys.exit(main())
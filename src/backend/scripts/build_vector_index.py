@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Offline bulk builder for tenant vector index snapshots.
+Streams embeddings through a named server-side cursor, trains IVF/PQ/SQ quantizers on a
+sample, adds vectors chunk by chunk and publishes the result in the on-disk snapshot
+format that API workers memory-map on start-up.
+
+Version: 1.0.0
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np  # version: ^1.24.0
+
+from app.core.config import settings
+from app.constants import VectorSearchConfig
+from app.db.session import engine
+from app.models.embedding import decode_vector
+from app.services.index_registry import TenantIndexRegistry
+from app.services.index_sharding import create_tenant_index
+from app.services.vector_index import DocumentInfo
+
+# Configure logging
+logger = logging.getLogger('build_vector_index')
+
+# Constants
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+DEFAULT_FETCH_SIZE = 20000
+SAMPLE_OVERSAMPLING = 2.0
+
+# Rows for one tenant, joined to their documents for metadata filters
+TENANT_ROWS_SQL = """
+    FROM embeddings e
+    JOIN chunks c ON c.id = e.chunk_id
+    JOIN documents d ON d.id = c.document_id
+    WHERE d.client_id = %(tenant_id)s
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse builder command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Build tenant vector index snapshots offline')
+    parser.add_argument('tenant_ids', nargs='+', help='Tenant (client) IDs to build')
+    parser.add_argument('--fetch-size', type=int, default=DEFAULT_FETCH_SIZE,
+                        help='Rows fetched from the server-side cursor per round trip')
+    parser.add_argument('--index-type', help='Override the configured index type')
+    parser.add_argument('--shards', type=int, help='Override the configured shard count')
+    parser.add_argument('--snapshot-dir', help='Override the configured snapshot directory')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    return parser.parse_args()
+
+
+def count_rows(connection, tenant_id: str) -> int:
+    """Count a tenant's embeddings."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) " + TENANT_ROWS_SQL, {'tenant_id': tenant_id})
+        return cursor.fetchone()[0]
+
+
+def fetch_sample(connection, tenant_id: str, total: int, size: int, dimension: int) -> np.ndarray:
+    """
+    Fetch a random sample of a tenant's vectors for training.
+    Uses block-level TABLESAMPLE, which reads only the sampled pages, and falls back
+    to an ORDER BY random() scan when the tenant is too sparse in the table for it.
+
+    Returns:
+        numpy.ndarray: Sample matrix of at most size rows
+    """
+    if size == 0 or total == 0:
+        return np.empty((0, dimension), dtype=np.float32)
+
+    percent = min(100.0, size / total * 100 * SAMPLE_OVERSAMPLING)
+    sampled = TENANT_ROWS_SQL.replace(
+        'FROM embeddings e', 'FROM embeddings e TABLESAMPLE SYSTEM (%(percent)s)'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT e.vector " + sampled + " LIMIT %(limit)s",
+                       {'tenant_id': tenant_id, 'percent': percent, 'limit': size})
+        rows = cursor.fetchall()
+        if len(rows) < min(size, total):
+            cursor.execute(
+                "SELECT e.vector " + TENANT_ROWS_SQL + " ORDER BY random() LIMIT %(limit)s",
+                {'tenant_id': tenant_id, 'limit': size}
+            )
+            rows = cursor.fetchall()
+
+    return decode_vector(b''.join(vector for (vector,) in rows)).reshape(-1, dimension)
+
+
+def stream_rows(
+    connection, tenant_id: str, fetch_size: int, dimension: int
+) -> Iterator[Tuple[np.ndarray, List[str], List[str], List[DocumentInfo]]]:
+    """
+    Stream a tenant's embeddings through a named (server-side) cursor.
+    Only one fetch batch is held in memory at a time.
+
+    Yields:
+        Tuple of (vectors, chunk_ids, embedding_ids, documents) per fetch batch
+    """
+    with connection.cursor(name=f"build_index_{tenant_id}".replace('-', '_')) as cursor:
+        cursor.itersize = fetch_size
+        cursor.execute(
+            "SELECT e.id, e.chunk_id, e.vector, d.id, d.type, d.created_at " + TENANT_ROWS_SQL,
+            {'tenant_id': tenant_id}
+        )
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            vectors = decode_vector(b''.join(row[2] for row in rows)).reshape(-1, dimension)
+            yield (vectors,
+                   [str(row[1]) for row in rows],
+                   [str(row[0]) for row in rows],
+                   [(str(row[3]), row[4], row[5]) for row in rows])
+
+
+def build_tenant(registry: TenantIndexRegistry, tenant_id: str, args: argparse.Namespace) -> Dict:
+    """
+    Build and publish one tenant's index snapshot.
+
+    Returns:
+        Dict: Build statistics
+    """
+    params = registry.index_params(tenant_id)
+    if args.index_type:
+        params['index_type'] = args.index_type
+    if args.shards:
+        params['shards'] = args.shards
+    index = create_tenant_index(tenant_id, registry.dimension, params)
+
+    started = time.perf_counter()
+    # Rows committed while the build runs are picked up by workers through the watermark
+    index.watermark = datetime.utcnow()
+
+    connection = engine.raw_connection()
+    try:
+        total = count_rows(connection, tenant_id)
+        sample = fetch_sample(connection, tenant_id, total, index.training_size(total),
+                              registry.dimension)
+        index.train(sample, total)
+        trained = time.perf_counter()
+        logger.info(f"Tenant {tenant_id}: trained {index.index_type} on {len(sample)} "
+                    f"of {total} vectors in {trained - started:.1f}s")
+
+        added = 0
+        for vectors, chunk_ids, embedding_ids, documents in stream_rows(
+                connection, tenant_id, args.fetch_size, registry.dimension):
+            added += index.append(vectors, chunk_ids, embedding_ids, documents)
+            elapsed = time.perf_counter() - trained
+            logger.debug(f"Tenant {tenant_id}: {added}/{total} vectors, "
+                         f"{added / elapsed:.0f} vectors/sec")
+    finally:
+        connection.close()
+
+    path = registry.write_snapshot(index)
+    elapsed = time.perf_counter() - started
+    stats = {
+        'tenant_id': tenant_id,
+        'index_type': index.index_type,
+        'shards': index.shard_count,
+        'vectors': added,
+        'seconds': round(elapsed, 2),
+        'vectors_per_sec': round(added / elapsed, 1) if elapsed else None,
+        'snapshot': path
+    }
+    logger.info(f"Tenant {tenant_id}: built {added} vectors in {elapsed:.1f}s "
+                f"({stats['vectors_per_sec']} vectors/sec) -> {path}")
+    return stats
+
+
+def main() -> int:
+    """
+    Builder entry point.
+
+    Returns:
+        int: Exit code
+    """
+    args = parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    vector_config = settings.get_vector_search_settings()
+    snapshot_config = dict(vector_config.get('snapshot', {}), enabled=True)
+    if args.snapshot_dir:
+        snapshot_config['directory'] = args.snapshot_dir
+    registry = TenantIndexRegistry(
+        dimension=vector_config.get('dimension', VectorSearchConfig.VECTOR_DIMENSION.value),
+        vector_config={**vector_config, 'snapshot': snapshot_config}
+    )
+
+    failed: List[str] = []
+    for tenant_id in args.tenant_ids:
+        try:
+            build_tenant(registry, tenant_id, args)
+        except Exception as e:
+            logger.error(f"Tenant {tenant_id}: build failed: {str(e)}")
+            failed.append(tenant_id)
+
+    if failed:
+        logger.error(f"{len(failed)} of {len(args.tenant_ids)} tenant builds failed: "
+                     f"{', '.join(failed)}")
+        return EXIT_FAILURE
+    return EXIT_SUCCESS
+
+
+if __name__ == '__main__':
+    sys.exit(main())
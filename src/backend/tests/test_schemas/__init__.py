@@ -0,0 +1,6 @@
+"""
+Test schemas package initialization module.
+Groups tests for the Pydantic request and response schemas.
+
+Version: 1.0.0
+"""
@@ -0,0 +1,36 @@
+"""
+Test suite for the embedding Pydantic schemas.
+Tests conversion from ORM rows that store vectors as binary float32.
+
+Version: 1.0.0
+"""
+
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.models.embedding import Embedding as EmbeddingModel
+from app.schemas.embedding import Embedding
+
+VECTOR_DIMENSION = 1536
+
+
+def test_embedding_schema_round_trips_binary_vector():
+    """Test that from_orm decodes the binary vector column and to_vector gives it back."""
+    vector = np.random.default_rng(0).standard_normal(VECTOR_DIMENSION).astype(np.float32)
+    orm_embedding = EmbeddingModel(uuid4(), vector, similarity_score=0.5)
+
+    schema = Embedding.from_orm(orm_embedding)
+
+    assert schema.id == orm_embedding.id
+    assert schema.chunk_id == orm_embedding.chunk_id
+    assert all(isinstance(value, float) for value in schema.embedding)
+    np.testing.assert_allclose(schema.to_vector(), orm_embedding.get_vector(), atol=1e-7)
+    np.testing.assert_allclose(schema.to_vector(), vector / np.linalg.norm(vector), atol=1e-6)
+
+
+def test_embedding_schema_rejects_invalid_orm_model():
+    """Test that a missing ORM row is reported as a validation error."""
+    with pytest.raises(ValueError):
+        Embedding.from_orm(None)
@@ -17,6 +17,7 @@ from typing import Dict, List
 from app.services.ai_service import AIService
 from app.services.vector_search import VectorSearchService
 from app.services.cache_service import CacheService
+from app.services.embedding_cache import EmbeddingCache, LocalEmbeddingStore
 from app.core.config import settings
 
 # Test data constants
@@ -29,7 +30,7 @@ TEST_CHAT_HISTORY = "Previous chat context"
 async def mock_vector_search():
     """Fixture providing mocked vector search service with security validation."""
     mock = AsyncMock(spec=VectorSearchService)
-    mock.search.return_value = [
+    mock.asearch.return_value = [
         {
             'chunk_id': 'chunk-1',
             'document_id': 'doc-1',
@@ -46,6 +47,8 @@ async def mock_cache_service():
     mock = AsyncMock(spec=CacheService)
     mock.get.return_value = None
     mock.set.return_value = True
+    mock.get_many_bytes.side_effect = lambda keys: [None] * len(keys)
+    mock.set_many_bytes.return_value = True
     return mock
 
 @pytest.fixture
@@ -79,7 +82,8 @@ class TestAIService:
         )
         
         # Patch OpenAI client
-        with patch('app.services.ai_service.openai', mock_openai):
+        with patch('app.services.ai_service.openai', mock_openai), \
+                patch('app.services.embedding_provider.openai', mock_openai):
             yield
 
     @pytest.mark.asyncio
@@ -99,7 +103,7 @@ class TestAIService:
         
         # Verify OpenAI API called correctly
         self._ai_service._openai.Embedding.acreate.assert_called_once_with(
-            input=test_text,
+            input=[test_text],
             model="text-embedding-ada-002",
             headers={
                 'X-Tenant-ID': TEST_TENANT_ID,
@@ -111,6 +115,73 @@ class TestAIService:
         assert self._ai_service._metrics['requests'] == 1
         assert self._ai_service._metrics['errors'] == 0
 
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_generate_embeddings_batch_splits_rejected_inputs(self):
+        """Test that batches go out as one request and rejected inputs are isolated by splitting."""
+        class InputError(Exception):
+            http_status = 400
+
+        texts = [f"Chunk {i}" for i in range(8)]
+        texts[5] = "Chunk rejected"
+        vectors = {text: np.random.rand(TEST_EMBEDDING_DIMENSION) for text in texts}
+
+        async def acreate(input, model, headers):
+            if "Chunk rejected" in input:
+                raise InputError("Input too long")
+            # Return results out of order; they are mapped back by index
+            return {'data': [{'index': i, 'embedding': vectors[text].tolist()}
+                             for i, text in reversed(list(enumerate(input)))]}
+
+        with patch('app.services.embedding_provider.openai') as mock_openai:
+            mock_openai.Embedding.acreate = AsyncMock(side_effect=acreate)
+            embeddings = await self._ai_service.generate_embeddings_batch(texts, {})
+
+            # One request for the batch, then halving isolates the rejected input
+            calls = [call.kwargs['input'] for call in mock_openai.Embedding.acreate.call_args_list]
+            assert calls[0] == texts
+            assert len(calls) == 7
+
+        assert embeddings[5] is None
+        for text, embedding in zip(texts, embeddings):
+            if embedding is not None:
+                np.testing.assert_allclose(embedding, vectors[text], rtol=1e-6)
+        assert self._ai_service._metrics['errors'] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_generate_embeddings_batch_uses_cache(self):
+        """Test that cached and repeated texts skip the API and new embeddings are cached."""
+        store = LocalEmbeddingStore()
+        self._ai_service._embedding_cache = EmbeddingCache(store, "text-embedding-ada-002")
+        cached_vector = np.random.rand(TEST_EMBEDDING_DIMENSION).astype(np.float32)
+        await self._ai_service._embedding_cache.set_many({
+            self._ai_service._embedding_cache.key(TEST_TENANT_ID, "Cached  chunk"): cached_vector
+        })
+
+        async def acreate(input, model, headers):
+            return {'data': [{'index': i,
+                              'embedding': np.random.rand(TEST_EMBEDDING_DIMENSION).tolist()}
+                             for i in range(len(input))]}
+
+        texts = ["Cached chunk", "New chunk", "New  chunk", "Other chunk"]
+        cache_stats = {'hits': 0, 'misses': 0}
+        with patch('app.services.embedding_provider.openai') as mock_openai:
+            mock_openai.Embedding.acreate = AsyncMock(side_effect=acreate)
+            embeddings = await self._ai_service.generate_embeddings_batch(
+                texts, {}, cache_stats=cache_stats
+            )
+
+            # Whitespace variants share an entry, so only two distinct texts are requested
+            mock_openai.Embedding.acreate.assert_called_once()
+            requested = mock_openai.Embedding.acreate.call_args.kwargs['input']
+            assert requested == ["New chunk", "Other chunk"]
+
+        np.testing.assert_array_equal(embeddings[0], cached_vector)
+        np.testing.assert_array_equal(embeddings[1], embeddings[2])
+        assert cache_stats == {'hits': 1, 'misses': 3}
+        assert len(store) == 3
+
     @pytest.mark.asyncio
     @pytest.mark.unit
     async def test_process_query(self):
@@ -132,8 +203,8 @@ class TestAIService:
         assert 'metrics' in result
 
         # Verify vector search called correctly
-        self._vector_search.search.assert_called_once()
-        search_args = self._vector_search.search.call_args[0]
+        self._vector_search.asearch.assert_called_once()
+        search_args = self._vector_search.asearch.call_args[0]
         assert isinstance(search_args[0], np.ndarray)
         assert search_args[1] == TEST_TENANT_ID
 
@@ -207,7 +278,7 @@ class TestAIService:
         assert api_calls[1][1]['headers']['X-Tenant-ID'] == tenant_2
 
         # Verify vector search tenant isolation
-        search_calls = self._vector_search.search.call_args_list
+        search_calls = self._vector_search.asearch.call_args_list
         for call in search_calls:
             assert call[0][1] in [tenant_1, tenant_2]
 
@@ -246,6 +317,7 @@ class TestAIService:
         assert 'openai_api' in health_status
         assert 'vector_search' in health_status
         assert 'cache' in health_status
+        assert health_status['concurrency']['in_flight'] == 0
         assert 'metrics' in health_status
         assert 'timestamp' in health_status
 
@@ -16,6 +16,7 @@ from uuid import uuid4
 from app.services.document_processor import DocumentProcessor
 from app.models.document import Document, DocumentStatus
 from app.models.chunk import Chunk
+from app.models.embedding import Embedding
 
 # Test constants based on technical specifications
 TEST_CHUNK_SIZE = 1000
@@ -63,18 +64,30 @@ def mock_ai_service():
         # Generate test embeddings with correct dimensions
         return np.random.randn(TEST_EMBEDDING_DIM).astype(np.float32)
     
+    async def generate_embeddings_batch(texts, metadata, cache_stats=None):
+        return [np.random.randn(TEST_EMBEDDING_DIM).astype(np.float32) for _ in texts]
+    
     mock_service.generate_embeddings = generate_embeddings
+    mock_service.generate_embeddings_batch = generate_embeddings_batch
     return mock_service
 
 @pytest.fixture
 def mock_vector_search():
-    """Fixture providing vector search service mock."""
-    mock_service = AsyncMock()
-    
-    async def batch_index(embeddings, tenant_id):
-        return True
+    """Fixture providing vector search service mock with synchronous storage and indexing."""
+    mock_service = Mock()
+
+    def store_embeddings(document_id, contents, vectors, sequences):
+        return [Embedding(uuid4(), vector) for vector in vectors]
+
+    def store_duplicates(document_id, contents, sequences, canonical_chunk_ids):
+        return [str(uuid4()) for _ in contents]
+
+    async def link_near_duplicates(chunk_ids, contents, tenant_id, document_id=None):
+        return {}
     
-    mock_service.batch_index = batch_index
+    mock_service.store_embeddings = Mock(side_effect=store_embeddings)
+    mock_service.store_duplicates = Mock(side_effect=store_duplicates)
+    mock_service.link_near_duplicates = link_near_duplicates
     return mock_service
 
 @pytest_asyncio.fixture
@@ -135,6 +148,86 @@ async def test_process_document_success(document_processor):
     assert 'processing_time' in result
     assert 'metrics' in result
 
+@pytest.mark.asyncio
+async def test_process_document_indexes_stored_embedding_rows(document_processor, mock_ai_service,
+                                                              mock_vector_search):
+    """
+    Test that the vectors returned by process_chunks are stored as Embedding rows before
+    indexing, and that stale-row removal and indexing receive those rows and their IDs.
+    """
+    async def generate_embeddings_batch(texts, metadata, cache_stats=None):
+        # The API rejects the second chunk on its own
+        return [None if i == 1 else np.random.randn(TEST_EMBEDDING_DIM).astype(np.float32)
+                for i in range(len(texts))]
+
+    mock_ai_service.generate_embeddings_batch = generate_embeddings_batch
+
+    document = Mock(spec=Document)
+    document.id = uuid4()
+    document.filename = "test.pdf"
+    document.type = "pdf"
+    document.status = DocumentStatus.PENDING
+    document.update_status = AsyncMock()
+    document.update_metadata = AsyncMock()
+
+    result = await document_processor.process_document(document, "test_tenant")
+
+    document_id, contents, vectors, sequences = mock_vector_search.store_embeddings.call_args.args
+    assert document_id == document.id
+    assert sequences == [0, 2]
+    assert all(isinstance(vector, np.ndarray) for vector in vectors)
+
+    embeddings = mock_vector_search.batch_index.call_args.args[0]
+    assert len(embeddings) == 2
+    assert all(isinstance(embedding, Embedding) for embedding in embeddings)
+    mock_vector_search.batch_index.assert_called_once_with(embeddings, "test_tenant")
+    mock_vector_search.remove_document.assert_called_once_with(
+        document.id, "test_tenant", keep_embedding_ids=[embedding.id for embedding in embeddings],
+        keep_chunk_ids=[]
+    )
+    assert result['embeddings_generated'] == 2
+
+@pytest.mark.asyncio
+async def test_process_document_stores_linked_duplicates(document_processor, mock_vector_search):
+    """
+    Test that near-duplicates are stored as chunk rows linked to their canonical chunk,
+    kept through stale-row removal and added to the lexical index without embeddings.
+    """
+    indexed_canonical = str(uuid4())
+
+    async def link_near_duplicates(chunk_ids, contents, tenant_id, document_id=None):
+        # The second chunk repeats an indexed chunk, the third repeats the first
+        return {'1': indexed_canonical, '2': '0'}
+
+    mock_vector_search.link_near_duplicates = link_near_duplicates
+
+    document = Mock(spec=Document)
+    document.id = uuid4()
+    document.filename = "test.pdf"
+    document.type = "pdf"
+    document.status = DocumentStatus.PENDING
+    document.update_status = AsyncMock()
+    document.update_metadata = AsyncMock()
+
+    result = await document_processor.process_document(document, "test_tenant")
+
+    assert mock_vector_search.store_embeddings.call_args.args[3] == [0]
+    embedding = mock_vector_search.batch_index.call_args.args[0][0]
+    document_id, contents, sequences, canonicals = \
+        mock_vector_search.store_duplicates.call_args.args
+    assert document_id == document.id
+    assert contents == ["Test content 1", "Test content 2"]
+    assert sequences == [1, 2]
+    assert canonicals == [indexed_canonical, str(embedding.chunk_id)]
+
+    linked_chunk_ids = mock_vector_search.remove_document.call_args.kwargs['keep_chunk_ids']
+    assert len(linked_chunk_ids) == 2
+    mock_vector_search.index_linked_chunks.assert_called_once_with(
+        linked_chunk_ids, ["Test content 1", "Test content 2"], "test_tenant"
+    )
+    assert result['duplicates_linked'] == 2
+    assert document.update_metadata.call_args.args[0]['duplicate_chunk_count'] == 2
+
 @pytest.mark.asyncio
 async def test_process_document_with_retries(document_processor):
     """
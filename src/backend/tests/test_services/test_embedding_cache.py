@@ -0,0 +1,64 @@
+"""
+Test suite for the content-addressed embedding cache.
+Tests key normalization and scoping, binary round trips, LRU eviction and store failures.
+
+Version: 1.0.0
+"""
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import (
+    EmbeddingCache, LocalEmbeddingStore, cache_hit_rate, normalize_text
+)
+
+MODEL = "text-embedding-ada-002"
+
+
+@pytest.fixture
+def cache():
+    """Create a cache over an empty in-process store."""
+    return EmbeddingCache(LocalEmbeddingStore(max_entries=2), MODEL)
+
+
+def test_keys_ignore_whitespace_and_unicode_form(cache):
+    """Test that formatting variants share a key while tenants and models do not."""
+    assert normalize_text("Flow  rate\n500 GPM ") == "Flow rate 500 GPM"
+    assert cache.key('tenant-a', "Flow rate 500 GPM") == \
+        cache.key('tenant-a', "Flow  rate\n500 GPM")
+    assert cache.key('tenant-a', "Flow rate") != cache.key('tenant-b', "Flow rate")
+    other_model = EmbeddingCache(LocalEmbeddingStore(), "text-embedding-3-small")
+    assert cache.key('tenant-a', "Flow rate") != other_model.key('tenant-a', "Flow rate")
+
+
+@pytest.mark.asyncio
+async def test_round_trip_and_lru_eviction(cache):
+    """Test that vectors round-trip exactly and the least recently used entry is evicted."""
+    vectors = {name: np.random.rand(1536).astype(np.float32) for name in ('a', 'b', 'c')}
+
+    await cache.set_many({'a': vectors['a'], 'b': vectors['b']})
+    first = await cache.get_many(['a', 'missing'])
+    np.testing.assert_array_equal(first[0], vectors['a'])
+    assert first[1] is None
+
+    # 'b' is now least recently used and is evicted by 'c'
+    await cache.set_many({'c': vectors['c']})
+    found = await cache.get_many(['a', 'b', 'c'])
+    assert [embedding is not None for embedding in found] == [True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_store_failures_are_misses():
+    """Test that an unavailable store degrades to misses instead of raising."""
+    class FailingStore:
+        async def get_many_bytes(self, keys):
+            raise ConnectionError("Redis unavailable")
+
+        async def set_many_bytes(self, items, ttl=None):
+            raise ConnectionError("Redis unavailable")
+
+    cache = EmbeddingCache(FailingStore(), MODEL)
+    await cache.set_many({'a': np.ones(1536, dtype=np.float32)})
+    assert await cache.get_many(['a']) == [None]
+    assert cache_hit_rate({'hits': 3, 'misses': 1}) == 0.75
+    assert cache_hit_rate({'hits': 0, 'misses': 0}) == 0.0
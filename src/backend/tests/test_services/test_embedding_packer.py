@@ -0,0 +1,45 @@
+"""
+Test suite for token-aware embedding request packing.
+Tests token and input budgets, isolation of oversized inputs and token count fallbacks.
+
+Version: 1.0.0
+"""
+
+from unittest.mock import patch
+
+from app.services.embedding_packer import count_tokens, pack_requests
+
+
+def test_requests_fill_up_to_token_budget():
+    """Test that texts are packed in order until the next one would exceed the token budget."""
+    counts = [400, 300, 200, 950, 100, 100]
+
+    slices = pack_requests(counts, max_tokens=1000, max_inputs=10, max_input_tokens=8191)
+
+    assert slices == [(0, 3), (3, 4), (4, 6)]
+    assert all(sum(counts[start:end]) <= 1000 for start, end in slices)
+
+
+def test_requests_respect_input_budget():
+    """Test that many small texts are split at the input budget."""
+    slices = pack_requests([5] * 10, max_tokens=1000, max_inputs=4, max_input_tokens=8191)
+
+    assert slices == [(0, 4), (4, 8), (8, 10)]
+    assert pack_requests([], max_tokens=1000, max_inputs=4) == []
+
+
+def test_oversized_texts_are_sent_alone():
+    """Test that a text over the per-input limit gets its own request."""
+    slices = pack_requests([100, 9000, 100, 100], max_tokens=1000, max_inputs=10,
+                           max_input_tokens=8191)
+
+    assert slices == [(0, 1), (1, 2), (2, 4)]
+
+
+def test_token_counts_are_estimated_without_tokenizer():
+    """Test that counts fall back to a conservative estimate when no tokenizer loads."""
+    with patch('app.services.embedding_packer.get_tokenizer', return_value=None):
+        counts = count_tokens(["Flow rate 500 GPM", ""], "text-embedding-ada-002")
+
+    # 17 bytes at no more than 3 bytes per token
+    assert counts == [6, 0]
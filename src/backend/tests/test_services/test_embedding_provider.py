@@ -0,0 +1,59 @@
+"""
+Test suite for embedding providers.
+Tests the local feature-hashing provider's determinism, similarity and process pool path.
+
+Version: 1.0.0
+"""
+
+import numpy as np
+import pytest
+
+from app.services.embedding_provider import (
+    EMBEDDING_DIMENSION, LOCAL_TASK_SIZE, LocalHashingEmbeddingProvider, hash_embeddings
+)
+
+PUMP_SPEC = "Pump XJ-4500 delivers 500 GPM at 150 PSI with a 25 HP motor"
+
+
+def test_hash_embeddings_are_deterministic_unit_vectors():
+    """Test that vectors are stable, unit length and closer for related texts."""
+    texts = [
+        PUMP_SPEC,
+        "Pump XJ-4600 delivers 550 GPM at 150 PSI with a 30 HP motor",
+        "The warranty does not cover damage caused by misuse",
+        "   "
+    ]
+    vectors = hash_embeddings(texts)
+
+    assert vectors.shape == (4, EMBEDDING_DIMENSION)
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors[:3], axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(vectors, hash_embeddings(texts))
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+    assert not vectors[3].any()
+
+
+def test_process_pool_matches_in_process_hashing():
+    """Test that batches split across worker processes give the same vectors in order."""
+    texts = [f"{PUMP_SPEC} variant {i}" for i in range(LOCAL_TASK_SIZE * 2 + 5)]
+    provider = LocalHashingEmbeddingProvider(processes=2)
+    try:
+        pooled = provider.embed(texts)
+    finally:
+        provider.close()
+
+    inline = LocalHashingEmbeddingProvider(processes=1).embed(texts)
+    assert len(pooled) == len(texts)
+    np.testing.assert_array_equal(np.vstack(pooled), np.vstack(inline))
+
+
+@pytest.mark.asyncio
+async def test_async_embedding_matches_sync():
+    """Test that the coroutine interface returns the same vectors as the blocking one."""
+    provider = LocalHashingEmbeddingProvider(processes=1)
+
+    vectors = await provider.aembed([PUMP_SPEC, "Bronze impeller"])
+
+    np.testing.assert_array_equal(np.vstack(vectors),
+                                  hash_embeddings([PUMP_SPEC, "Bronze impeller"]))
+    assert provider.model != "text-embedding-ada-002"
@@ -0,0 +1,129 @@
+"""
+Test suite for the per-tenant BM25 lexical index and reciprocal-rank fusion.
+Tests tokenization, ranking, incremental updates, compaction and registry builds.
+
+Version: 1.0.0
+"""
+
+import threading
+from array import array
+from unittest.mock import Mock
+
+import pytest
+
+from app.services.lexical_index import (
+    LexicalIndex, LexicalIndexRegistry, reciprocal_rank_fusion, tokenize
+)
+
+# Test corpus of catalog chunks
+TEST_CHUNKS = {
+    'chunk-pump': 'Centrifugal pump XJ-4500 rated at 40 gpm with stainless impeller',
+    'chunk-valve': 'Ball valve BV-200 for 2 inch pipe, brass body, 600 psi',
+    'chunk-motor': 'Three phase motor 5 hp, 1750 rpm, TEFC enclosure for pump drives',
+    'chunk-seal': 'Mechanical seal kit for XJ-4500 and XJ-4600 pumps',
+    'chunk-filter': 'Inline filter housing, 10 micron cartridge, 150 psi max',
+}
+
+
+@pytest.fixture
+def lexical_index():
+    """Create a populated lexical index."""
+    index = LexicalIndex('tenant-a')
+    index.add(list(TEST_CHUNKS), list(TEST_CHUNKS.values()))
+    return index
+
+
+def test_tokenize_keeps_part_numbers_whole_and_split():
+    """Test that compound codes are indexed whole and by their parts."""
+    assert tokenize('Pump XJ-4500/B, 40 GPM') == [
+        'pump', 'xj-4500/b', 'xj', '4500', 'b', '40', 'gpm'
+    ]
+
+
+def test_exact_part_number_ranks_first(lexical_index):
+    """Test that an exact part number match outranks partial matches."""
+    hits = lexical_index.search('XJ-4500 pump', top_k=5)
+
+    assert [chunk_id for chunk_id, _ in hits][:2] == ['chunk-pump', 'chunk-seal']
+    assert all(score > 0 for _, score in hits)
+    assert 'chunk-valve' not in dict(hits)
+
+
+def test_search_respects_top_k_and_ordering(lexical_index):
+    """Test that results are truncated to top_k in descending score order."""
+    hits = lexical_index.search('psi pump', top_k=2)
+
+    assert len(hits) == 2
+    assert hits[0][1] >= hits[1][1]
+
+
+def test_unknown_terms_return_nothing(lexical_index):
+    """Test that queries without indexed terms return no results."""
+    assert lexical_index.search('hydraulic accumulator', top_k=5) == []
+    assert lexical_index.search('', top_k=5) == []
+
+
+def test_postings_are_array_backed(lexical_index):
+    """Test that postings use compact typed arrays rather than Python lists."""
+    assert all(isinstance(docs, array) and docs.typecode == 'I'
+               for docs in lexical_index._postings_docs)
+    assert all(isinstance(tfs, array) and tfs.typecode == 'H'
+               for tfs in lexical_index._postings_tfs)
+    assert lexical_index.memory_bytes() > 0
+
+
+def test_readd_replaces_content(lexical_index):
+    """Test that indexing an existing chunk replaces its terms."""
+    lexical_index.add(['chunk-valve'], ['Gate valve GV-900'])
+
+    assert 'chunk-valve' not in dict(lexical_index.search('BV-200', top_k=5))
+    assert lexical_index.search('GV-900', top_k=5)[0][0] == 'chunk-valve'
+    assert lexical_index.doc_count == len(TEST_CHUNKS)
+
+
+def test_remove_and_compact(lexical_index):
+    """Test that removed chunks stop matching and compaction renumbers survivors."""
+    removed = lexical_index.remove(['chunk-pump', 'missing'])
+
+    assert removed == 1
+    assert 'chunk-pump' not in lexical_index
+    assert [chunk_id for chunk_id, _ in lexical_index.search('XJ-4500', top_k=5)] == ['chunk-seal']
+
+    # One of five deleted crosses the compaction threshold, which runs in the background
+    lexical_index._compactor.join(timeout=5)
+    assert not lexical_index._deleted_count
+    assert not lexical_index._deleted.any()
+    assert lexical_index.doc_count == len(TEST_CHUNKS) - 1
+    assert [chunk_id for chunk_id, _ in lexical_index.search('XJ-4500', top_k=5)] == ['chunk-seal']
+    assert lexical_index.search('psi', top_k=5)
+
+
+def test_registry_builds_once_under_concurrency():
+    """Test that concurrent first requests share a single build."""
+    registry = LexicalIndexRegistry()
+    loader = Mock(return_value=(list(TEST_CHUNKS), list(TEST_CHUNKS.values())))
+    barrier = threading.Barrier(8)
+    indices = []
+
+    def worker():
+        barrier.wait()
+        indices.append(registry.get_or_build('tenant-a', loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.call_count == 1
+    assert all(index is indices[0] for index in indices)
+    assert registry.drop('tenant-a') and registry.get('tenant-a') is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Test that items ranked by both lists outrank items ranked by one."""
+    fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['c', 'd', 'a']], k=60)
+
+    assert [item for item, _ in fused][:2] == ['a', 'c']
+    assert dict(fused)['a'] == pytest.approx(1 / 61 + 1 / 63)
+    assert set(dict(fused)) == {'a', 'b', 'c', 'd'}
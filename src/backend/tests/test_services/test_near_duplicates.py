@@ -0,0 +1,88 @@
+"""
+Test suite for near-duplicate chunk detection.
+Tests SimHash stability, canonical linking, batch-internal duplicates and removals.
+
+Version: 1.0.0
+"""
+
+import pytest
+
+from app.services.near_duplicates import NearDuplicateIndex, NearDuplicateRegistry, simhash
+
+WARRANTY = (
+    "This product is warranted against defects in materials and workmanship for a period "
+    "of two years from the date of purchase when installed and maintained according to the "
+    "manufacturer instructions. The warranty does not cover damage caused by misuse."
+)
+SPEC_BLOCK = (
+    "Pump XJ-4500 delivers a rated flow of 500 GPM at 150 PSI with a 25 HP motor, cast iron "
+    "volute, bronze impeller, mechanical seal and a maximum operating temperature of 180 F."
+)
+
+
+@pytest.fixture
+def detector():
+    """Create a detector holding one indexed warranty chunk."""
+    index = NearDuplicateIndex('tenant-a')
+    index.add(['chunk-warranty'], [WARRANTY])
+    return index
+
+
+def test_simhash_is_close_for_small_edits():
+    """Test that a one-word edit moves the fingerprint far less than unrelated text."""
+    tokens = WARRANTY.lower().split()
+    edited = WARRANTY.replace('two years', 'three years').lower().split()
+
+    near = (simhash(tokens) ^ simhash(edited)).bit_count()
+    far = (simhash(tokens) ^ simhash(SPEC_BLOCK.lower().split())).bit_count()
+
+    assert near < far
+    assert simhash(tokens) == simhash(list(tokens))
+
+
+def test_links_near_duplicates_to_indexed_chunk(detector):
+    """Test that repeated boilerplate links to the indexed chunk and new text does not."""
+    duplicates = detector.link(['0', '1'], [WARRANTY + ' ', SPEC_BLOCK])
+
+    assert duplicates == {'0': 'chunk-warranty'}
+    # Linking never modifies the detector
+    assert detector.chunk_count == 1
+
+
+def test_links_repeats_within_batch(detector):
+    """Test that a repeated chunk in the same batch links to its first occurrence."""
+    variant = SPEC_BLOCK.replace('XJ-4500', 'XJ-4600')
+
+    duplicates = detector.link(['0', '1', '2'], [SPEC_BLOCK, SPEC_BLOCK, variant])
+
+    assert duplicates['1'] == '0'
+    assert '0' not in duplicates
+
+
+def test_short_chunks_and_excluded_chunks_are_not_linked(detector):
+    """Test that short chunks are never linked and excluded canonicals are skipped."""
+    assert detector.link(['0', '1'], ['Page 3', 'Page 3']) == {}
+    assert detector.link(['0'], [WARRANTY], exclude={'chunk-warranty'}) == {}
+
+
+def test_removed_chunks_stop_being_canonical(detector):
+    """Test that removing a chunk stops new chunks linking to it."""
+    assert detector.remove(['chunk-warranty']) == 1
+
+    assert detector.link(['0'], [WARRANTY]) == {}
+    assert 'chunk-warranty' not in detector
+
+
+def test_registry_builds_each_tenant_once():
+    """Test that the registry loads a tenant's chunks once and isolates tenants."""
+    registry = NearDuplicateRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return ['chunk-warranty'], [WARRANTY]
+
+    first = registry.get_or_build('tenant-a', loader)
+    assert registry.get_or_build('tenant-a', loader) is first
+    assert len(calls) == 1
+    assert registry.get_or_build('tenant-b', lambda: ([], [])).link(['0'], [WARRANTY]) == {}
@@ -0,0 +1,91 @@
+"""
+Test suite for the adaptive OpenAI request concurrency limiter.
+Tests AIMD limit changes, overload classification and interactive priority.
+
+Version: 1.0.0
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.request_limiter import (
+    AdaptiveConcurrencyLimiter, RequestPriority, is_overload_error
+)
+
+
+class ThrottledError(Exception):
+    """Stand-in for an OpenAI rate limit error."""
+    http_status = 429
+
+
+def test_overload_classification():
+    """Test that throttling and timeouts are overload errors and input errors are not."""
+    class InputError(Exception):
+        http_status = 400
+
+    class APITimeoutError(Exception):
+        pass
+
+    assert is_overload_error(ThrottledError())
+    assert is_overload_error(asyncio.TimeoutError())
+    assert is_overload_error(APITimeoutError())
+    assert not is_overload_error(InputError())
+
+
+@pytest.mark.asyncio
+async def test_limit_backs_off_once_per_overload_and_grows_when_saturated():
+    """Test that concurrent 429s halve the limit once and stable saturated requests raise it."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16)
+    release = asyncio.Event()
+
+    async def throttled():
+        with pytest.raises(ThrottledError):
+            async with limiter.slot(RequestPriority.BACKGROUND):
+                await release.wait()
+                raise ThrottledError()
+
+    tasks = [asyncio.create_task(throttled()) for _ in range(4)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert limiter.limit == 4
+
+    async def succeed():
+        async with limiter.slot(RequestPriority.INTERACTIVE):
+            await asyncio.sleep(0.01)
+
+    for _ in range(3):
+        await asyncio.gather(*(succeed() for _ in range(limiter.limit)))
+    assert limiter.limit > 4
+    assert limiter.get_stats()['in_flight'] == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_skip_queued_background_requests():
+    """Test that background work is capped below the limit and queries are admitted first."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, background_share=0.5)
+    release = asyncio.Event()
+    order = []
+
+    async def request(priority, name):
+        async with limiter.slot(priority):
+            order.append(name)
+            await release.wait()
+
+    background = [asyncio.create_task(request(RequestPriority.BACKGROUND, f'b{i}'))
+                  for i in range(4)]
+    await asyncio.sleep(0)
+    # Background requests hold only half of the limit
+    assert order == ['b0', 'b1']
+    assert limiter.queued(RequestPriority.BACKGROUND) == 2
+
+    interactive = asyncio.create_task(request(RequestPriority.INTERACTIVE, 'q0'))
+    await asyncio.sleep(0)
+    assert order[-1] == 'q0'
+
+    release.set()
+    await asyncio.gather(interactive, *background)
+    assert sorted(order) == ['b0', 'b1', 'b2', 'b3', 'q0']
+    assert limiter.get_stats() == {'limit': 4, 'in_flight': 0,
+                                   'queued_interactive': 0, 'queued_background': 0}
@@ -0,0 +1,230 @@
+"""
+Test suite for micro-batching of concurrent vector searches.
+Tests result fan-out, batch coalescing, size limits and error propagation.
+
+Version: 1.0.0
+"""
+
+import threading
+import time
+import uuid
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+from app.services.search_batcher import SearchBatcher
+from app.services.vector_index import TenantIndex
+from app.constants import VectorSearchConfig
+
+# Test configuration constants
+VECTOR_DIMENSION = VectorSearchConfig.VECTOR_DIMENSION.value
+TEST_VECTOR_COUNT = 200
+CONCURRENT_QUERIES = 16
+
+
+@pytest.fixture
+def vectors():
+    """Create reproducible tenant vectors."""
+    np.random.seed(7)
+    return np.random.rand(TEST_VECTOR_COUNT, VECTOR_DIMENSION).astype(np.float32)
+
+
+@pytest.fixture
+def tenant_index(vectors):
+    """Create a populated flat tenant index."""
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, [str(uuid.uuid4()) for _ in range(TEST_VECTOR_COUNT)],
+              [str(uuid.uuid4()) for _ in range(TEST_VECTOR_COUNT)])
+    return index
+
+
+def run_concurrently(batcher, tenant_index, queries, top_ks):
+    """Issue one search per thread, released together, and collect results in order."""
+    results = [None] * len(queries)
+    barrier = threading.Barrier(len(queries))
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.search(tenant_index, queries[i], top_ks[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(queries))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batched_results_match_direct_search(tenant_index, vectors):
+    """Test that every caller receives exactly its own top-k results."""
+    batcher = SearchBatcher(window_ms=20, max_batch_size=64)
+    queries = list(vectors[:CONCURRENT_QUERIES])
+    top_ks = [1 + i % 5 for i in range(CONCURRENT_QUERIES)]
+
+    results = run_concurrently(batcher, tenant_index, queries, top_ks)
+
+    for query, top_k, hits in zip(queries, top_ks, results):
+        assert hits == tenant_index.search(query, top_k)[0]
+
+
+def test_concurrent_queries_share_index_searches(tenant_index, vectors):
+    """Test that queries arriving while a search is in flight are coalesced."""
+    batcher = SearchBatcher(window_ms=50, max_batch_size=CONCURRENT_QUERIES)
+    queries = list(vectors[:CONCURRENT_QUERIES])
+    search = tenant_index.search
+
+    def slow_search(*args, **kwargs):
+        # Keep each index search in flight long enough for the other callers to queue
+        time.sleep(0.05)
+        return search(*args, **kwargs)
+
+    with patch.object(tenant_index, 'search', side_effect=slow_search) as spy:
+        run_concurrently(batcher, tenant_index, queries, [3] * CONCURRENT_QUERIES)
+
+    assert spy.call_count <= 3
+    assert sum(len(call.args[0]) for call in spy.call_args_list) == CONCURRENT_QUERIES
+
+
+def test_batch_size_is_capped(tenant_index, vectors):
+    """Test that no batch exceeds max_batch_size."""
+    batcher = SearchBatcher(window_ms=50, max_batch_size=4)
+    queries = list(vectors[:CONCURRENT_QUERIES])
+
+    with patch.object(tenant_index, 'search', wraps=tenant_index.search) as spy:
+        run_concurrently(batcher, tenant_index, queries, [3] * CONCURRENT_QUERIES)
+
+    assert all(len(call.args[0]) <= 4 for call in spy.call_args_list)
+
+
+def test_lone_query_does_not_wait_for_window(tenant_index, vectors):
+    """Test that a query with no concurrent callers executes without waiting the window."""
+    batcher = SearchBatcher(window_ms=500)
+
+    start = time.perf_counter()
+    hits = batcher.search(tenant_index, vectors[0], 3)
+
+    assert time.perf_counter() - start < 0.25
+    assert hits == tenant_index.search(vectors[0], 3)[0]
+
+
+def test_batch_errors_reach_every_caller(tenant_index, vectors):
+    """Test that a failed batched search raises in every waiting caller."""
+    batcher = SearchBatcher(window_ms=50, max_batch_size=CONCURRENT_QUERIES)
+    errors = []
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        try:
+            batcher.search(tenant_index, vectors[0], 3)
+        except RuntimeError as e:
+            errors.append(e)
+
+    with patch.object(tenant_index, 'search', side_effect=RuntimeError('index failure')):
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(errors) == 4
+    assert not batcher._open and not batcher._active
+
+
+def test_filtered_queries_batch_separately(vectors):
+    """Test that concurrent queries with different filters each get their own filtered results."""
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    documents = [(f"doc-{i % 2}", 'pdf', None) for i in range(TEST_VECTOR_COUNT)]
+    index.add(vectors, [str(i) for i in range(TEST_VECTOR_COUNT)],
+              [str(uuid.uuid4()) for _ in range(TEST_VECTOR_COUNT)], documents=documents)
+    batcher = SearchBatcher(window_ms=20, max_batch_size=64)
+    results = [None] * CONCURRENT_QUERIES
+    barrier = threading.Barrier(CONCURRENT_QUERIES)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.search(index, vectors[i], 3, filters={'document_id': f"doc-{i % 2}"})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(CONCURRENT_QUERIES)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i, hits in enumerate(results):
+        assert hits[0][0] == str(i)
+        assert all(int(chunk_id) % 2 == i % 2 for chunk_id, _ in hits)
+
+
+def test_document_restricted_queries_share_a_batch(vectors):
+    """Test that queries restricted to different documents are searched in one batch."""
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    documents = [(f"doc-{i % 4}", 'pdf', None) for i in range(TEST_VECTOR_COUNT)]
+    index.add(vectors, [str(i) for i in range(TEST_VECTOR_COUNT)],
+              [str(uuid.uuid4()) for _ in range(TEST_VECTOR_COUNT)], documents=documents)
+    batcher = SearchBatcher(window_ms=50, max_batch_size=CONCURRENT_QUERIES)
+    results = [None] * CONCURRENT_QUERIES
+    barrier = threading.Barrier(CONCURRENT_QUERIES)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.search(index, vectors[i], 3, documents=[f"doc-{i % 4}"])
+
+    with patch.object(index, 'search', wraps=index.search) as spy:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(CONCURRENT_QUERIES)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert spy.call_count < CONCURRENT_QUERIES
+    assert not index._filter_cache
+    for i, hits in enumerate(results):
+        assert hits[0][0] == str(i)
+        assert all(int(chunk_id) % 4 == i % 4 for chunk_id, _ in hits)
+
+
+def test_batched_queries_rerank_through_their_own_fetchers(vectors):
+    """Test that each caller's rerank candidates are fetched through that caller's fetcher."""
+    embedding_ids = [str(uuid.uuid4()) for _ in range(TEST_VECTOR_COUNT)]
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {'index_type': 'sq8', 'sq8_min_vectors': 1})
+    index.add(vectors, [str(i) for i in range(TEST_VECTOR_COUNT)], embedding_ids)
+    positions = {emb_id: i for i, emb_id in enumerate(embedding_ids)}
+    fetched = [[] for _ in range(CONCURRENT_QUERIES)]
+
+    def make_fetcher(i):
+        def fetch(ids):
+            fetched[i].append(list(ids))
+            return vectors[[positions[emb_id] for emb_id in ids]]
+        return fetch
+
+    fetchers = [make_fetcher(i) for i in range(CONCURRENT_QUERIES)]
+    batcher = SearchBatcher(window_ms=50, max_batch_size=CONCURRENT_QUERIES)
+    results = [None] * CONCURRENT_QUERIES
+    barrier = threading.Barrier(CONCURRENT_QUERIES)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.search(index, vectors[i], 3, vector_fetcher=fetchers[i])
+
+    with patch.object(index, 'search', wraps=index.search) as spy:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(CONCURRENT_QUERIES)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert spy.call_count < CONCURRENT_QUERIES
+    for i, hits in enumerate(results):
+        assert len(fetched[i]) == 1
+        assert hits[0][0] == str(i)
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert hits == index.search(vectors[i], 3, vector_fetcher=make_fetcher(i))[0]
+
+
+def test_disabled_batcher_searches_directly(tenant_index, vectors):
+    """Test that a zero window bypasses batching."""
+    batcher = SearchBatcher(window_ms=0)
+
+    assert not batcher.enabled
+    assert batcher.search(tenant_index, vectors[5], 2)[0][1] == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,63 @@
+"""
+Test suite for the bounded search executor.
+Tests result passing, queue bounds, overload rejection and wait metrics.
+
+Version: 1.0.0
+"""
+
+import asyncio
+import threading
+import pytest
+
+from app.services.search_executor import (
+    EXECUTOR_WAIT, SearchExecutor, SearchOverloadedError
+)
+
+
+@pytest.fixture
+def executor():
+    """Create a single-thread executor with room for two pending searches."""
+    executor = SearchExecutor(max_workers=1, max_pending=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_event_loop(executor):
+    """Test that work runs on an executor thread and its result is returned."""
+    result = await executor.run(lambda value: (value, threading.current_thread().name), 42)
+
+    assert result[0] == 42
+    assert result[1].startswith('vector-search')
+    assert executor.queued == 0 and executor.running == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_work_beyond_max_pending(executor):
+    """Test that a full executor rejects new searches instead of queueing them."""
+    release = threading.Event()
+    blocked = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    assert executor.running == 1 and executor.queued == 1
+
+    with pytest.raises(SearchOverloadedError) as exc_info:
+        await executor.run(lambda: None)
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await asyncio.gather(*blocked)
+    assert executor.queued == 0 and executor.running == 0
+
+
+@pytest.mark.asyncio
+async def test_records_queue_wait(executor):
+    """Test that time spent waiting for a thread is observed."""
+    before = EXECUTOR_WAIT._sum.get()
+    release = threading.Event()
+    blocked = asyncio.ensure_future(executor.run(release.wait))
+    waiting = asyncio.ensure_future(executor.run(lambda: None))
+    await asyncio.sleep(0.05)
+    release.set()
+    await asyncio.gather(blocked, waiting)
+
+    assert EXECUTOR_WAIT._sum.get() - before >= 0.05
@@ -0,0 +1,941 @@
+"""
+Test suite for the per-tenant vector index registry.
+Tests index construction, ID mapping, deduplication and registry sharing semantics.
+
+Version: 1.0.0
+"""
+
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+
+from app.services.index_registry import TenantIndexRegistry
+from app.services.index_sharding import ShardedTenantIndex
+from app.services.vector_index import TenantIndex
+from app.constants import IndexResidency, VectorSearchConfig
+
+# Test configuration constants
+VECTOR_DIMENSION = VectorSearchConfig.VECTOR_DIMENSION.value
+TEST_VECTOR_COUNT = 50
+
+
+def make_tenant_data(count: int = TEST_VECTOR_COUNT):
+    """Generate random vectors with matching chunk and embedding IDs."""
+    vectors = np.random.rand(count, VECTOR_DIMENSION).astype(np.float32)
+    chunk_ids = [str(uuid.uuid4()) for _ in range(count)]
+    embedding_ids = [str(uuid.uuid4()) for _ in range(count)]
+    return vectors, chunk_ids, embedding_ids
+
+
+@pytest.fixture
+def tenant_data():
+    """Create reproducible tenant vectors."""
+    np.random.seed(42)
+    return make_tenant_data()
+
+
+def test_tenant_index_maps_vectors_to_chunks(tenant_data):
+    """Test that searching for an indexed vector returns its chunk first."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    results = index.search(vectors[7], top_k=3)
+
+    assert index.ntotal == TEST_VECTOR_COUNT
+    assert len(results) == 1
+    assert results[0][0][0] == chunk_ids[7]
+    assert results[0][0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_tenant_index_skips_duplicate_embeddings(tenant_data):
+    """Test that re-adding the same embeddings does not grow the index."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+
+    assert index.add(vectors, chunk_ids, embedding_ids) == TEST_VECTOR_COUNT
+    assert index.add(vectors[:10], chunk_ids[:10], embedding_ids[:10]) == 0
+    assert index.ntotal == TEST_VECTOR_COUNT
+    assert embedding_ids[0] in index
+
+
+def test_tenant_index_batch_queries(tenant_data):
+    """Test searching with a matrix of queries returns one result list per query."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    results = index.search(vectors[:4], top_k=5)
+
+    assert len(results) == 4
+    assert [hits[0][0] for hits in results] == chunk_ids[:4]
+    assert all(len(hits) == 5 for hits in results)
+
+
+def test_tenant_index_does_not_mutate_query(tenant_data):
+    """Test that query normalization does not modify the caller's vector."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    query = vectors[0].copy()
+    index.search(query, top_k=1)
+
+    assert np.array_equal(query, vectors[0])
+
+
+def test_registry_builds_each_tenant_once(tenant_data):
+    """Test that concurrent callers share a single build per tenant."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION)
+    loader = Mock(return_value=tenant_data)
+
+    indices = []
+    threads = [
+        threading.Thread(target=lambda: indices.append(registry.get_or_build('tenant-a', loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.call_count == 1
+    assert all(index is indices[0] for index in indices)
+    assert registry.tenants() == ['tenant-a']
+    assert registry.total_vectors() == TEST_VECTOR_COUNT
+
+
+def test_registry_isolates_tenants(tenant_data):
+    """Test that tenants never see each other's chunks."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION)
+    other_data = make_tenant_data(10)
+
+    index_a = registry.get_or_build('tenant-a', lambda: tenant_data)
+    index_b = registry.get_or_build('tenant-b', lambda: other_data)
+
+    hits_b = index_b.search(tenant_data[0][0], top_k=10)[0]
+
+    assert index_a is not index_b
+    assert {chunk_id for chunk_id, _ in hits_b} <= set(other_data[1])
+
+
+def test_registry_drop_forces_rebuild(tenant_data):
+    """Test that dropping a tenant index triggers a rebuild on next use."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION)
+    loader = Mock(return_value=tenant_data)
+
+    registry.get_or_build('tenant-a', loader)
+    assert registry.drop('tenant-a')
+    assert registry.get('tenant-a') is None
+
+    registry.get_or_build('tenant-a', loader)
+    assert loader.call_count == 2
+
+
+@pytest.mark.parametrize('index_type,threshold_key', [
+    ('ivf_flat', 'ivf_min_vectors'),
+    ('hnsw', 'hnsw_min_vectors')
+])
+def test_tenant_index_promoted_past_threshold(tenant_data, index_type, threshold_key):
+    """Test that tenants switch from exact search to ANN once they cross the size threshold."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {
+        'index_type': index_type,
+        threshold_key: 40,
+        'nlist': 2,
+        'nprobe': 2
+    })
+
+    index.add(vectors[:30], chunk_ids[:30], embedding_ids[:30])
+    assert index.index_type == 'flat'
+
+    index.add(vectors[30:], chunk_ids[30:], embedding_ids[30:])
+    assert index.index_type == index_type
+    assert index.ntotal == TEST_VECTOR_COUNT
+
+    # Exhaustive probing keeps exact-match recall
+    assert index.search(vectors[42], top_k=1)[0][0][0] == chunk_ids[42]
+
+
+def test_tenant_index_ivf_retrains_on_growth(tenant_data):
+    """Test that IVF centroids are retrained once the tenant grows past the growth factor."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {
+        'index_type': 'ivf_flat',
+        'ivf_min_vectors': 10,
+        'ivf_retrain_growth': 2.0
+    })
+
+    index.add(vectors[:10], chunk_ids[:10], embedding_ids[:10])
+    assert index._trained_size == 10
+
+    index.add(vectors[10:15], chunk_ids[10:15], embedding_ids[10:15])
+    assert index._trained_size == 10
+
+    index.add(vectors[15:25], chunk_ids[15:25], embedding_ids[15:25])
+    assert index._trained_size == 25
+
+
+def test_tenant_index_configure_search_params(tenant_data):
+    """Test that query-time knobs apply without a rebuild and unknown params are rejected."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {'index_type': 'hnsw', 'hnsw_min_vectors': 1})
+    index.add(vectors, chunk_ids, embedding_ids)
+    hnsw = index._index
+
+    index.configure(ef_search=256)
+
+    assert index._index is hnsw
+    assert index.describe()['ef_search'] == 256
+
+    with pytest.raises(ValueError):
+        index.configure(unknown_param=1)
+    with pytest.raises(ValueError):
+        index.configure(index_type='annoy')
+
+
+def test_registry_tenant_overrides(tenant_data):
+    """Test that per-tenant overrides take precedence over global settings."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, {
+        'index_type': 'flat',
+        'index_settings': {'nprobe': 8},
+        'tenant_overrides': {'tenant-big': {'index_type': 'ivf_flat', 'nprobe': 32}}
+    })
+
+    assert registry.index_params('tenant-small')['index_type'] == 'flat'
+    assert registry.index_params('tenant-big')['nprobe'] == 32
+
+    registry.configure_tenant('tenant-small', nprobe=4)
+    assert registry.index_params('tenant-small')['nprobe'] == 4
+
+
+@pytest.mark.parametrize('index_type,params', [
+    ('sq8', {'sq8_min_vectors': 1}),
+    ('ivf_pq', {'ivf_pq_min_vectors': 1, 'nlist': 1, 'pq_m': 96, 'pq_nbits': 4})
+])
+def test_quantized_index_reduces_memory(tenant_data, index_type, params):
+    """Test that quantized tiers store fewer bytes per vector than float32."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {'index_type': index_type, **params})
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    description = index.describe()
+
+    assert index.index_type == index_type
+    assert index.quantized
+    # At least 4x smaller than float32 storage
+    assert description['bytes_per_vector'] <= VECTOR_DIMENSION
+
+
+def test_quantized_index_reranks_with_full_precision(tenant_data):
+    """Test that reranking returns exact inner-product scores from fetched float32 vectors."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {
+        'index_type': 'ivf_pq', 'ivf_pq_min_vectors': 1, 'nlist': 1, 'pq_m': 96, 'pq_nbits': 4
+    })
+    index.add(vectors, chunk_ids, embedding_ids)
+    by_embedding = dict(zip(embedding_ids, vectors))
+    fetcher = Mock(side_effect=lambda ids: np.vstack([by_embedding[i] for i in ids]))
+
+    hits = index.search(vectors[3], top_k=5, vector_fetcher=fetcher)[0]
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = normalized @ normalized[3]
+    assert fetcher.call_count == 1
+    assert len(fetcher.call_args[0][0]) <= 5 * index.params['rerank_factor']
+    assert hits[0][0] == chunk_ids[3]
+    for chunk_id, score in hits:
+        assert score == pytest.approx(expected[chunk_ids.index(chunk_id)], abs=1e-5)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_quantized_index_retrains_from_loader(tenant_data):
+    """Test that retraining a quantized index uses full-precision vectors from the loader."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {
+        'index_type': 'sq8', 'sq8_min_vectors': 1
+    })
+    index.add(vectors, chunk_ids, embedding_ids)
+    loader = Mock(return_value=tenant_data)
+
+    index.rebuild(loader)
+
+    loader.assert_called_once()
+    assert index.ntotal == TEST_VECTOR_COUNT
+    assert index.search(vectors[9], top_k=1)[0][0][0] == chunk_ids[9]
+
+
+def test_rebuild_does_not_block_searches(tenant_data):
+    """Test that searches run on the current index while a rebuild builds its replacement."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {
+        'index_type': 'sq8', 'sq8_min_vectors': 1
+    })
+    index.add(vectors, chunk_ids, embedding_ids)
+    index.remove(embedding_ids[:5])
+    loading, release = threading.Event(), threading.Event()
+
+    def loader():
+        loading.set()
+        release.wait(timeout=10)
+        return tenant_data
+
+    rebuild = threading.Thread(target=index.rebuild, args=(loader,))
+    rebuild.start()
+    assert loading.wait(timeout=10)
+
+    # Searches complete while the rebuild is in progress; writers wait for it
+    assert index.search(vectors[9], top_k=1)[0][0][0] == chunk_ids[9]
+    remove = threading.Thread(target=index.remove, args=(embedding_ids[9:10],))
+    remove.start()
+    remove.join(timeout=0.1)
+    assert remove.is_alive() and embedding_ids[9] in index
+
+    release.set()
+    rebuild.join(timeout=10)
+    remove.join(timeout=10)
+
+    assert index.ntotal == TEST_VECTOR_COUNT - 5
+    assert embedding_ids[9] not in index
+    assert index.search(vectors[9], top_k=1)[0][0][0] != chunk_ids[9]
+
+
+@pytest.fixture
+def snapshot_config(tmp_path):
+    """Create registry settings with snapshots written to a temporary directory."""
+    return {'snapshot': {'enabled': True, 'directory': str(tmp_path), 'mmap': True,
+                         'keep_generations': 2}}
+
+
+def test_snapshot_round_trip_with_mmap(tenant_data, tmp_path):
+    """Test that a memory-mapped snapshot returns the same results as the original index."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+    index.save(str(tmp_path), '1.0')
+
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+
+    assert loaded.mmap
+    assert loaded.source == 'snapshot'
+    assert loaded.ntotal == TEST_VECTOR_COUNT
+    assert embedding_ids[5] in loaded
+    assert loaded.search(vectors[5], top_k=3) == index.search(vectors[5], top_k=3)
+
+
+def test_mmap_snapshot_becomes_writable_on_add(tenant_data, tmp_path):
+    """Test that adding to a memory-mapped index copies it into private memory first."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors[:40], chunk_ids[:40], embedding_ids[:40])
+    index.save(str(tmp_path), '1.0')
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+
+    assert loaded.add(vectors[40:], chunk_ids[40:], embedding_ids[40:]) == 10
+
+    assert not loaded.mmap
+    assert loaded.ntotal == TEST_VECTOR_COUNT
+    assert loaded.search(vectors[45], top_k=1)[0][0][0] == chunk_ids[45]
+
+
+def test_registry_loads_snapshot_without_database(tenant_data, snapshot_config):
+    """Test that a fresh registry starts from the on-disk snapshot instead of the loader."""
+    TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config).get_or_build(
+        'tenant-a', lambda: tenant_data
+    )
+    loader = Mock(return_value=tenant_data)
+
+    index = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config).get_or_build('tenant-a', loader)
+
+    loader.assert_not_called()
+    assert index.source == 'snapshot'
+    assert index.ntotal == TEST_VECTOR_COUNT
+
+
+def test_registry_catches_up_snapshot_from_watermark(tenant_data, snapshot_config):
+    """Test that rows created after the snapshot watermark are loaded through the delta loader."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    first = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config)
+    first.get_or_build('tenant-a', lambda: (vectors[:40], chunk_ids[:40], embedding_ids[:40]))
+    watermark = first.get('tenant-a').watermark
+
+    # Delta overlaps the snapshot by the skew window, overlap must be deduplicated
+    delta_loader = Mock(return_value=(vectors[30:], chunk_ids[30:], embedding_ids[30:]))
+    index = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config).get_or_build(
+        'tenant-a', Mock(), delta_loader=delta_loader
+    )
+
+    since = delta_loader.call_args[0][0]
+    assert since < watermark
+    assert watermark - since <= timedelta(minutes=10)
+    assert index.ntotal == TEST_VECTOR_COUNT
+    assert index.watermark > watermark
+
+
+def test_registry_catch_up_drops_embeddings_deleted_since_snapshot(tenant_data, snapshot_config):
+    """Test that embeddings deleted while no process held the tenant are removed on load."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config).get_or_build(
+        'tenant-a', lambda: tenant_data
+    )
+
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config)
+    index = registry.get_or_build(
+        'tenant-a', Mock(), delta_loader=Mock(return_value=(vectors[:0], [], [])),
+        id_loader=lambda: embedding_ids[10:]
+    )
+
+    assert index.source == 'snapshot'
+    assert index.live_count == TEST_VECTOR_COUNT - 10
+    assert chunk_ids[3] not in [hit[0] for hit in index.search(vectors[3], top_k=5)[0]]
+    # The stale snapshot is rewritten in the background
+    registry._maintenance['tenant-a'].join(timeout=10)
+    assert registry._persisted['tenant-a'] == (index.ntotal, index.live_count)
+    assert 'tenant-a' not in registry._dirty
+
+
+def test_registry_defers_snapshot_writes_to_background(tenant_data, snapshot_config):
+    """Test that changes mark the tenant dirty and are saved past a threshold or at shutdown."""
+    snapshot_config['snapshot']['save_changes'] = 20
+    snapshot_config['rebuild_thresholds'] = {'compact_deleted_fraction': 0.9}
+    embedding_ids = tenant_data[2]
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config)
+    registry.get_or_build('tenant-a', lambda: tenant_data)
+
+    with patch.object(registry, 'write_snapshot', wraps=registry.write_snapshot) as spy:
+        registry.remove('tenant-a', embedding_ids[:10])
+        assert spy.call_count == 0 and registry._dirty['tenant-a'][0] == 10
+
+        registry.remove('tenant-a', embedding_ids[10:20])
+        registry._maintenance['tenant-a'].join(timeout=10)
+        assert spy.call_count == 1 and 'tenant-a' not in registry._dirty
+
+    registry.remove('tenant-a', embedding_ids[20:25])
+    assert registry.save_dirty_snapshots() == 1
+    assert registry.save_dirty_snapshots() == 0
+
+    restarted = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config)
+    reloaded = restarted.get_or_build('tenant-a', Mock())
+    assert reloaded.source == 'snapshot'
+    assert reloaded.live_count == TEST_VECTOR_COUNT - 25
+
+
+def test_registry_snapshot_versioned_and_pruned(tenant_data, snapshot_config):
+    """Test that snapshots are keyed by embedding version and old generations are pruned."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config, embedding_version='2.0')
+    registry.get_or_build('tenant-a', lambda: tenant_data)
+    for _ in range(3):
+        registry.save_snapshot('tenant-a')
+
+    version_dir = os.path.join(snapshot_config['snapshot']['directory'], 'tenant-a', 'v2.0')
+    generations = [entry for entry in os.listdir(version_dir) if entry.startswith('gen-')]
+
+    assert len(generations) == 2
+    assert os.path.basename(os.path.realpath(os.path.join(version_dir, 'current'))) in generations
+    assert TenantIndexRegistry(
+        VECTOR_DIMENSION, snapshot_config, embedding_version='1.0'
+    ).get_or_build('tenant-a', lambda: make_tenant_data(5)).ntotal == 5
+
+
+def test_tenant_index_remove_excludes_from_search(tenant_data):
+    """Test that removed embeddings are never returned even before compaction."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    assert index.remove(embedding_ids[:5] + ['unknown']) == 5
+
+    hits = index.search(vectors[2], top_k=TEST_VECTOR_COUNT)[0]
+    assert index.live_count == TEST_VECTOR_COUNT - 5
+    assert len(hits) == TEST_VECTOR_COUNT - 5
+    assert not {chunk_id for chunk_id, _ in hits} & set(chunk_ids[:5])
+    assert embedding_ids[0] not in index
+
+
+def test_tenant_index_upsert_replaces_vector(tenant_data):
+    """Test that upserting an existing embedding ID replaces its vector."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    index.upsert(vectors[20:21], chunk_ids[:1], embedding_ids[:1])
+
+    assert index.live_count == TEST_VECTOR_COUNT
+    hits = index.search(vectors[20], top_k=2)[0]
+    assert {chunk_id for chunk_id, _ in hits} == {chunk_ids[0], chunk_ids[20]}
+    assert all(score == pytest.approx(1.0, abs=1e-5) for _, score in hits)
+
+
+@pytest.mark.parametrize('index_type,params', [
+    ('flat', {}),
+    ('ivf_flat', {'ivf_min_vectors': 1, 'nlist': 1}),
+    ('hnsw', {'hnsw_min_vectors': 1}),
+    ('sq8', {'sq8_min_vectors': 1})
+])
+def test_tenant_index_compaction_reclaims_tombstones(tenant_data, index_type, params):
+    """Test that compaction drops tombstoned vectors and keeps surviving IDs searchable."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {'index_type': index_type, **params})
+    index.add(vectors, chunk_ids, embedding_ids)
+    index.remove(embedding_ids[::2])
+
+    assert index.compact() == TEST_VECTOR_COUNT // 2
+
+    assert index.ntotal == index.live_count == TEST_VECTOR_COUNT // 2
+    assert index.index_type == index_type
+    assert index.search(vectors[7], top_k=1)[0][0][0] == chunk_ids[7]
+    assert embedding_ids[7] in index and embedding_ids[6] not in index
+
+
+def test_registry_compacts_in_background(tenant_data):
+    """Test that removals past the deleted fraction trigger a background compaction."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, {
+        'rebuild_thresholds': {'compact_deleted_fraction': 0.5}
+    })
+    index = registry.get_or_build('tenant-a', lambda: tenant_data)
+    embedding_ids = tenant_data[2]
+
+    registry.remove('tenant-a', embedding_ids[:10])
+    assert 'tenant-a' not in registry._maintenance
+
+    registry.remove('tenant-a', embedding_ids[10:30])
+    registry._maintenance['tenant-a'].join(timeout=10)
+
+    assert index.ntotal == TEST_VECTOR_COUNT - 30
+    assert index.describe()['deleted_count'] == 0
+
+
+def test_snapshot_preserves_tombstones(tenant_data, tmp_path):
+    """Test that tombstones survive a snapshot round trip."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+    index.remove(embedding_ids[:3])
+    index.save(str(tmp_path), '1.0')
+
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+
+    assert loaded.live_count == TEST_VECTOR_COUNT - 3
+    assert embedding_ids[0] not in loaded
+    assert loaded.search(vectors[1], top_k=1)[0][0][0] != chunk_ids[1]
+
+
+def test_mmap_ivf_snapshot_becomes_writable(tenant_data, tmp_path):
+    """Test that a memory-mapped IVF index, whose lists cannot be cloned, accepts adds."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION,
+                        {'index_type': 'ivf_flat', 'ivf_min_vectors': 1, 'nlist': 1})
+    index.add(vectors[:40], chunk_ids[:40], embedding_ids[:40])
+    index.save(str(tmp_path), '1.0')
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+
+    loaded.add(vectors[40:], chunk_ids[40:], embedding_ids[40:])
+
+    assert loaded.ntotal == TEST_VECTOR_COUNT
+    assert loaded.search(vectors[45], top_k=1)[0][0][0] == chunk_ids[45]
+
+
+def make_documents(count: int = TEST_VECTOR_COUNT):
+    """Assign rows round-robin to five documents of alternating type and upload day."""
+    base = datetime(2024, 1, 1)
+    return [(f"doc-{i % 5}", ['pdf', 'docx'][i % 5 % 2], base + timedelta(days=i % 5))
+            for i in range(count)]
+
+
+@pytest.mark.parametrize('index_type,params', [
+    ('flat', {}),
+    ('ivf_flat', {'ivf_min_vectors': 1, 'nlist': 1}),
+    ('hnsw', {'hnsw_min_vectors': 1})
+])
+def test_tenant_index_metadata_filters(tenant_data, index_type, params):
+    """Test that filters restrict results inside the index search."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    documents = make_documents()
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {'index_type': index_type, **params})
+    index.add(vectors, chunk_ids, embedding_ids, documents=documents)
+    by_chunk = dict(zip(chunk_ids, documents))
+
+    hits = index.search(vectors[0], top_k=TEST_VECTOR_COUNT, filters={'document_id': 'doc-3'})[0]
+    assert len(hits) == TEST_VECTOR_COUNT // 5
+    assert all(by_chunk[chunk_id][0] == 'doc-3' for chunk_id, _ in hits)
+
+    hits = index.search(vectors[0], top_k=TEST_VECTOR_COUNT, filters={'document_type': ['docx']})[0]
+    assert hits and all(by_chunk[chunk_id][1] == 'docx' for chunk_id, _ in hits)
+
+    hits = index.search(vectors[0], top_k=TEST_VECTOR_COUNT, filters={
+        'created_after': datetime(2024, 1, 2), 'created_before': datetime(2024, 1, 4)
+    })[0]
+    assert {by_chunk[chunk_id][0] for chunk_id, _ in hits} == {'doc-1', 'doc-2'}
+
+    assert index.search(vectors[0], top_k=5, filters={'document_id': 'missing'})[0] == []
+
+
+def test_tenant_index_filters_respect_tombstones_and_snapshots(tenant_data, tmp_path):
+    """Test that filter bitmaps exclude removed vectors and survive compaction and snapshots."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids, documents=make_documents())
+    filters = {'document_id': 'doc-0'}
+
+    assert chunk_ids[0] in dict(index.search(vectors[0], top_k=1, filters=filters)[0])
+    index.remove(embedding_ids[:1])
+    hits = index.search(vectors[0], top_k=TEST_VECTOR_COUNT, filters=filters)[0]
+    assert len(hits) == TEST_VECTOR_COUNT // 5 - 1 and chunk_ids[0] not in dict(hits)
+
+    index.compact()
+    index.save(str(tmp_path), '1.0')
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+
+    hits = loaded.search(vectors[5], top_k=TEST_VECTOR_COUNT, filters=filters)[0]
+    assert len(hits) == TEST_VECTOR_COUNT // 5 - 1 and hits[0][0] == chunk_ids[5]
+    assert loaded.filter_chunk_ids([chunk_ids[5], chunk_ids[6], chunk_ids[0]],
+                                   filters) == [chunk_ids[5]]
+
+
+def test_tenant_index_rejects_unknown_filters(tenant_data):
+    """Test that unsupported filter names raise instead of being ignored."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids)
+
+    with pytest.raises(ValueError):
+        index.search(vectors[0], top_k=1, filters={'client_id': 'x'})
+
+
+def test_document_centroids_track_adds_removes_and_snapshots(tenant_data, tmp_path):
+    """Test that document centroids are updated incrementally and select the query's document."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    documents = make_documents()
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors[:25], chunk_ids[:25], embedding_ids[:25], documents=documents[:25])
+    index.add(vectors[25:], chunk_ids[25:], embedding_ids[25:], documents=documents[25:])
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = normalized[3::5].mean(axis=0)
+
+    document_ids, sums, counts = index.document_centroids()
+    assert index.document_count == 5
+    np.testing.assert_allclose(sums[document_ids.index('doc-3')], normalized[3::5].sum(axis=0),
+                               atol=1e-4)
+    assert index.top_documents(query, 2)[0][0] == 'doc-3'
+    pdf_documents = index.top_documents(query, 5, filters={'document_type': 'pdf'})[0]
+    assert set(pdf_documents) == {'doc-0', 'doc-2', 'doc-4'}
+
+    index.remove(embedding_ids[3::5])
+    index.remove(embedding_ids[1:2])
+    document_ids, sums, counts = index.document_centroids()
+    assert index.document_count == 4 and 'doc-3' not in index.top_documents(query, 5)[0]
+    np.testing.assert_allclose(sums[document_ids.index('doc-1')], normalized[6::5].sum(axis=0),
+                               atol=1e-4)
+
+    index.compact()
+    index.save(str(tmp_path), '1.0')
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+    loaded_ids, loaded_sums, loaded_counts = loaded.document_centroids()
+    assert loaded_ids == document_ids
+    np.testing.assert_allclose(loaded_sums, sums, atol=1e-5)
+    assert loaded_counts.tolist() == counts.tolist() == [10, 9, 10, 10]
+
+
+def test_quantized_remove_does_not_drift_document_centroids(tenant_data):
+    """Test that quantized removals re-sum centroids instead of subtracting lossy codes."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION, {'index_type': 'sq8', 'sq8_min_vectors': 1})
+    index.add(vectors, chunk_ids, embedding_ids, documents=make_documents())
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    index.remove(embedding_ids[0:45:5])
+
+    document_ids, sums, counts = index.document_centroids()
+    assert counts[document_ids.index('doc-0')] == 1
+    # Left with the error of one SQ8 code, not the accumulated error of nine
+    np.testing.assert_allclose(sums[document_ids.index('doc-0')], normalized[45], atol=2e-4)
+    np.testing.assert_allclose(sums[document_ids.index('doc-1')], normalized[1::5].sum(axis=0),
+                               atol=1e-4)
+
+
+def test_document_restricted_search_bypasses_filter_cache(tenant_data):
+    """Test that per-query document restrictions search only those documents, uncached."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.add(vectors, chunk_ids, embedding_ids, documents=make_documents())
+    index.remove(embedding_ids[3:4])
+    restrictions = [['doc-3', 'doc-4'], None, ['doc-1'], ['doc-missing']]
+
+    results = index.search(vectors[3:7], top_k=TEST_VECTOR_COUNT, documents=restrictions)
+
+    assert not index._filter_cache
+    assert {chunk_ids.index(chunk_id) % 5 for chunk_id, _ in results[0]} == {3, 4}
+    assert len(results[0]) == 2 * TEST_VECTOR_COUNT // 5 - 1
+    assert chunk_ids[3] not in dict(results[0])
+    assert results[1] == index.search(vectors[4], top_k=TEST_VECTOR_COUNT)[0]
+    assert results[2] == index.search(vectors[5], top_k=TEST_VECTOR_COUNT,
+                                      filters={'document_id': 'doc-1'})[0]
+    assert results[3] == []
+
+    restricted = index.search(vectors[4], top_k=5, documents=[['doc-3', 'doc-4']],
+                              filters={'document_type': 'pdf'})[0]
+    assert {chunk_ids.index(chunk_id) % 5 for chunk_id, _ in restricted} == {4}
+
+    sharded = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, {'shards': 3})
+    sharded.add(vectors, chunk_ids, embedding_ids, documents=make_documents())
+    assert sharded.search(vectors[5], top_k=5, documents=[['doc-1']]) == \
+        sharded.search(vectors[5], top_k=5, filters={'document_id': 'doc-1'})
+
+
+def test_sharded_index_merges_document_centroids(tenant_data):
+    """Test that per-shard partial centroids merge into the same ranking as one index."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    documents = make_documents()
+    single = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    single.add(vectors, chunk_ids, embedding_ids, documents=documents)
+    sharded = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, {'shards': 3})
+    sharded.add(vectors, chunk_ids, embedding_ids, documents=documents)
+
+    assert sharded.top_documents(vectors[:3], 5) == single.top_documents(vectors[:3], 5)
+    assert sorted(sharded.document_centroids()[2].tolist()) == [10] * 5
+
+
+def test_sharded_document_count_counts_distinct_documents(tenant_data):
+    """Test that documents spread across shards are counted once each, not per largest shard."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    documents = [(f"doc-{i // 2}", 'pdf', None) for i in range(TEST_VECTOR_COUNT)]
+    sharded = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, {'shards': 3})
+    sharded.add(vectors, chunk_ids, embedding_ids, documents=documents)
+
+    assert sharded.document_count == TEST_VECTOR_COUNT // 2
+    assert max(shard.document_count for shard in sharded.shards) < sharded.document_count
+
+    sharded.remove(embedding_ids[:4])
+    assert sharded.document_count == TEST_VECTOR_COUNT // 2 - 2
+    assert 'doc-0' not in sharded.document_ids()
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'index_type': 'sq8', 'sq8_min_vectors': 1}
+])
+def test_sharded_index_matches_single_index(tenant_data, params):
+    """Test that scatter-gather over shards returns the same top-k as one index."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    single = TenantIndex('tenant-a', VECTOR_DIMENSION, params)
+    single.add(vectors, chunk_ids, embedding_ids)
+    sharded = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, {'shards': 4, **params})
+    sharded.add(vectors, chunk_ids, embedding_ids)
+    fetcher = Mock(side_effect=lambda ids: vectors[[embedding_ids.index(i) for i in ids]])
+
+    assert sharded.ntotal == TEST_VECTOR_COUNT
+    assert all(shard.ntotal for shard in sharded.shards)
+    for expected, actual in zip(single.search(vectors[:5], 10, vector_fetcher=fetcher),
+                                sharded.search(vectors[:5], 10, vector_fetcher=fetcher)):
+        assert [chunk_id for chunk_id, _ in actual] == [chunk_id for chunk_id, _ in expected]
+        assert [score for _, score in actual] == pytest.approx([score for _, score in expected],
+                                                               abs=1e-4)
+
+
+@pytest.mark.parametrize('shards', [1, 3])
+def test_quantized_search_reranks_each_query_through_its_own_fetcher(tenant_data, shards):
+    """Test that per-query fetchers each fetch only their queries' candidates."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    params = {'index_type': 'sq8', 'sq8_min_vectors': 1, 'shards': shards}
+    index = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, params) if shards > 1 \
+        else TenantIndex('tenant-a', VECTOR_DIMENSION, params)
+    index.add(vectors, chunk_ids, embedding_ids)
+    first, second = (Mock(side_effect=lambda ids: vectors[[embedding_ids.index(i) for i in ids]])
+                     for _ in range(2))
+
+    hits = index.search(vectors[:3], 5, vector_fetcher=[first, second, None])
+
+    assert first.call_count == 1 and second.call_count == 1
+    assert [hit[0][0] for hit in hits] == chunk_ids[:3]
+    assert hits[1] == index.search(vectors[1], 5, vector_fetcher=second)[0]
+    # A query without a fetcher keeps its index-scored top-k
+    assert [chunk_id for chunk_id, _ in hits[2]] == \
+        [chunk_id for chunk_id, _ in index.search(vectors[2], 5)[0]]
+
+def test_sharded_index_remove_filter_and_snapshot(tenant_data, tmp_path):
+    """Test that removals and filters route to shards and survive a snapshot round trip."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    sharded = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, {'shards': 3})
+    sharded.add(vectors, chunk_ids, embedding_ids, documents=make_documents())
+
+    assert sharded.remove(embedding_ids[:10]) == 10
+    assert embedding_ids[0] not in sharded and embedding_ids[10] in sharded
+    sharded.save(str(tmp_path), '1.0')
+
+    loaded = ShardedTenantIndex.load(str(tmp_path), mmap=True)
+    hits = loaded.search(vectors[10], top_k=TEST_VECTOR_COUNT, filters={'document_id': 'doc-0'})[0]
+
+    assert loaded.shard_count == 3 and loaded.live_count == TEST_VECTOR_COUNT - 10
+    assert hits[0][0] == chunk_ids[10]
+    assert len(hits) == TEST_VECTOR_COUNT // 5 - 2
+
+
+def test_registry_builds_sharded_tenants_from_overrides(tenant_data, snapshot_config):
+    """Test that a per-tenant shard count builds, snapshots and reloads a sharded index."""
+    snapshot_config['tenant_overrides'] = {'tenant-big': {'shards': 4}}
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config, embedding_version='1.0')
+
+    big = registry.get_or_build('tenant-big', lambda: tenant_data)
+    small = registry.get_or_build('tenant-small', lambda: tenant_data)
+
+    assert isinstance(big, ShardedTenantIndex) and big.shard_count == 4
+    assert isinstance(small, TenantIndex)
+    assert registry.stats()[0]['shards'] == 4
+
+    reloaded = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config, embedding_version='1.0')
+    index = reloaded.get_or_build('tenant-big', Mock(side_effect=AssertionError('database scan')))
+    assert index.source == 'snapshot' and index.ntotal == TEST_VECTOR_COUNT
+
+    reloaded.configure_tenant('tenant-big', shards=2)
+    assert reloaded.get('tenant-big') is None
+
+
+@pytest.mark.parametrize('params', [
+    {'index_type': 'ivf_flat', 'ivf_min_vectors': 1, 'nlist': 2},
+    {'index_type': 'ivf_flat', 'ivf_min_vectors': 1, 'nlist': 2, 'shards': 2}
+])
+def test_bulk_load_trains_once_and_appends_in_chunks(tenant_data, params):
+    """Test that train() plus chunked append() builds a searchable index without rebuilds."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = ShardedTenantIndex('tenant-a', VECTOR_DIMENSION, params) if 'shards' in params \
+        else TenantIndex('tenant-a', VECTOR_DIMENSION, params)
+    index.rebuild = Mock(side_effect=AssertionError('rebuild during bulk load'))
+
+    index.train(vectors[:index.training_size(TEST_VECTOR_COUNT)], TEST_VECTOR_COUNT)
+    for start in range(0, TEST_VECTOR_COUNT, 20):
+        end = start + 20
+        index.append(vectors[start:end], chunk_ids[start:end], embedding_ids[start:end],
+                     make_documents()[start:end])
+
+    assert index.index_type == 'ivf_flat' and index.ntotal == TEST_VECTOR_COUNT
+    assert index.search(vectors[33], top_k=1)[0][0][0] == chunk_ids[33]
+    doc_3_chunks = index.filter_chunk_ids(chunk_ids, {'document_id': 'doc-3'})
+    assert len(doc_3_chunks) == TEST_VECTOR_COUNT // 5
+
+
+def test_registry_publishes_offline_build(tenant_data, snapshot_config):
+    """Test that write_snapshot() publishes an index that workers load instead of scanning."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config, embedding_version='1.0')
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION)
+    index.train(vectors[:0], TEST_VECTOR_COUNT)
+    index.append(vectors, chunk_ids, embedding_ids)
+    index.watermark = datetime.utcnow()
+
+    path = registry.write_snapshot(index)
+    loaded = registry.get_or_build('tenant-a', Mock(side_effect=AssertionError('database scan')))
+
+    assert os.path.isdir(path)
+    assert loaded.source == 'snapshot' and loaded.ntotal == TEST_VECTOR_COUNT
+
+
+@pytest.mark.parametrize('index_type,params', [
+    ('flat', {}),
+    ('hnsw', {'hnsw_min_vectors': 1}),
+    ('ivf_pq', {'ivf_pq_min_vectors': 1, 'nlist': 1, 'pq_m': 8, 'pq_nbits': 4})
+])
+def test_projected_index_reranks_at_full_dimension(tenant_data, index_type, params):
+    """Test that a projected index stores smaller vectors and reranks to exact scores."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION,
+                        {'index_type': index_type, 'projection': 'pca', 'projection_dim': 32,
+                         'projection_min_vectors': 1, **params})
+    index.add(vectors, chunk_ids, embedding_ids)
+    fetcher = Mock(side_effect=lambda ids: vectors[[embedding_ids.index(emb_id) for emb_id in ids]])
+
+    hits = index.search(vectors[7], top_k=3, vector_fetcher=fetcher)[0]
+
+    assert index.projected and index.reranks
+    assert index.describe()['projection_dim'] == 32
+    assert index.describe()['bytes_per_vector'] < VECTOR_DIMENSION * 4
+    assert hits[0][0] == chunk_ids[7]
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+    fetcher.assert_called_once()
+
+
+def test_projection_applies_above_threshold_and_survives_snapshot(tenant_data, tmp_path):
+    """Test that tenants are projected once they grow and that snapshots keep the projection."""
+    vectors, chunk_ids, embedding_ids = tenant_data
+    index = TenantIndex('tenant-a', VECTOR_DIMENSION,
+                        {'projection': 'truncate', 'projection_dim': 64,
+                         'projection_min_vectors': 30})
+    index.add(vectors[:20], chunk_ids[:20], embedding_ids[:20])
+    assert not index.projected
+
+    index.add(vectors[20:], chunk_ids[20:], embedding_ids[20:])
+    index.remove(embedding_ids[:5])
+    index.compact()
+    index.save(str(tmp_path), '1.0')
+    loaded = TenantIndex.load(str(tmp_path), mmap=True)
+
+    assert index.projected and loaded.projected and loaded.live_count == TEST_VECTOR_COUNT - 5
+    assert loaded.search(vectors[25], top_k=1)[0][0][0] == chunk_ids[25]
+
+
+def test_registry_drops_tenant_when_projection_changes(tenant_data):
+    """Test that changing a tenant's projection forces a rebuild from full-dimension vectors."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION)
+    registry.get_or_build('tenant-a', lambda: tenant_data)
+
+    registry.configure_tenant('tenant-a', nprobe=4)
+    assert registry.get('tenant-a') is not None
+
+    registry.configure_tenant('tenant-a', projection='pca', projection_min_vectors=1)
+    assert registry.get('tenant-a') is None
+    assert registry.get_or_build('tenant-a', lambda: tenant_data).projected
+
+
+def test_registry_demotes_least_recently_searched_tenant(snapshot_config):
+    """Test that exceeding the memory budget demotes the least recently searched tenant to mmap."""
+    config = {**snapshot_config, 'memory': {'budget_mb': 1}}
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, config)
+    data_a, data_b = make_tenant_data(100), make_tenant_data(100)
+
+    registry.get_or_build('tenant-a', lambda: data_a)
+    registry.get_or_build('tenant-b', lambda: data_b)
+
+    assert registry.residency('tenant-a') == IndexResidency.MMAP
+    assert registry.residency('tenant-b') == IndexResidency.MEMORY
+    assert registry.resident_bytes() <= registry.memory_budget
+    index_a = registry.get_or_build('tenant-a', Mock())
+    assert index_a.search(data_a[0][3], top_k=1)[0][0][0] == data_a[1][3]
+
+
+def test_registry_evicts_without_snapshots_and_reports_stats():
+    """Test that tenants are evicted when they cannot be demoted and stay listed in stats."""
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, {'memory': {'budget_mb': 1}})
+    data_a, data_b = make_tenant_data(100), make_tenant_data(100)
+
+    registry.get_or_build('tenant-a', lambda: data_a)
+    registry.get_or_build('tenant-a', lambda: data_a)
+    registry.get_or_build('tenant-b', lambda: data_b)
+
+    stats = {entry['tenant_id']: entry for entry in registry.stats(include_evicted=True)}
+    assert registry.tenants() == ['tenant-b']
+    assert stats['tenant-a']['residency'] == IndexResidency.EVICTED.value
+    assert stats['tenant-a']['hits'] == 2
+    assert stats['tenant-b']['residency'] == IndexResidency.MEMORY.value
+    assert stats['tenant-b']['vector_count'] == 100
+    assert [entry['tenant_id'] for entry in registry.stats()] == ['tenant-b']
+
+
+def test_registry_warms_up_most_active_tenants(tenant_data, snapshot_config):
+    """Test that warm-up loads the tenants with the most recorded lookups."""
+    first = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config)
+    for tenant_id, lookups in (('tenant-a', 1), ('tenant-b', 5), ('tenant-c', 3)):
+        for _ in range(lookups):
+            first.get_or_build(tenant_id, lambda: tenant_data)
+    first.save_usage()
+
+    registry = TenantIndexRegistry(VECTOR_DIMENSION, snapshot_config)
+    assert registry.active_tenants() == ['tenant-b', 'tenant-c', 'tenant-a']
+    on_complete = Mock()
+    registry.warm_up(lambda tenant_id: (Mock(), None), limit=2, on_complete=on_complete).join()
+
+    on_complete.assert_called_once()
+    assert sorted(registry.tenants()) == ['tenant-b', 'tenant-c']
+    assert registry.stats()[0]['hits'] == 0
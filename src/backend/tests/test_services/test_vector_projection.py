@@ -0,0 +1,67 @@
+"""
+Test suite for dimension-reducing vector projections.
+Tests PCA fitting, truncation, renormalization and persistence.
+
+Version: 1.0.0
+"""
+
+import numpy as np
+import pytest
+
+from app.services.vector_projection import VectorProjection
+
+# Test configuration constants
+INPUT_DIMENSION = 64
+PROJECTED_DIMENSION = 8
+
+
+@pytest.fixture
+def low_rank_vectors():
+    """Create normalized vectors that lie close to an 8-dimensional subspace."""
+    rng = np.random.default_rng(42)
+    basis = rng.standard_normal((PROJECTED_DIMENSION, INPUT_DIMENSION))
+    vectors = rng.standard_normal((500, PROJECTED_DIMENSION)) @ basis
+    vectors += 0.01 * rng.standard_normal(vectors.shape)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def test_pca_keeps_variance_and_neighbours(low_rank_vectors):
+    """Test that PCA onto the data's subspace preserves nearest neighbours."""
+    projection = VectorProjection.fit('pca', low_rank_vectors, PROJECTED_DIMENSION)
+    projected = projection.apply(low_rank_vectors)
+
+    assert projected.shape == (500, PROJECTED_DIMENSION)
+    assert np.linalg.norm(projected, axis=1) == pytest.approx(np.ones(500), abs=1e-5)
+    assert projection.explained_variance > 0.99
+    full = np.argsort(-(low_rank_vectors[:20] @ low_rank_vectors.T), axis=1)[:, 1]
+    reduced = np.argsort(-(projected[:20] @ projected.T), axis=1)[:, 1]
+    assert np.mean(full == reduced) >= 0.9
+
+
+def test_truncation_keeps_leading_dimensions(low_rank_vectors):
+    """Test that truncation renormalizes the leading dimensions."""
+    projection = VectorProjection.fit('truncate', low_rank_vectors, PROJECTED_DIMENSION)
+    projected = projection.apply(low_rank_vectors[:1])
+
+    expected = low_rank_vectors[0, :PROJECTED_DIMENSION]
+    assert projected[0] == pytest.approx(expected / np.linalg.norm(expected), abs=1e-6)
+
+
+def test_projection_round_trip(low_rank_vectors, tmp_path):
+    """Test that a saved projection maps vectors identically after loading."""
+    projection = VectorProjection.fit('pca', low_rank_vectors, PROJECTED_DIMENSION)
+    path = str(tmp_path / 'projection.npz')
+    projection.save(path)
+
+    loaded = VectorProjection.load(path)
+
+    assert (loaded.method, loaded.dimension) == ('pca', PROJECTED_DIMENSION)
+    assert np.allclose(loaded.apply(low_rank_vectors), projection.apply(low_rank_vectors))
+
+
+@pytest.mark.parametrize('method,dimension', [('none', 8), ('pca', INPUT_DIMENSION), ('svd', 8)])
+def test_projection_rejects_invalid_settings(low_rank_vectors, method, dimension):
+    """Test that unknown methods and non-reducing dimensions are rejected."""
+    with pytest.raises(ValueError):
+        VectorProjection.fit(method, low_rank_vectors, dimension)
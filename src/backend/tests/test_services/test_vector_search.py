@@ -13,7 +13,7 @@ from unittest.mock import Mock, patch
 from prometheus_client import Counter, Histogram, Gauge
 from tenacity import RetryError
 
-from app.services.vector_search import VectorSearchService
+from app.services.vector_search import ChunkRecord, VectorSearchService
 from app.models.embedding import Embedding
 from app.models.chunk import Chunk
 from app.models.document import Document
@@ -239,7 +239,8 @@ async def test_batch_indexing(db_session, mock_cache, test_embeddings):
     )
     
     # Verify index size
-    assert service._index.ntotal == len(test_embeddings)
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    assert service._registry.get(tenant_id).ntotal == len(test_embeddings)
     
     # Test search after indexing
     query_vector = np.random.rand(VECTOR_DIMENSION).astype(np.float32)
@@ -277,4 +278,202 @@ async def test_cache_operations(db_session, mock_cache, test_embeddings):
     
     assert results1 == results2
     assert mock_cache.get.call_count == 2
-    assert mock_cache.setex.call_count == 1
\ No newline at end of file
+    assert mock_cache.setex.call_count == 1
+
+@pytest.mark.asyncio
+async def test_tenant_index_shared_across_services(db_session, mock_cache, test_embeddings):
+    """Test that tenant indices are built once and shared between service instances."""
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    mock_cache.get.return_value = None
+
+    query_vector = np.random.rand(VECTOR_DIMENSION).astype(np.float32)
+    query_vector = query_vector / np.linalg.norm(query_vector)
+
+    first = VectorSearchService(db_session, mock_cache)
+    first.search(query_vector, tenant_id)
+
+    second = VectorSearchService(db_session, mock_cache)
+    with patch.object(second, '_load_tenant_vectors') as mock_loader:
+        second.search(query_vector, tenant_id)
+        mock_loader.assert_not_called()
+
+    assert second._registry.get(tenant_id) is first._registry.get(tenant_id)
+    assert second._registry.get(tenant_id).ntotal == len(test_embeddings)
+
+@pytest.mark.asyncio
+async def test_remove_document_embeddings(db_session, mock_cache, test_embeddings):
+    """Test that a document's vectors are removed from the tenant index."""
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    document_id = test_embeddings[0].chunk.document_id
+    service = VectorSearchService(db_session, mock_cache)
+    service.batch_index(test_embeddings, tenant_id)
+
+    keep = [test_embeddings[0].id]
+    removed = service.remove_document(document_id, tenant_id, keep_embedding_ids=keep)
+
+    tenant_index = service._registry.get(tenant_id)
+    assert removed == len(test_embeddings) - 1
+    assert tenant_index.live_count == 1
+    assert test_embeddings[0].id in tenant_index
+    assert test_embeddings[1].id not in tenant_index
+
+@pytest.fixture
+def linked_duplicates(db_session, test_embeddings):
+    """Create a second document of the same tenant whose chunks are linked to the first's."""
+    canonical = test_embeddings[0].chunk
+    document = Document(
+        client_id=canonical.document.client_id,
+        filename="variant_doc.pdf",
+        type="docx",
+        metadata={"test": True}
+    )
+    db_session.add(document)
+    chunks = [
+        Chunk(document.id, f"Test content 0 variant {i}", i, canonical_chunk_id=canonical.id)
+        for i in range(2)
+    ]
+    db_session.add_all(chunks)
+    db_session.commit()
+    return chunks
+
+@pytest.mark.asyncio
+async def test_remove_document_promotes_linked_duplicates(db_session, mock_cache, test_embeddings,
+                                                          linked_duplicates):
+    """Test that duplicates of removed chunks get the canonical vector and are re-pointed."""
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    document_id = test_embeddings[0].chunk.document_id
+    canonical_vector = test_embeddings[0].get_vector().copy()
+    service = VectorSearchService(db_session, mock_cache)
+    service.batch_index(test_embeddings, tenant_id)
+
+    service.remove_document(document_id, tenant_id, keep_embedding_ids=[test_embeddings[1].id])
+
+    promoted, relinked = linked_duplicates
+    db_session.refresh(promoted)
+    db_session.refresh(relinked)
+    assert promoted.canonical_chunk_id is None
+    np.testing.assert_allclose(promoted.embedding.get_vector(), canonical_vector, atol=1e-6)
+    assert relinked.canonical_chunk_id == promoted.id and relinked.embedding is None
+    assert promoted.embedding.id in service._registry.get(tenant_id)
+
+@pytest.mark.asyncio
+async def test_linked_duplicates_are_lexically_searchable(db_session, mock_cache, test_embeddings,
+                                                         linked_duplicates):
+    """
+    Test that linked chunks are in the BM25 index, filter by their own document and score
+    via the canonical vector.
+    """
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    service = VectorSearchService(db_session, mock_cache)
+    linked_id = str(linked_duplicates[0].id)
+
+    assert linked_id in service._get_lexical_index(tenant_id)
+    assert service._filter_linked_chunks(
+        [linked_id], {'document_id': str(linked_duplicates[0].document_id)}
+    ) == [linked_id]
+    assert service._filter_linked_chunks([linked_id], {'document_type': 'pdf'}) == []
+
+    query = test_embeddings[0].get_vector()
+    similarities = service._chunk_similarities(query, [linked_id])
+    assert similarities[linked_id] == pytest.approx(1.0, abs=1e-5)
+
+@pytest.mark.asyncio
+async def test_hybrid_search_surfaces_lexical_match(db_session, mock_cache, test_embeddings):
+    """Test that an exact text match is returned even when its vector is below the threshold."""
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    service = VectorSearchService(db_session, mock_cache)
+    mock_cache.get.return_value = None
+
+    # A random query vector leaves no chunk above a 0.99 threshold
+    query_vector = np.random.rand(VECTOR_DIMENSION).astype(np.float32)
+    results = await service.search(
+        query_embedding=query_vector,
+        tenant_id=tenant_id,
+        threshold=0.99,
+        query_text="Test content 7"
+    )
+
+    assert results[0]['chunk_id'] == str(test_embeddings[7].chunk_id)
+    assert results[0]['lexical_score'] > 0
+    assert results[0]['fusion_score'] > 0
+    assert -1 <= results[0]['similarity_score'] <= 1
+
+@pytest.mark.asyncio
+async def test_search_hydrates_hits_as_slot_records(db_session, mock_cache, test_embeddings):
+    """Test that only the returned chunks are hydrated, as slot records rather than ORM rows."""
+    service = VectorSearchService(db_session, mock_cache)
+    chunk_ids = [str(embedding.chunk_id) for embedding in test_embeddings[:3]]
+
+    records = service._hydrate_chunks(chunk_ids + [str(uuid.uuid4())])
+
+    assert set(records) == set(chunk_ids)
+    record = records[chunk_ids[0]]
+    assert isinstance(record, ChunkRecord) and not hasattr(record, '__dict__')
+    assert record.document_id == str(test_embeddings[0].chunk.document_id)
+    assert record.content == test_embeddings[0].chunk.content
+    assert service._hydrate_chunks([]) == {}
+
+@pytest.mark.asyncio
+async def test_batch_index_loads_document_filters_in_one_query(db_session, mock_cache,
+                                                               test_embeddings):
+    """Test that batch indexing reads document attributes with one column query, not per chunk."""
+    service = VectorSearchService(db_session, mock_cache)
+    document = test_embeddings[0].chunk.document
+    chunk_ids = [str(embedding.chunk_id) for embedding in test_embeddings]
+
+    with patch.object(db_session, 'query', wraps=db_session.query) as spy:
+        documents = service._load_chunk_documents(chunk_ids)
+
+    assert spy.call_count == 1
+    assert set(documents) == set(chunk_ids)
+    assert documents[chunk_ids[0]] == (str(document.id), document.type, document.created_at)
+    assert service._load_chunk_documents([]) == {}
+
+@pytest.mark.asyncio
+async def test_asearch_matches_search_off_event_loop(db_session, mock_cache, test_embeddings):
+    """Test that asearch returns the same results as search and caches them."""
+    mock_cache.get.return_value = None
+    service = VectorSearchService(db_session, mock_cache)
+    query_vector = test_embeddings[2].get_vector()
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+
+    results = await service.asearch(query_vector, tenant_id, threshold=0.0)
+
+    assert results == service.search(query_vector, tenant_id, threshold=0.0)
+    assert results[0]['chunk_id'] == str(test_embeddings[2].chunk_id)
+    assert mock_cache.setex.call_count == 2
+    assert service._executor.queued == 0 and service._executor.running == 0
+
+@pytest.mark.asyncio
+async def test_hierarchical_search_restricts_to_top_documents(db_session, mock_cache,
+                                                              test_embeddings):
+    """Test that hierarchical retrieval searches only the chunks of the closest documents."""
+    mock_cache.get.return_value = None
+    service = VectorSearchService(db_session, mock_cache)
+    service.HIERARCHICAL_ENABLED = True
+    service.HIERARCHICAL_MIN_DOCUMENTS = 1
+    tenant_id = str(test_embeddings[0].chunk.document.client_id)
+    document_id = str(test_embeddings[0].chunk.document_id)
+
+    results = service.search(test_embeddings[4].get_vector(), tenant_id, threshold=0.0)
+
+    assert results[0]['chunk_id'] == str(test_embeddings[4].chunk_id)
+    assert {result['document_id'] for result in results} == {document_id}
+    assert service._get_tenant_index(tenant_id).top_documents(
+        test_embeddings[4].get_vector(), 1
+    ) == [[document_id]]
+    assert not service._get_tenant_index(tenant_id)._filter_cache
+
+def test_embedding_vector_stored_as_float32_bytes():
+    """Test that embeddings are stored as normalized float32 bytes and read back without copying."""
+    vector = np.random.rand(VECTOR_DIMENSION) * 10
+    embedding = Embedding(chunk_id=uuid.uuid4(), embedding_vector=vector)
+
+    stored = embedding.get_vector()
+
+    assert isinstance(embedding.vector, bytes)
+    assert len(embedding.vector) == VECTOR_DIMENSION * 4
+    assert stored.dtype == np.float32
+    assert not stored.flags.owndata
+    assert np.linalg.norm(stored) == pytest.approx(1.0, abs=1e-5)
+    assert np.allclose(stored, vector / np.linalg.norm(vector), atol=1e-6)
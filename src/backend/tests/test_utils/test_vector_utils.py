@@ -15,6 +15,7 @@ from app.utils.vector_utils import (
     calculate_cosine_similarity,
     normalize_vector,
     batch_similarity_search,
+    batch_similarity_search_matrix,
     validate_vector_dimension,
     VECTOR_DIMENSION,
     SIMILARITY_THRESHOLD
@@ -142,6 +143,51 @@ class TestVectorUtils:
         assert all(similarities[i] >= similarities[i+1] for i in range(len(similarities)-1)), \
             "Results should be sorted by similarity in descending order"
 
+    def test_batch_similarity_search_matches_pairwise(self):
+        """Test that the vectorized search returns the same matches as pairwise similarity."""
+        vectors = [self.query_vector + np.random.rand(VECTOR_DIMENSION) * scale
+                   for scale in np.linspace(0.1, 3.0, 50)]
+        
+        results = batch_similarity_search(self.query_vector, vectors)
+        
+        expected = sorted(
+            ((i, calculate_cosine_similarity(self.query_vector, v)) for i, v in enumerate(vectors)),
+            key=lambda x: x[1], reverse=True
+        )
+        expected = [(i, sim) for i, sim in expected if sim >= SIMILARITY_THRESHOLD]
+        assert [i for i, _ in results] == [i for i, _ in expected]
+        assert np.allclose([sim for _, sim in results], [sim for _, sim in expected], atol=1e-5)
+
+    def test_batch_similarity_search_matrix_top_k(self):
+        """Test top-k selection and thresholding over a contiguous matrix with multiple queries."""
+        matrix = self.test_vectors.astype(np.float32)
+        queries = matrix[[3, 7]]
+        
+        results = batch_similarity_search_matrix(queries, matrix, top_k=5, threshold=-1.0)
+        
+        assert len(results) == 2
+        assert [hits[0][0] for hits in results] == [3, 7]
+        assert all(len(hits) == 5 for hits in results)
+        for hits in results:
+            scores = [sim for _, sim in hits]
+            assert scores == sorted(scores, reverse=True)
+        
+        # Threshold masks everything but the exact match
+        assert batch_similarity_search_matrix(queries[0], matrix, top_k=5, threshold=0.9999) == [
+            [(3, pytest.approx(1.0, abs=1e-5))]
+        ]
+        
+        with pytest.raises(ValueError):
+            batch_similarity_search_matrix(queries, matrix[:, :10])
+
+    def test_batch_similarity_search_skips_invalid_vectors(self):
+        """Test that list input skips vectors with wrong dimensions but keeps original indices."""
+        vectors = [self.query_vector, np.zeros(VECTOR_DIMENSION + 1), self.query_vector * 2]
+        
+        results = batch_similarity_search(self.query_vector, vectors)
+        
+        assert sorted(i for i, _ in results) == [0, 2]
+
     def test_validate_vector_dimension(self):
         """Test vector dimension validation with various cases."""
         # Valid cases